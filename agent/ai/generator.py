@@ -9,6 +9,9 @@ from agent.storage.models import ScrapedPost, GeneratedTweet
 
 logger = logging.getLogger("twitter_agent")
 
+# How much of each post body goes into the prompt; callers load only this much.
+PROMPT_BODY_CHARS = 500
+
 SYSTEM_PROMPT = """You are an expert social media strategist specializing in Twitter/X content creation.
 
 Your job is to:
@@ -104,7 +107,7 @@ Return ONLY a JSON array of strings, each string being one tweet. Example:
                 f"Title: {post.title}\n"
             )
             if post.content:
-                entry += f"Body: {post.content[:500]}\n"
+                entry += f"Body: {post.content[:PROMPT_BODY_CHARS]}\n"
             if post.top_comments:
                 entry += "Top comments:\n"
                 for j, comment in enumerate(post.top_comments[:3], 1):
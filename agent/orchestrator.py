@@ -1,12 +1,20 @@
-import json
+import asyncio
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 
 from agent.utils.config import AgentConfig
-from agent.storage.database import Database
-from agent.storage.models import User
+from agent.storage.base import Storage
+from agent.storage.models import IngestResult, ScrapedPost, User
+from agent.storage.backup import BackupManager
+from agent.storage.retention import RetentionManager
+from agent.storage.scoring import ScoringProfile, profiles_for_topics
+from agent.reddit.cache import get_response_cache
 from agent.reddit.fetcher import RedditFetcher
-from agent.ai.generator import ContentGenerator
+from agent.reddit.planner import DiscoveryPlanner
+from agent.reddit.ratelimit import rate_limiter
+from agent.reddit.replay import configure_fixtures
+from agent.reddit.transport import configure_reddit_io
+from agent.ai.generator import PROMPT_BODY_CHARS, ContentGenerator
 from agent.poster.publisher import TweetPublisher
 from agent.telegram.bot import TelegramBot
 
@@ -16,11 +24,12 @@ logger = logging.getLogger("twitter_agent")
 class Orchestrator:
     """Coordinates the full pipeline: scrape Reddit -> generate -> approve -> post."""
 
-    def __init__(self, config: AgentConfig, db: Database, telegram_bot: TelegramBot):
+    def __init__(self, config: AgentConfig, db: Storage, telegram_bot: TelegramBot):
         self.config = config
         self.db = db
         self.telegram_bot = telegram_bot
         self.generator = ContentGenerator(config.claude)
+        configure_reddit_io(config.reddit)
 
         # Wire up approval handler's post callback
         self.telegram_bot.approval_handler.set_post_callback(self._post_approved_tweet)
@@ -33,58 +42,112 @@ class Orchestrator:
             logger.info("No active users, skipping discovery")
             return
 
-        total_scraped = 0
-        topics_processed = 0
+        planner = DiscoveryPlanner(self.config.reddit)
+        plan = planner.plan(users)
+        known_lookup = self.db.get_known_post_scores if self.config.reddit.incremental else None
+        posts = await planner.execute(plan, known_lookup=known_lookup)
 
-        for user in users:
-            try:
-                if not user.reddit_client_id or not user.reddit_client_secret:
-                    logger.warning(f"User {user.id} has no Reddit credentials, skipping")
-                    continue
-
-                user_topics = user.topics
-                if not user_topics:
-                    continue
-
-                fetcher = RedditFetcher(
-                    client_id=user.reddit_client_id,
-                    client_secret=user.reddit_client_secret,
-                )
+        ingest = IngestResult()
+        if posts:
+            ingest = await self.db.save_scraped_posts(posts, upsert=True)
+        linked = await self.db.link_posts(plan.unchanged)
+        if posts or linked:
+            await self._rescore(users)
 
-                posts = fetcher.fetch_for_topics(
-                    topics=user_topics,
-                    posts_per_subreddit=self.config.reddit.posts_per_subreddit,
-                    time_filter=self.config.reddit.time_filter,
-                    comments_per_post=self.config.reddit.comments_per_post,
-                )
+        await self.db.log_run(
+            "discovery", "success",
+            topics_processed=plan.topics_processed,
+            tweets_scraped=ingest.saved,
+            fetches_saved=plan.fetches_saved,
+        )
+        logger.info(
+            f"Discovery complete: {plan.topics_processed} topics, {ingest.inserted} new posts, "
+            f"{ingest.updated} updated, {linked} known posts linked to new topics, "
+            f"{plan.fetches_saved} duplicate fetches skipped"
+        )
+        logger.info(f"Reddit rate limiter: {rate_limiter.metrics()}")
+        if get_response_cache():
+            logger.info(f"Reddit response cache: {get_response_cache().metrics()}")
 
-                if posts:
-                    count = await self.db.save_scraped_posts(posts)
-                    total_scraped += count
+    async def run_score_refresh(self):
+        """Re-read scores of recently scraped posts so rankings keep up with votes."""
+        post_ids = await self.db.get_post_ids_for_refresh(self.config.reddit.refresh_window_hours)
+        users = await self.db.get_active_users()
+        credentials = list(dict.fromkeys(
+            (u.reddit_client_id, u.reddit_client_secret)
+            for u in users if u.reddit_client_id and u.reddit_client_secret
+        ))
+        if not post_ids or not credentials:
+            logger.info("Nothing to refresh, skipping score refresh")
+            return
 
-                topics_processed += len(user_topics)
+        fetchers = [
+            RedditFetcher(
+                client_id=client_id,
+                client_secret=client_secret,
+                user_agent=self.config.reddit.user_agent,
+                max_concurrency=self.config.reddit.max_concurrency,
+            )
+            for client_id, client_secret in credentials
+        ]
+        # /api/info takes 100 ids per request; spread the batches over credentials.
+        batches = [post_ids[i:i + 100] for i in range(0, len(post_ids), 100)]
+        results = await asyncio.gather(*(
+            fetchers[i % len(fetchers)].fetch_post_stats_async(batch)
+            for i, batch in enumerate(batches)
+        ))
+        stats = [s for batch in results for s in batch]
+        updated = await self.db.update_post_stats(stats)
+        await self._rescore(users)
+
+        await self.db.log_run("score_refresh", "success", posts_refreshed=updated)
+        logger.info(f"Score refresh complete: {updated}/{len(post_ids)} posts updated")
+
+    async def _rescore(self, users: List[User]):
+        """Apply time decay and each user's per-topic weights to all stored
+        posts; the config file's topic weights apply to shared links."""
+        config_topics = [
+            {"name": t.name, "scoring": t.scoring.model_dump()}
+            for t in self.config.topics if t.scoring
+        ]
+        profiles = profiles_for_topics(config_topics)
+        for user in users:
+            profiles.update(profiles_for_topics(user.topics, user.id))
+        default = ScoringProfile(**self.config.scoring.model_dump())
+        rescored = await self.db.rescore_posts(profiles, default)
+        logger.info(f"Rescored {rescored} posts ({len(profiles)} topic profiles)")
 
-            except Exception as e:
-                logger.error(f"Discovery failed for user {user.id}: {e}")
+    async def run_retention(self):
+        """Archive and delete aged posts and run logs, then compact the file."""
+        await RetentionManager(self.db, self.config.retention).run()
 
-        await self.db.log_run(
-            "discovery", "success",
-            topics_processed=topics_processed,
-            tweets_scraped=total_scraped,
-        )
-        logger.info(f"Discovery complete: {topics_processed} topics, {total_scraped} posts")
+    async def run_backup(self):
+        """Snapshot the database files online, then rotate old snapshots."""
+        await BackupManager(self.db, self.config.backup).run()
 
     async def run_generation(self):
-        """Generate tweets for all active users and send for approval."""
+        """Generate tweets for all active users and send for approval.
+
+        Users are worked through one at a time per storage write group, the
+        groups side by side: each database shard has one user in flight, and
+        a single-file or Postgres database generates sequentially.
+        """
         users = await self.db.get_active_users()
         if not users:
             return
 
+        groups: Dict[int, List[User]] = {}
         for user in users:
-            try:
-                await self.run_pipeline_for_user(user)
-            except Exception as e:
-                logger.error(f"Generation failed for user {user.id}: {e}")
+            groups.setdefault(self.db.write_group(user.id), []).append(user)
+
+        async def generate_for(group: List[User]):
+            for user in group:
+                try:
+                    await self.run_pipeline_for_user(user)
+                except Exception as e:
+                    logger.error(f"Generation failed for user {user.id}: {e}")
+
+        await asyncio.gather(*(generate_for(group) for group in groups.values()))
 
     async def run_pipeline_for_user(self, user: User):
         """Run generation + approval pipeline for a single user."""
@@ -102,12 +165,20 @@ class Orchestrator:
                 tone = "informative"
                 hashtags = []
 
-            top_posts = await self.db.get_top_posts(topic_name, limit=20)
+            top_posts = await self.db.get_top_posts(
+                topic_name, limit=20,
+                max_age_hours=self.config.reddit.top_posts_window_hours,
+                user_id=user.id,
+                body_chars=PROMPT_BODY_CHARS,
+            )
             if not top_posts:
                 logger.warning(f"No scraped posts for topic: {topic_name}")
                 continue
+            await self._fill_comment_gaps(user, top_posts)
 
-            generated = self.generator.generate_tweets(
+            # In a worker thread, so other write groups keep going meanwhile.
+            generated = await asyncio.to_thread(
+                self.generator.generate_tweets,
                 topic=topic_name,
                 top_posts=top_posts,
                 tone=tone,
@@ -129,6 +200,25 @@ class Orchestrator:
 
             logger.info(f"Generated {len(generated)} tweets for '{topic_name}' -> user {user.id}")
 
+    async def _fill_comment_gaps(self, user: User, posts: List[ScrapedPost]):
+        """Load comments for prompt posts that discovery left without them."""
+        if all(post.comments_hydrated for post in posts):
+            return
+        if not user.reddit_client_id or not user.reddit_client_secret:
+            return
+
+        fetcher = RedditFetcher(
+            client_id=user.reddit_client_id,
+            client_secret=user.reddit_client_secret,
+            user_agent=self.config.reddit.user_agent,
+            max_concurrency=self.config.reddit.max_concurrency,
+        )
+        hydrated = await fetcher.hydrate_missing_comments_async(
+            posts, self.config.reddit.comments_per_post
+        )
+        if hydrated:
+            await self.db.update_post_comments(hydrated)
+
     async def _post_approved_tweet(self, tweet_id: int) -> bool:
         """Post an approved tweet to Twitter. Called by approval handler."""
         tweet = await self.db.get_generated_tweet_by_id(tweet_id)
@@ -149,6 +239,7 @@ class Orchestrator:
         result = await publisher.post_tweet(tweet.content)
         if result["success"]:
             await self.db.update_tweet_status(tweet_id, "posted", posted_tweet_id=result["tweet_id"])
+            await self.db.flush()
             await self.db.log_run("posting", "success", tweets_posted=1)
             return True
         else:
@@ -166,23 +257,16 @@ class Orchestrator:
                         "subreddits": t.subreddits,
                         "tone": t.tone,
                         "hashtags": t.hashtags,
+                        **({"scoring": t.scoring.model_dump()} if t.scoring else {}),
                     }
                     for t in self.config.topics
                 ]
-                existing = admin.topics
-                existing_names = {
-                    t["name"] if isinstance(t, dict) else t for t in existing
-                }
                 for ct in config_topics:
-                    if ct["name"] not in existing_names:
-                        existing.append(ct)
-                if len(existing) > len(admin.topics):
-                    await self.db.update_user_topics(
-                        admin.telegram_chat_id, json.dumps(existing)
-                    )
+                    await self.db.add_topic(admin.id, ct)
 
         logger.info("Orchestrator initialized")
 
     async def shutdown(self):
         """Gracefully shut down."""
+        configure_fixtures(None)  # flush any recording
         logger.info("Orchestrator shut down")
@@ -0,0 +1,201 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("twitter_agent")
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    body BLOB NOT NULL,
+    content_type TEXT DEFAULT '',
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+"""
+
+
+class ResponseCache:
+    """Persistent TTL cache for Reddit listing and comment-tree responses.
+
+    Entries are keyed by request path and query, which for the calls the
+    fetcher makes means (subreddit, sort, time_filter, limit) for listings
+    and (submission id, sort) for comment trees. Expired entries are kept
+    for revalidation with If-None-Match/If-Modified-Since when Reddit sent
+    validators, and the least recently used entries are evicted once the
+    cache grows past max_bytes. Thread-safe; PRAW calls run in worker threads.
+    """
+
+    def __init__(
+        self,
+        path: str = "./data/reddit_cache.db",
+        listing_ttl: int = 600,
+        comments_ttl: int = 1800,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttls = {"listing": listing_ttl, "comments": comments_ttl}
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(CACHE_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def classify(method: str, url: str) -> Optional[str]:
+        """Return the cacheable kind of a request, or None to bypass the cache."""
+        if method.lower() != "get":
+            return None
+        path = urlsplit(url).path.rstrip("/")
+        parts = path.split("/")
+        if len(parts) >= 4 and parts[1] == "r" and parts[3] in ("top", "hot", "new", "rising"):
+            return "listing"
+        if "comments" in parts:
+            return "comments"
+        return None
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict]) -> str:
+        path = urlsplit(url).path.rstrip("/").lower()
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{path}?{query}"
+
+    def lookup(self, key: str) -> Tuple[Optional[sqlite3.Row], bool]:
+        """Return (entry, is_fresh). Stale entries are returned for revalidation."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+            fresh = row is not None and row["expires_at"] > now
+            if fresh:
+                self.hits += 1
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            else:
+                self.misses += 1
+            return row, fresh
+
+    def put(self, key: str, kind: str, response: Response):
+        body = response.content
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, kind, body, content_type, etag, last_modified,
+                    expires_at, accessed_at, size)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, kind, body, response.headers.get("content-type", ""),
+                 response.headers.get("etag"), response.headers.get("last-modified"),
+                 now + self.ttls[kind], now, len(body)),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def touch(self, key: str, kind: str):
+        """Extend an entry's TTL after a successful revalidation."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now + self.ttls[kind], now, key),
+            )
+            conn.commit()
+            self.revalidated += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for row in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((row["key"],))
+            freed += row["size"]
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def to_response(row: sqlite3.Row, url: str) -> Response:
+        response = Response()
+        response.status_code = 200
+        response._content = bytes(row["body"])
+        response.headers = CaseInsensitiveDict({
+            "content-type": row["content_type"] or "application/json",
+            "content-length": str(row["size"]),
+        })
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def configure_response_cache(cache: Optional[ResponseCache]):
+    """Install the process-wide cache used by RedditFetcher (None disables it)."""
+    global _response_cache
+    if _response_cache is not None and _response_cache is not cache:
+        _response_cache.close()
+    _response_cache = cache
+    if cache is not None:
+        logger.info(f"Reddit response cache at {cache.path}")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _response_cache
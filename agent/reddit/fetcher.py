@@ -1,45 +1,84 @@
+import asyncio
+import functools
 import logging
-from typing import List
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
 
 import praw
 
+from agent.reddit.cache import ResponseCache, get_response_cache
+from agent.reddit.ratelimit import RedditRateLimiter, rate_limiter
+from agent.reddit.replay import FixtureTransport, get_fixtures
+from agent.reddit.transport import RedditRequestor
 from agent.storage.models import ScrapedPost
 
 logger = logging.getLogger("twitter_agent")
 
+# Async lookup of already-stored posts: post_id -> score at last scrape.
+KnownLookup = Callable[[List[str]], Awaitable[Dict[str, int]]]
+PostsCallback = Callable[[List[ScrapedPost]], Awaitable[object]]
+
 
 class RedditFetcher:
     """Fetches top posts from Reddit using PRAW (read-only mode)."""
 
-    def __init__(self, client_id: str, client_secret: str, user_agent: str = "TweetAgent/1.0"):
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-        )
-        self.reddit.read_only = True
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str = "TweetAgent/1.0",
+        max_concurrency: int = 4,
+        executor: Optional[Executor] = None,
+        limiter: Optional[RedditRateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        fixtures: Optional[FixtureTransport] = None,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user_agent = user_agent
+        # Caps parallel requests made with this credential across every
+        # coroutine that shares the fetcher.
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._executor = executor
+        self.limiter = limiter or rate_limiter
+        self.cache = cache or get_response_cache()
+        self.fixtures = fixtures or get_fixtures()
+        self._local = threading.local()
 
-    def fetch_top_posts(
+    @property
+    def reddit(self) -> praw.Reddit:
+        """PRAW client for the calling thread (PRAW is not thread-safe)."""
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None:
+            reddit = praw.Reddit(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                user_agent=self.user_agent,
+                requestor_class=RedditRequestor,
+                requestor_kwargs={
+                    "credential": self.client_id,
+                    "limiter": self.limiter,
+                    "cache": self.cache,
+                    "fixtures": self.fixtures,
+                },
+            )
+            reddit.read_only = True
+            self._local.reddit = reddit
+        return reddit
+
+    def fetch_listing(
         self,
         subreddit_name: str,
         topic: str,
         limit: int = 5,
         time_filter: str = "day",
-        comments_per_post: int = 3,
     ) -> List[ScrapedPost]:
-        """Fetch top posts from a subreddit with their top comments."""
+        """Fetch top posts from a subreddit without their comments."""
         posts = []
         try:
             subreddit = self.reddit.subreddit(subreddit_name)
             for submission in subreddit.top(time_filter=time_filter, limit=limit):
-                # Get top comments
-                submission.comment_sort = "best"
-                submission.comments.replace_more(limit=0)
-                top_comments = []
-                for comment in submission.comments[:comments_per_post]:
-                    if hasattr(comment, "body") and comment.body:
-                        top_comments.append(comment.body[:500])
-
                 post = ScrapedPost(
                     post_id=submission.id,
                     subreddit=subreddit_name,
@@ -50,8 +89,8 @@ class RedditFetcher:
                     num_comments=submission.num_comments,
                     upvote_ratio=submission.upvote_ratio,
                     post_url=f"https://reddit.com{submission.permalink}",
-                    top_comments=top_comments,
                     topic=topic,
+                    created_utc=submission.created_utc or 0.0,
                 )
                 post.compute_engagement_score()
                 posts.append(post)
@@ -62,6 +101,53 @@ class RedditFetcher:
 
         return posts
 
+    def hydrate_comments(self, posts: List[ScrapedPost], comments_per_post: int = 3):
+        """Load the top comments of each post (one request per post)."""
+        for post in posts:
+            try:
+                submission = self.reddit.submission(id=post.post_id)
+                submission.comment_sort = "best"
+                submission.comments.replace_more(limit=0)
+                top_comments = []
+                for comment in submission.comments[:comments_per_post]:
+                    if hasattr(comment, "body") and comment.body:
+                        top_comments.append(comment.body[:500])
+                post.top_comments = top_comments
+                post.comments_hydrated = True
+            except Exception as e:
+                logger.warning(f"Error fetching comments for {post.post_id}: {e}")
+
+    def fetch_post_stats(self, post_ids: List[str]) -> List[dict]:
+        """Current score, comment count and upvote ratio of stored posts.
+
+        Uses Reddit's /api/info lookup, which PRAW batches 100 ids per request.
+        """
+        stats = []
+        try:
+            for submission in self.reddit.info(fullnames=[f"t3_{pid}" for pid in post_ids]):
+                stats.append({
+                    "post_id": submission.id,
+                    "score": submission.score,
+                    "num_comments": submission.num_comments,
+                    "upvote_ratio": submission.upvote_ratio,
+                })
+        except Exception as e:
+            logger.error(f"Error refreshing {len(post_ids)} post scores: {e}")
+        return stats
+
+    def fetch_top_posts(
+        self,
+        subreddit_name: str,
+        topic: str,
+        limit: int = 5,
+        time_filter: str = "day",
+        comments_per_post: int = 3,
+    ) -> List[ScrapedPost]:
+        """Fetch top posts from a subreddit with their top comments."""
+        posts = self.fetch_listing(subreddit_name, topic, limit, time_filter)
+        self.hydrate_comments(posts, comments_per_post)
+        return posts
+
     def fetch_for_topics(
         self,
         topics: list,
@@ -71,19 +157,212 @@ class RedditFetcher:
     ) -> List[ScrapedPost]:
         """Fetch posts for all topics and their subreddits."""
         all_posts = []
+        for topic_name, sub in self._iter_subreddits(topics):
+            posts = self.fetch_top_posts(
+                subreddit_name=sub,
+                topic=topic_name,
+                limit=posts_per_subreddit,
+                time_filter=time_filter,
+                comments_per_post=comments_per_post,
+            )
+            all_posts.extend(posts)
+
+        logger.info(f"Total posts fetched: {len(all_posts)}")
+        return all_posts
+
+    async def _run(self, func, *args):
+        """Run a blocking PRAW call in a worker thread, bounded by max_concurrency."""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def fetch_listing_async(
+        self,
+        subreddit_name: str,
+        topic: str,
+        limit: int = 5,
+        time_filter: str = "day",
+    ) -> List[ScrapedPost]:
+        return await self._run(self.fetch_listing, subreddit_name, topic, limit, time_filter)
+
+    async def fetch_post_stats_async(self, post_ids: List[str]) -> List[dict]:
+        return await self._run(self.fetch_post_stats, post_ids)
+
+    async def hydrate_comments_async(self, posts: List[ScrapedPost], comments_per_post: int = 3):
+        """Load comments for many posts concurrently."""
+        await asyncio.gather(*(
+            self._run(self.hydrate_comments, [post], comments_per_post) for post in posts
+        ))
+
+    async def fetch_top_posts_async(
+        self,
+        subreddit_name: str,
+        topic: str,
+        limit: int = 5,
+        time_filter: str = "day",
+        comments_per_post: int = 3,
+    ) -> List[ScrapedPost]:
+        posts = await self.fetch_listing_async(subreddit_name, topic, limit, time_filter)
+        await self.hydrate_comments_async(posts, comments_per_post)
+        return posts
+
+    async def fetch_for_topics_async(
+        self,
+        topics: list,
+        posts_per_subreddit: int = 5,
+        time_filter: str = "day",
+        comments_per_post: int = 3,
+        known_lookup: Optional[KnownLookup] = None,
+        rescrape_score_change: float = 0.5,
+        comments_per_topic: Optional[int] = None,
+        comment_budget: Optional[int] = None,
+    ) -> List[ScrapedPost]:
+        """Fetch posts for all topics, scraping subreddits concurrently.
+
+        Collects stream_for_topics into a list; see it for the parameters.
+        """
+        all_posts = [
+            post async for post in self.stream_for_topics(
+                topics,
+                posts_per_subreddit=posts_per_subreddit,
+                time_filter=time_filter,
+                comments_per_post=comments_per_post,
+                known_lookup=known_lookup,
+                rescrape_score_change=rescrape_score_change,
+                comments_per_topic=comments_per_topic,
+                comment_budget=comment_budget,
+            )
+        ]
+        hydrated = sum(1 for post in all_posts if post.comments_hydrated)
+        logger.info(f"Total posts fetched: {len(all_posts)} ({hydrated} with comments)")
+        return all_posts
+
+    async def stream_for_topics(
+        self,
+        topics: list,
+        posts_per_subreddit: int = 5,
+        time_filter: str = "day",
+        comments_per_post: int = 3,
+        known_lookup: Optional[KnownLookup] = None,
+        rescrape_score_change: float = 0.5,
+        comments_per_topic: Optional[int] = None,
+        comment_budget: Optional[int] = None,
+        on_unchanged: Optional[PostsCallback] = None,
+    ) -> AsyncIterator[ScrapedPost]:
+        """Yield posts for all topics as soon as each one is complete.
+
+        All listings are fetched first. With known_lookup, posts already
+        stored are dropped unless their score moved by rescrape_score_change.
+        The dropped posts are passed to on_unchanged, if given, so they can
+        still be linked to their topics. Posts that will not get comments
+        (outside each topic's top comments_per_topic, or beyond
+        comment_budget requests) are yielded right away with
+        comments_hydrated=False; the rest are yielded one by one as their
+        comments arrive.
+        """
+        listings = await asyncio.gather(*(
+            self.fetch_listing_async(sub, topic_name, posts_per_subreddit, time_filter)
+            for topic_name, sub in self._iter_subreddits(topics)
+        ))
+        all_posts = [post for posts in listings for post in posts]
+
+        if known_lookup is not None:
+            known = await known_lookup(list({post.post_id for post in all_posts}))
+            selected = self.select_new_or_changed(all_posts, known, rescrape_score_change)
+            if on_unchanged is not None and len(selected) < len(all_posts):
+                kept = {id(post) for post in selected}
+                await on_unchanged([post for post in all_posts if id(post) not in kept])
+            all_posts = selected
+
+        candidates = self.select_comment_candidates(all_posts, comments_per_topic, comment_budget)
+        # Topics sharing a subreddit list the same post; load its comments once.
+        copies: Dict[str, List[ScrapedPost]] = {post.post_id: [] for post in candidates}
+        for post in all_posts:
+            if post.post_id in copies:
+                copies[post.post_id].append(post)
+            else:
+                yield post
+
+        async def hydrate(post: ScrapedPost) -> ScrapedPost:
+            await self._run(self.hydrate_comments, [post], comments_per_post)
+            return post
+
+        tasks = [asyncio.ensure_future(hydrate(post)) for post in candidates]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                source = await next_done
+                self.share_comments(copies[source.post_id], [source])
+                for post in copies[source.post_id]:
+                    yield post
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def hydrate_missing_comments_async(
+        self, posts: List[ScrapedPost], comments_per_post: int = 3
+    ) -> List[ScrapedPost]:
+        """Load comments for posts that were stored without them.
+
+        Returns the posts that were hydrated so the caller can persist them.
+        """
+        missing = [post for post in posts if not post.comments_hydrated]
+        await self.hydrate_comments_async(missing, comments_per_post)
+        return [post for post in missing if post.comments_hydrated]
+
+    @staticmethod
+    def select_comment_candidates(
+        posts: Iterable[ScrapedPost],
+        per_topic: Optional[int] = None,
+        budget: Optional[int] = None,
+    ) -> List[ScrapedPost]:
+        """Pick the posts whose comments are worth a request.
+
+        Takes the per_topic best posts of every (topic, user) by engagement
+        score, de-duplicates them by post_id and keeps the best budget of them.
+        """
+        by_topic: Dict[tuple, List[ScrapedPost]] = {}
+        for post in posts:
+            by_topic.setdefault((post.topic, post.user_id), []).append(post)
+
+        chosen: Dict[str, ScrapedPost] = {}
+        for topic_posts in by_topic.values():
+            topic_posts.sort(key=lambda p: p.engagement_score, reverse=True)
+            for post in topic_posts[:per_topic]:
+                chosen.setdefault(post.post_id, post)
+
+        ranked = sorted(chosen.values(), key=lambda p: p.engagement_score, reverse=True)
+        return ranked[:budget] if budget is not None else ranked
+
+    @staticmethod
+    def share_comments(posts: Iterable[ScrapedPost], hydrated: Iterable[ScrapedPost]):
+        """Copy comments from hydrated posts to other copies of the same post."""
+        sources = {post.post_id: post for post in hydrated if post.comments_hydrated}
+        for post in posts:
+            source = sources.get(post.post_id)
+            if source is not None and source is not post:
+                post.top_comments = list(source.top_comments)
+                post.comments_hydrated = True
+
+    @staticmethod
+    def select_new_or_changed(
+        posts: Iterable[ScrapedPost],
+        known_scores: Dict[str, int],
+        score_change: float = 0.5,
+    ) -> List[ScrapedPost]:
+        """Keep posts that are not stored yet or whose score moved significantly."""
+        selected = []
+        for post in posts:
+            old_score = known_scores.get(post.post_id)
+            if old_score is None:
+                selected.append(post)
+            elif abs(post.score - old_score) >= score_change * max(abs(old_score), 10):
+                selected.append(post)
+        return selected
+
+    @staticmethod
+    def _iter_subreddits(topics: list):
         for topic in topics:
             topic_name = topic.get("name", "") if isinstance(topic, dict) else str(topic)
             subreddits = topic.get("subreddits", []) if isinstance(topic, dict) else []
-
             for sub in subreddits:
-                posts = self.fetch_top_posts(
-                    subreddit_name=sub,
-                    topic=topic_name,
-                    limit=posts_per_subreddit,
-                    time_filter=time_filter,
-                    comments_per_post=comments_per_post,
-                )
-                all_posts.extend(posts)
-
-        logger.info(f"Total posts fetched: {len(all_posts)}")
-        return all_posts
+                yield topic_name, sub
@@ -0,0 +1,175 @@
+import asyncio
+import dataclasses
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from agent.reddit.fetcher import KnownLookup, RedditFetcher
+from agent.storage.models import ScrapedPost, User
+from agent.utils.config import RedditConfig
+
+logger = logging.getLogger("twitter_agent")
+
+
+@dataclasses.dataclass
+class PlannedListing:
+    """One subreddit listing fetched once and fanned out to every topic that wants it."""
+
+    subreddit: str
+    time_filter: str
+    limit: int = 0
+    # (topic name, user id) -> number of posts that topic asked for
+    topics: Dict[Tuple[str, int], int] = dataclasses.field(default_factory=dict)
+    credentials: List[Tuple[str, str]] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class DiscoveryPlan:
+    listings: Dict[Tuple[str, str], PlannedListing] = dataclasses.field(default_factory=dict)
+    requested: int = 0  # (topic, subreddit) pairs before de-duplication
+    topics_processed: int = 0
+    # Known posts execute skipped as unchanged, one copy per topic link.
+    unchanged: List[ScrapedPost] = dataclasses.field(default_factory=list)
+
+    @property
+    def fetches_saved(self) -> int:
+        return self.requested - len(self.listings)
+
+
+class DiscoveryPlanner:
+    """Builds a de-duplicated fetch plan across users and runs it."""
+
+    def __init__(self, config: RedditConfig):
+        self.config = config
+
+    def plan(self, users: List[User]) -> DiscoveryPlan:
+        plan = DiscoveryPlan()
+        for user in users:
+            if not user.reddit_client_id or not user.reddit_client_secret:
+                logger.warning(f"User {user.id} has no Reddit credentials, skipping")
+                continue
+            credential = (user.reddit_client_id, user.reddit_client_secret)
+
+            for topic in user.topics:
+                if not isinstance(topic, dict) or not topic.get("subreddits"):
+                    continue
+                time_filter = topic.get("time_filter", self.config.time_filter)
+                limit = int(topic.get("posts_per_subreddit", self.config.posts_per_subreddit))
+                plan.topics_processed += 1
+
+                for sub in topic["subreddits"]:
+                    plan.requested += 1
+                    # A larger "top" listing is a superset of a smaller one, so
+                    # requests differing only in limit share the biggest fetch.
+                    key = (sub.lower(), time_filter)
+                    listing = plan.listings.get(key)
+                    if listing is None:
+                        listing = PlannedListing(subreddit=sub, time_filter=time_filter)
+                        plan.listings[key] = listing
+                    listing.limit = max(listing.limit, limit)
+                    wanted = (topic["name"], user.id)
+                    listing.topics[wanted] = max(listing.topics.get(wanted, 0), limit)
+                    if credential not in listing.credentials:
+                        listing.credentials.append(credential)
+
+        return plan
+
+    async def execute(
+        self,
+        plan: DiscoveryPlan,
+        known_lookup: Optional[KnownLookup] = None,
+    ) -> List[ScrapedPost]:
+        """Fetch every planned listing once and attach the posts to each
+        (topic, user) that wants them.
+
+        Runs in two phases: all listings first, then comments. When
+        known_lookup is given, the listing ids of the whole run are checked
+        against the database in one call and only new posts or posts whose
+        score changed significantly are kept. Comments are loaded for the
+        best-ranked of those within reddit.comment_budget; the others are
+        returned with comments_hydrated=False for generation to fill in.
+        Skipped posts are collected in plan.unchanged so they can still be
+        linked to topics that did not have them yet.
+        """
+        fetchers: Dict[Tuple[str, str], RedditFetcher] = {}
+        load: Dict[Tuple[str, str], int] = {}
+        assigned: List[Tuple[PlannedListing, RedditFetcher]] = []
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.max_total_concurrency),
+            thread_name_prefix="reddit",
+        )
+        try:
+            for listing in plan.listings.values():
+                # Spread listings over the subscribers' credentials so no single
+                # Reddit app carries the whole run.
+                credential = min(listing.credentials, key=lambda c: load.get(c, 0))
+                load[credential] = load.get(credential, 0) + 1
+                if credential not in fetchers:
+                    fetchers[credential] = RedditFetcher(
+                        client_id=credential[0],
+                        client_secret=credential[1],
+                        user_agent=self.config.user_agent,
+                        max_concurrency=self.config.max_concurrency,
+                        executor=executor,
+                    )
+                assigned.append((listing, fetchers[credential]))
+
+            listed = await asyncio.gather(*(
+                fetcher.fetch_listing_async(
+                    listing.subreddit,
+                    next(iter(listing.topics))[0],
+                    listing.limit,
+                    listing.time_filter,
+                )
+                for listing, fetcher in assigned
+            ))
+
+            known: Dict[str, int] = {}
+            if known_lookup is not None:
+                known = await known_lookup(list({p.post_id for posts in listed for p in posts}))
+
+            result = []
+            owner: Dict[str, RedditFetcher] = {}
+            skipped = 0
+            for (listing, fetcher), all_posts in zip(assigned, listed):
+                posts = all_posts
+                if known_lookup is not None:
+                    posts = RedditFetcher.select_new_or_changed(
+                        posts, known, self.config.rescrape_score_change
+                    )
+                skipped += len(all_posts) - len(posts)
+                kept = {post.post_id for post in posts}
+                for post in posts:
+                    owner.setdefault(post.post_id, fetcher)
+                for (topic_name, user_id), limit in listing.topics.items():
+                    # Respect each topic's own limit on the full listing order.
+                    for post in all_posts[:limit]:
+                        copy = dataclasses.replace(post, topic=topic_name, user_id=user_id)
+                        (result if post.post_id in kept else plan.unchanged).append(copy)
+
+            # Comments only pay off for posts that can reach a prompt, so load
+            # them for each topic's best candidates within the run budget.
+            candidates = RedditFetcher.select_comment_candidates(
+                result,
+                self.config.comment_candidates_per_topic,
+                self.config.comment_budget,
+            )
+            by_fetcher: Dict[int, Tuple[RedditFetcher, List[ScrapedPost]]] = {}
+            for post in candidates:
+                fetcher = owner[post.post_id]
+                by_fetcher.setdefault(id(fetcher), (fetcher, []))[1].append(post)
+            await asyncio.gather(*(
+                fetcher.hydrate_comments_async(posts, self.config.comments_per_post)
+                for fetcher, posts in by_fetcher.values()
+            ))
+            RedditFetcher.share_comments(result, candidates)
+        finally:
+            executor.shutdown(wait=False)
+
+        logger.info(
+            f"Discovery plan: {len(plan.listings)} listings for {plan.requested} requests "
+            f"({plan.fetches_saved} fetches saved), {len(result)} posts, "
+            f"{skipped} known posts skipped, {len(candidates)} comment requests"
+        )
+        return result
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger("twitter_agent")
+
+
+class _Bucket:
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate  # tokens per second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.remaining: Optional[float] = None
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RedditRateLimiter:
+    """Token-bucket pacing of Reddit API requests, shared per credential.
+
+    Every PRAW client built by RedditFetcher routes its HTTP requests
+    through acquire() and reports response headers to update(), so all
+    fetchers and background scrapes using the same client id draw from one
+    budget. Reddit's X-Ratelimit-Remaining/Reset headers tighten the pace
+    when the server-side window is running out. Thread-safe, since PRAW
+    calls run in worker threads.
+    """
+
+    def __init__(self, requests_per_minute: float = 90, burst: int = 10):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self._buckets: Dict[str, _Bucket] = {}
+        self._cond = threading.Condition()
+
+    def configure(self, requests_per_minute: float, burst: int):
+        with self._cond:
+            self.requests_per_minute = requests_per_minute
+            self.burst = burst
+            for bucket in self._buckets.values():
+                bucket.capacity = burst
+                bucket.rate = requests_per_minute / 60.0
+            self._cond.notify_all()
+
+    def _bucket(self, credential: str) -> _Bucket:
+        bucket = self._buckets.get(credential)
+        if bucket is None:
+            bucket = _Bucket(self.burst, self.requests_per_minute / 60.0)
+            self._buckets[credential] = bucket
+        return bucket
+
+    def acquire(self, credential: str) -> float:
+        """Block until a request may be sent. Returns the seconds waited."""
+        start = time.monotonic()
+        with self._cond:
+            bucket = self._bucket(credential)
+            bucket.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    bucket.refill(now)
+                    if now >= bucket.blocked_until and bucket.tokens >= 1:
+                        bucket.tokens -= 1
+                        break
+                    delay = max(bucket.blocked_until - now, (1 - bucket.tokens) / bucket.rate)
+                    self._cond.wait(delay)
+            finally:
+                bucket.waiting -= 1
+
+            waited = time.monotonic() - start
+            bucket.requests += 1
+            bucket.total_wait += waited
+            bucket.max_wait = max(bucket.max_wait, waited)
+        return waited
+
+    def update(self, credential: str, headers: Mapping[str, str], status_code: int = 200):
+        """Apply Reddit's rate limit headers from a response."""
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            remaining = reset = None
+
+        with self._cond:
+            bucket = self._bucket(credential)
+            now = time.monotonic()
+            if remaining is not None and reset is not None:
+                bucket.remaining = remaining
+                configured = self.requests_per_minute / 60.0
+                if remaining >= 1 and reset > 0:
+                    # Spread what is left of the window evenly over its
+                    # remaining time, never faster than the configured rate.
+                    bucket.rate = min(configured, remaining / reset)
+                else:
+                    # Quota used up: hold everything until the window resets.
+                    bucket.rate = configured
+                    bucket.blocked_until = max(bucket.blocked_until, now + reset)
+                bucket.tokens = min(bucket.tokens, max(remaining, 0))
+            if status_code == 429:
+                bucket.throttled += 1
+                bucket.blocked_until = max(bucket.blocked_until, now + (reset or 60.0))
+                logger.warning(f"Reddit rate limit hit, pausing credential for {reset or 60.0:.0f}s")
+            self._cond.notify_all()
+
+    def metrics(self, credential: Optional[str] = None) -> dict:
+        """Per-credential pacing stats, keyed by masked client id; only
+        credential's own when given."""
+        with self._cond:
+            return {
+                _mask(key): {
+                    "queue_depth": bucket.waiting,
+                    "requests": bucket.requests,
+                    "throttled": bucket.throttled,
+                    "avg_wait_seconds": round(bucket.total_wait / bucket.requests, 3)
+                    if bucket.requests else 0.0,
+                    "max_wait_seconds": round(bucket.max_wait, 3),
+                    "total_wait_seconds": round(bucket.total_wait, 3),
+                    "ratelimit_remaining": bucket.remaining,
+                    "requests_per_minute": round(bucket.rate * 60, 1),
+                }
+                for key, bucket in self._buckets.items()
+                if credential is None or key == credential
+            }
+
+
+def _mask(credential: str) -> str:
+    return credential[:4] + "..." if len(credential) > 4 else credential
+
+
+# Shared by every RedditFetcher in the process.
+rate_limiter = RedditRateLimiter()
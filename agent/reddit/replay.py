@@ -0,0 +1,168 @@
+import gzip
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from agent.reddit.cache import ResponseCache
+
+logger = logging.getLogger("twitter_agent")
+
+
+class FixtureTransport:
+    """Records raw Reddit responses to a fixture archive or replays them.
+
+    The archive is gzip-compressed NDJSON, one response per line, keyed like
+    the response cache (method, path and query). In record mode every
+    response that reaches Reddit is appended; access tokens are never
+    written. In replay mode no network is used: responses are served from the
+    archive after latency_ms (+/- jitter_ms), and error_rate of them are
+    replaced by error_status so retry and failure paths can be exercised.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency_ms: int = 0,
+        jitter_ms: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._file = None
+        self.served = 0
+        self.missing = 0
+        self.errors = 0
+        self.recorded = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(len(v) for v in self._entries.values())} Reddit fixtures from {self.path}")
+
+    @staticmethod
+    def _key(method: str, url: str, params: Optional[dict]) -> str:
+        return f"{method.upper()} {ResponseCache.make_key(url, params)}"
+
+    def record(self, method: str, url: str, params: Optional[dict], response: Response):
+        if url.endswith("/api/v1/access_token"):
+            return
+        entry = {
+            "key": self._key(method, url, params),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": response.text,
+        }
+        with self._lock:
+            if self._file is None:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(json.dumps(entry) + "\n")
+            self.recorded += 1
+
+    def serve(self, method: str, url: str, params: Optional[dict]) -> Response:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+
+            if url.endswith("/api/v1/access_token"):
+                return _response(200, json.dumps({
+                    "access_token": "replay", "expires_in": 3600,
+                    "scope": "*", "token_type": "bearer",
+                }), url=url)
+
+            with self._lock:
+                self.served += 1
+                if self.error_rate and self._random.random() < self.error_rate:
+                    self.errors += 1
+                    return _response(self.error_status, "{}", url=url)
+
+                key = self._key(method, url, params)
+                variants = self._entries.get(key)
+                if not variants:
+                    self.missing += 1
+                    logger.warning(f"No Reddit fixture for {key}")
+                    return _response(404, "{}", url=url)
+                # Cycle through repeated recordings of the same request.
+                index = self._cursor.get(key, 0)
+                self._cursor[key] = index + 1
+                entry = variants[index % len(variants)]
+            return _response(entry["status"], entry["body"], entry["content_type"], url)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "recorded": self.recorded,
+                "served": self.served,
+                "missing": self.missing,
+                "injected_errors": self.errors,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+def _response(status: int, body: str, content_type: str = "application/json", url: str = "") -> Response:
+    response = Response()
+    response.status_code = status
+    response._content = body.encode("utf-8")
+    response.headers = CaseInsensitiveDict({"content-type": content_type})
+    response.url = url
+    response.encoding = "utf-8"
+    return response
+
+
+_fixtures: Optional[FixtureTransport] = None
+
+
+def configure_fixtures(fixtures: Optional[FixtureTransport]):
+    """Install the process-wide record/replay transport (None for live Reddit)."""
+    global _fixtures
+    if _fixtures is not None and _fixtures is not fixtures:
+        _fixtures.close()
+    _fixtures = fixtures
+    if fixtures is not None:
+        logger.info(f"Reddit transport: {fixtures.mode} ({fixtures.path})")
+
+
+def get_fixtures() -> Optional[FixtureTransport]:
+    return _fixtures
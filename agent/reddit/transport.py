@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from prawcore import Requestor
+from requests import Response
+
+from agent.reddit.cache import ResponseCache, configure_response_cache
+from agent.reddit.ratelimit import RedditRateLimiter, rate_limiter
+from agent.reddit.replay import FixtureTransport, configure_fixtures
+from agent.utils.config import RedditConfig
+
+
+class RedditRequestor(Requestor):
+    """prawcore requestor shared by every RedditFetcher client.
+
+    Serves listing and comment requests from the response cache when it is
+    configured, and paces everything that reaches Reddit through the shared
+    rate limiter. Access tokens are reused across PRAW clients of the same
+    credential until shortly before they expire. With a fixture transport,
+    responses are recorded to an archive or replayed from it offline.
+    """
+
+    _tokens: Dict[str, Tuple[float, dict]] = {}
+    _tokens_lock = threading.Lock()
+
+    def __init__(
+        self,
+        *args: Any,
+        credential: str = "",
+        limiter: Optional[RedditRateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        fixtures: Optional[FixtureTransport] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.credential = credential
+        self.limiter = limiter or rate_limiter
+        self.cache = cache
+        self.fixtures = fixtures
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> Response:
+        if url.endswith("/api/v1/access_token"):
+            return self._token_request(method, url, *args, **kwargs)
+
+        kind = self.cache.classify(method, url) if self.cache else None
+        if kind is None:
+            return self._send(method, url, *args, **kwargs)
+
+        key = self.cache.make_key(url, kwargs.get("params"))
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            return self.cache.to_response(entry, url)
+
+        if entry is not None and (entry["etag"] or entry["last_modified"]):
+            headers = dict(kwargs.get("headers") or {})
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = headers
+
+        response = self._send(method, url, *args, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key, kind)
+            return self.cache.to_response(entry, url)
+        if response.status_code == 200:
+            self.cache.put(key, kind, response)
+        return response
+
+    def _send(self, method: str, url: str, *args: Any, **kwargs: Any) -> Response:
+        if self.fixtures is not None and self.fixtures.mode == "replay":
+            return self.fixtures.serve(method, url, kwargs.get("params"))
+
+        self.limiter.acquire(self.credential)
+        response = super().request(method, url, *args, **kwargs)
+        self.limiter.update(self.credential, response.headers, response.status_code)
+        if self.fixtures is not None:
+            self.fixtures.record(method, url, kwargs.get("params"), response)
+        return response
+
+    def _token_request(self, method: str, url: str, *args: Any, **kwargs: Any) -> Response:
+        auth = kwargs.get("auth")
+        token_key = self.credential
+        if auth is not None and getattr(auth, "password", None):
+            secret = hashlib.sha256(auth.password.encode()).hexdigest()
+            token_key = f"{auth.username}:{secret}"
+
+        now = time.time()
+        with self._tokens_lock:
+            cached = self._tokens.get(token_key)
+        if cached is not None and cached[0] - now > 60:
+            expires_at, token = cached
+            response = Response()
+            response.status_code = 200
+            response._content = json.dumps(
+                {**token, "expires_in": int(expires_at - now)}
+            ).encode()
+            response.headers["content-type"] = "application/json"
+            response.url = url
+            return response
+
+        response = self._send(method, url, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                token = response.json()
+                expires_at = now + float(token["expires_in"])
+            except (ValueError, KeyError, TypeError):
+                return response
+            with self._tokens_lock:
+                self._tokens[token_key] = (expires_at, token)
+        return response
+
+
+def configure_reddit_io(config: RedditConfig):
+    """Set up the process-wide rate limiter, response cache and fixture transport."""
+    rate_limiter.configure(config.requests_per_minute, config.burst)
+
+    # Recording bypasses the cache: fresh hits would never reach the archive
+    # and revalidations would be archived as body-less 304s, which a replay
+    # against a cold cache cannot resolve.
+    configure_response_cache(ResponseCache(
+        path=config.cache_path,
+        listing_ttl=config.cache_listing_ttl,
+        comments_ttl=config.cache_comments_ttl,
+        max_bytes=config.cache_max_mb * 1024 * 1024,
+    ) if config.cache_enabled and config.transport != "record" else None)
+
+    fixtures = None
+    if config.transport in ("record", "replay"):
+        fixtures = FixtureTransport(
+            path=config.fixtures_path,
+            mode=config.transport,
+            latency_ms=config.replay_latency_ms,
+            jitter_ms=config.replay_jitter_ms,
+            error_rate=config.replay_error_rate,
+        )
+    configure_fixtures(fixtures)
@@ -9,7 +9,7 @@ logger = logging.getLogger("twitter_agent")
 
 
 class AgentScheduler:
-    """Schedules daily discovery and generation jobs."""
+    """Schedules daily discovery, score refresh, generation, retention and backup jobs."""
 
     def __init__(self, config: ScheduleConfig, orchestrator: Orchestrator):
         self.config = config
@@ -45,6 +45,42 @@ class AgentScheduler:
             )
             logger.info(f"Scheduled generation at {time_str}")
 
+        # Schedule score refresh jobs
+        for time_str in self.config.score_refresh_times:
+            hour, minute = time_str.split(":")
+            self.scheduler.add_job(
+                self.orchestrator.run_score_refresh,
+                CronTrigger(hour=int(hour), minute=int(minute)),
+                id=f"score_refresh_{time_str}",
+                name=f"Score Refresh at {time_str}",
+                misfire_grace_time=300,
+            )
+            logger.info(f"Scheduled score refresh at {time_str}")
+
+        # Schedule retention jobs
+        for time_str in self.config.retention_times:
+            hour, minute = time_str.split(":")
+            self.scheduler.add_job(
+                self.orchestrator.run_retention,
+                CronTrigger(hour=int(hour), minute=int(minute)),
+                id=f"retention_{time_str}",
+                name=f"Retention at {time_str}",
+                misfire_grace_time=300,
+            )
+            logger.info(f"Scheduled retention at {time_str}")
+
+        # Schedule backup jobs
+        for time_str in self.config.backup_times:
+            hour, minute = time_str.split(":")
+            self.scheduler.add_job(
+                self.orchestrator.run_backup,
+                CronTrigger(hour=int(hour), minute=int(minute)),
+                id=f"backup_{time_str}",
+                name=f"Backup at {time_str}",
+                misfire_grace_time=300,
+            )
+            logger.info(f"Scheduled backup at {time_str}")
+
         self.scheduler.start()
         logger.info("Scheduler started")
 
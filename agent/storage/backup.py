@@ -0,0 +1,148 @@
+import asyncio
+import gzip
+import logging
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from agent.storage.base import Storage
+from agent.utils.config import BackupConfig
+
+logger = logging.getLogger("twitter_agent")
+
+SNAPSHOT_NAME = re.compile(r"^\d{8}-\d{6}$")
+
+
+class _Restarted(Exception):
+    """Writes kept restarting a paged backup."""
+
+
+class BackupManager:
+    """Online snapshots of the SQLite files behind a Storage.
+
+    Each file is copied with SQLite's backup API from a separate read-only
+    connection in a worker thread, pages_per_step pages at a time with a
+    short pause between steps, so the event loop keeps serving and writers
+    get the lock back between steps. A write from another connection makes
+    SQLite restart the copy; after max_restarts the file is copied in one
+    step instead. Copies are checked, gzipped and renamed into
+    <dir>/<timestamp>/ only when complete, then old snapshots are rotated.
+    """
+
+    def __init__(self, db: Storage, config: BackupConfig):
+        self.db = db
+        self.config = config
+
+    async def run(self) -> dict:
+        files = self.db.database_files()
+        if not files:
+            logger.info("Backup skipped: storage backend has no SQLite files (use pg_dump)")
+            return {}
+        await self.db.flush()
+
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        root = Path(self.config.dir)
+        partial = root / f"{stamp}.partial"
+        started = time.monotonic()
+        stats = {"files": 0, "bytes": 0, "steps": 0, "restarts": 0,
+                 "step_time": 0.0, "longest_step": 0.0}
+        base = Path(files[0]).parent
+        try:
+            for source in files:
+                target = partial / Path(source).relative_to(base)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                copied = await asyncio.to_thread(self._copy, source, target)
+                for key in ("steps", "restarts", "step_time"):
+                    stats[key] += copied[key]
+                stats["longest_step"] = max(stats["longest_step"], copied["longest_step"])
+                if self.config.compress:
+                    target = await asyncio.to_thread(self._compress, target)
+                stats["files"] += 1
+                stats["bytes"] += target.stat().st_size
+            snapshot = root / stamp
+            partial.rename(snapshot)
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+
+        stats["duration"] = round(time.monotonic() - started, 3)
+        stats["step_time"] = round(stats["step_time"], 3)
+        stats["longest_step"] = round(stats["longest_step"], 3)
+        stats["path"] = str(snapshot)
+        stats["rotated"] = self._rotate(root)
+        logger.info(
+            f"Backup complete: {stats['files']} files, {stats['bytes']:,} bytes to {snapshot} "
+            f"in {stats['duration']}s ({stats['steps']} steps taking {stats['step_time']}s, "
+            f"longest {stats['longest_step']}s, {stats['restarts']} restarts)"
+        )
+        return stats
+
+    def _copy(self, source: str, target: Path) -> dict:
+        """Back up source into target. step_time sums the time spent inside
+        backup steps, when the source holds a read lock: writers wait on it
+        in rollback-journal mode, in WAL mode only checkpoints do."""
+        stats = {"steps": 0, "restarts": 0, "step_time": 0.0, "longest_step": 0.0}
+        try:
+            self._backup(source, target, self.config.pages_per_step, stats)
+        except _Restarted:
+            logger.warning(f"Backup of {source} kept restarting under writes, copying in one step")
+            self._backup(source, target, -1, stats)
+        return stats
+
+    def _backup(self, source: str, target: Path, pages: int, stats: dict):
+        restarts = 0
+        done_before = 0
+        step_started = time.monotonic()
+
+        def progress(status, remaining, total):
+            nonlocal restarts, done_before, step_started
+            step = time.monotonic() - step_started
+            stats["steps"] += 1
+            stats["step_time"] += step
+            stats["longest_step"] = max(stats["longest_step"], step)
+            # Every step copies more pages unless SQLite went back to page 1;
+            # total grows with the file, so remaining alone can't show it.
+            done = total - remaining
+            if done <= done_before:
+                restarts += 1
+                stats["restarts"] += 1
+                if restarts > self.config.max_restarts:
+                    raise _Restarted()
+            done_before = done
+            if remaining and self.config.step_sleep_ms:
+                time.sleep(self.config.step_sleep_ms / 1000)
+            step_started = time.monotonic()
+
+        target.unlink(missing_ok=True)
+        src = sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst, pages=pages, progress=progress)
+            check = dst.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise RuntimeError(f"Backup of {source} failed quick_check: {check}")
+        finally:
+            dst.close()
+            src.close()
+
+    @staticmethod
+    def _compress(path: Path) -> Path:
+        compressed = path.with_name(path.name + ".gz")
+        with open(path, "rb") as raw, gzip.open(compressed, "wb") as out:
+            shutil.copyfileobj(raw, out, 1024 * 1024)
+        path.unlink()
+        return compressed
+
+    def _rotate(self, root: Path) -> List[str]:
+        """Delete the oldest snapshots beyond config.keep; returns their paths."""
+        snapshots = sorted(
+            p for p in root.iterdir() if p.is_dir() and SNAPSHOT_NAME.match(p.name)
+        )
+        expired = snapshots[:-self.config.keep] if self.config.keep > 0 else []
+        for path in expired:
+            shutil.rmtree(path)
+        return [str(p) for p in expired]
@@ -0,0 +1,362 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from agent.storage import codec
+from agent.storage.models import GeneratedTweet, IngestResult, ScrapedPost, User
+from agent.storage.scoring import DEFAULT_PROFILE, ProfileKey, ScoringProfile
+from agent.storage.user_cache import UserCache
+
+# Statuses shown in a user's tweet history.
+HISTORY_STATUSES = ("posted", "approved", "rejected")
+
+
+class Storage(ABC):
+    """What the agent and the API need from a storage backend.
+
+    Database (SQLite), ShardedDatabase (SQLite split per tenant) and
+    PostgresDatabase implement it; create_database picks one. Rows are read
+    by column name, so the row helpers here work for both aiosqlite rows and
+    asyncpg records. User lookups go through an in-process UserCache that
+    every user and topic write invalidates.
+    """
+
+    def __init__(self, user_cache_size: int = 1024, user_cache_ttl: float = 60.0):
+        self.user_cache = UserCache(user_cache_size, user_cache_ttl)
+        self.fts_enabled = False
+
+    @abstractmethod
+    async def init(self):
+        """Connect and create or migrate the schema."""
+
+    @abstractmethod
+    async def close(self):
+        """Flush pending writes and disconnect."""
+
+    async def flush(self):
+        """Make pending write-behind writes durable. No-op by default."""
+
+    def database_files(self) -> List[str]:
+        """SQLite files holding the data, for BackupManager; empty for
+        backends with their own backup tooling."""
+        return []
+
+    def write_group(self, user_id: int) -> int:
+        """Which writer stores user_id's tweets. Users in different groups
+        can be written for at the same time; one group by default."""
+        return 0
+
+    # --- Users ---
+
+    @abstractmethod
+    async def add_user(self, user: User) -> int:
+        ...
+
+    @abstractmethod
+    async def _fetch_user(self, column: str, value) -> Optional[User]:
+        """Load one user with topics by an indexed users column."""
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return await self._get_user("email", email)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        return await self._get_user("id", user_id)
+
+    async def get_user_by_chat_id(self, chat_id: int) -> Optional[User]:
+        return await self._get_user("chat_id", chat_id)
+
+    async def _get_user(self, field: str, value) -> Optional[User]:
+        """Cached single-user lookup; field is "id", "email" or "chat_id"."""
+        user = self.user_cache.get(field, value)
+        if user is not None:
+            return user
+        generation = self.user_cache.generation
+        column = {"id": "id", "email": "email", "chat_id": "telegram_chat_id"}[field]
+        user = await self._fetch_user(column, value)
+        if user is not None:
+            self.user_cache.put(user, generation)
+        return user
+
+    @abstractmethod
+    async def update_user_credentials(self, user_id: int, **kwargs):
+        ...
+
+    @abstractmethod
+    async def get_active_users(self) -> List[User]:
+        ...
+
+    @staticmethod
+    def _row_to_user(row) -> User:
+        return User(
+            id=row["id"],
+            email=row["email"],
+            password_hash=row["password_hash"],
+            reddit_client_id=row["reddit_client_id"],
+            reddit_client_secret=row["reddit_client_secret"],
+            twitter_api_key=row["twitter_api_key"],
+            twitter_api_secret=row["twitter_api_secret"],
+            twitter_access_token=row["twitter_access_token"],
+            twitter_access_token_secret=row["twitter_access_token_secret"],
+            telegram_chat_id=row["telegram_chat_id"],
+            active=bool(row["active"]),
+            created_at=row["created_at"],
+        )
+
+    # --- Topics ---
+
+    @abstractmethod
+    async def set_user_topics(self, user_id: int, topics: list):
+        ...
+
+    @abstractmethod
+    async def add_topic(self, user_id: int, topic: dict) -> bool:
+        """Append a topic; returns False if the user already has one by that name."""
+
+    @abstractmethod
+    async def remove_topic(self, user_id: int, name: str) -> bool:
+        """Delete a topic by name; returns False if the user has no such topic."""
+
+    @staticmethod
+    def _row_to_topic(row) -> dict:
+        return {
+            "name": row["name"],
+            "subreddits": [],
+            "tone": row["tone"],
+            "hashtags": codec.loads(row["hashtags"]),
+            **codec.loads(row["settings"]),
+        }
+
+    @staticmethod
+    def _topic_columns(topic) -> Tuple[str, str, str, str]:
+        """(name, tone, hashtags JSON, settings JSON) of a topic to store."""
+        if not isinstance(topic, dict):  # legacy entries were bare names
+            topic = {"name": str(topic)}
+        settings = {
+            k: v for k, v in topic.items()
+            if k not in ("name", "subreddits", "tone", "hashtags")
+        }
+        return (topic["name"], topic.get("tone", "informative"),
+                codec.dumps(topic.get("hashtags", [])), codec.dumps(settings))
+
+    # --- Scraped Posts ---
+
+    @abstractmethod
+    async def save_scraped_posts(self, posts: List[ScrapedPost], upsert: bool = False) -> IngestResult:
+        ...
+
+    @abstractmethod
+    async def link_posts(self, posts: List[ScrapedPost]) -> int:
+        ...
+
+    @abstractmethod
+    async def get_known_post_scores(self, post_ids: List[str]) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    async def get_post_ids_for_refresh(self, max_age_hours: int = 48, limit: int = 5000) -> List[str]:
+        ...
+
+    @abstractmethod
+    async def update_post_stats(self, stats: List[dict]) -> int:
+        ...
+
+    @abstractmethod
+    async def rescore_posts(
+        self,
+        profiles: Dict[ProfileKey, ScoringProfile],
+        default: ScoringProfile = DEFAULT_PROFILE,
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def update_post_comments(self, posts: List[ScrapedPost]):
+        ...
+
+    @abstractmethod
+    async def get_top_posts(
+        self,
+        topic: str,
+        limit: int = 20,
+        max_age_hours: int = 0,
+        user_id: Optional[int] = None,
+        body_chars: int = 0,
+    ) -> List[ScrapedPost]:
+        ...
+
+    @staticmethod
+    def _row_to_top_post(row, topic: str) -> ScrapedPost:
+        return ScrapedPost(
+            id=row["id"],
+            post_id=row["post_id"],
+            subreddit=row["subreddit"],
+            author=row["author"],
+            title=row["title"],
+            content=row["content"],
+            score=row["score"],
+            num_comments=row["num_comments"],
+            upvote_ratio=row["upvote_ratio"],
+            post_url=row["post_url"],
+            top_comments=ScrapedPost.parse_top_comments(row["top_comments"]),
+            comments_hydrated=bool(row["comments_hydrated"]),
+            engagement_score=row["topic_score"],
+            topic=topic,
+            created_utc=row["created_utc"] or 0.0,
+            scraped_at=row["linked_at"],
+        )
+
+    # --- Generated Tweets ---
+
+    @abstractmethod
+    async def save_generated_tweet(self, tweet: GeneratedTweet) -> int:
+        ...
+
+    @abstractmethod
+    async def get_pending_tweets(self, user_id: Optional[int] = None) -> List[GeneratedTweet]:
+        """Every pending tweet, oldest first: the queue order Telegram shows.
+        The dashboard pages newest first through get_tweets_page."""
+
+    @abstractmethod
+    async def update_tweet_status(self, tweet_id: int, status: str, **kwargs):
+        ...
+
+    @abstractmethod
+    async def get_generated_tweet_by_id(self, tweet_id: int) -> Optional[GeneratedTweet]:
+        ...
+
+    async def get_tweet_history(self, user_id: int, limit: int = 50) -> List[GeneratedTweet]:
+        return await self.get_tweets_page(user_id, HISTORY_STATUSES, limit=limit)
+
+    @abstractmethod
+    async def get_tweets_page(
+        self,
+        user_id: int,
+        statuses: Sequence[str],
+        limit: int = 50,
+        topic: Optional[str] = None,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> List[GeneratedTweet]:
+        ...
+
+    @abstractmethod
+    async def get_dashboard_stats(self, user_id: int) -> dict:
+        ...
+
+    @abstractmethod
+    async def rebuild_tweet_counters(self) -> int:
+        ...
+
+    @staticmethod
+    def _stats_from_counters(rows) -> dict:
+        """Dashboard stats from (topic, status, count) tweet_counters rows."""
+        by_status: Dict[str, int] = {}
+        by_topic: Dict[str, int] = {}
+        for row in rows:
+            by_status[row["status"]] = by_status.get(row["status"], 0) + row["count"]
+            by_topic[row["topic"]] = by_topic.get(row["topic"], 0) + row["count"]
+        return {
+            "pending": by_status.get("pending", 0),
+            "posted": by_status.get("posted", 0),
+            "total_generated": sum(by_status.values()),
+            "by_status": by_status,
+            "by_topic": by_topic,
+        }
+
+    @staticmethod
+    def _row_to_generated_tweet(row) -> GeneratedTweet:
+        return GeneratedTweet(
+            id=row["id"],
+            user_id=row["user_id"],
+            topic=row["topic"],
+            content=row["content"],
+            inspiration_post_ids=GeneratedTweet.parse_inspiration_ids(
+                row["inspiration_post_ids"]
+            ),
+            status=row["status"],
+            telegram_message_id=row["telegram_message_id"],
+            telegram_chat_id=row["telegram_chat_id"],
+            created_at=row["created_at"],
+            approved_at=row["approved_at"],
+            posted_at=row["posted_at"],
+            posted_tweet_id=row["posted_tweet_id"],
+        )
+
+    # --- Search ---
+
+    @abstractmethod
+    async def search_posts(
+        self,
+        text: str,
+        limit: int = 20,
+        offset: int = 0,
+        topic: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def search_tweets(
+        self, user_id: int, text: str, limit: int = 20, offset: int = 0
+    ) -> List[dict]:
+        ...
+
+    # --- Retention ---
+
+    async def begin_retention(self):
+        """Called once at the start of a retention run, before the batches
+        of get_expired_rows."""
+
+    @abstractmethod
+    async def get_expired_rows(self, table: str, max_age_days: int, limit: int = 1000) -> List[dict]:
+        """Oldest rows of scraped_posts or run_log past max_age_days, minus
+        posts that inspired a generated tweet."""
+
+    @abstractmethod
+    async def delete_rows(self, table: str, ids: List[int]) -> int:
+        ...
+
+    @abstractmethod
+    async def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Return free space to the filesystem; returns pages released."""
+
+    # --- Run Log ---
+
+    @abstractmethod
+    async def log_run(self, run_type: str, status: str, **stats):
+        ...
+
+
+def create_database(
+    url: str = "",
+    path: str = "./data/agent.db",
+    pool_size: int = 10,
+    user_cache_size: int = 1024,
+    user_cache_ttl: float = 60.0,
+    shards: int = 0,
+    **sqlite_options,
+) -> Storage:
+    """PostgresDatabase for a postgres:// or postgresql:// url, otherwise the
+    SQLite Database at path, split into a catalog and that many tenant shard
+    files when shards > 0. sqlite_options (read_pool_size, busy_timeout_ms,
+    synchronous, group_commit_ms) and shards only apply to SQLite."""
+    if url.startswith(("postgres://", "postgresql://")):
+        from agent.storage.postgres import PostgresDatabase
+
+        return PostgresDatabase(
+            url, pool_size=pool_size,
+            user_cache_size=user_cache_size, user_cache_ttl=user_cache_ttl,
+        )
+    if url:
+        raise ValueError(f"Unsupported database URL: {url.split(':', 1)[0]}://...")
+
+    if shards:
+        from agent.storage.sharded import ShardedDatabase
+
+        return ShardedDatabase(
+            path, shards, user_cache_size=user_cache_size, user_cache_ttl=user_cache_ttl,
+            **sqlite_options,
+        )
+
+    from agent.storage.database import Database
+
+    return Database(
+        path, user_cache_size=user_cache_size, user_cache_ttl=user_cache_ttl, **sqlite_options
+    )
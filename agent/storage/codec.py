@@ -0,0 +1,25 @@
+"""JSON codec for list and dict columns (top_comments, inspiration_post_ids,
+topic hashtags/settings). Uses orjson when installed, stdlib json otherwise;
+both read what the other wrote."""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+def loads(raw: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
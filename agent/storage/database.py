@@ -1,11 +1,15 @@
 import aiosqlite
+import asyncio
 import json
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from agent.storage.models import ScrapedPost, GeneratedTweet, User
+from agent.storage.base import Storage
+from agent.storage.models import ScrapedPost, GeneratedTweet, IngestResult, User
+from agent.storage.scoring import DEFAULT_PROFILE, ProfileKey, ScoringProfile, decay_factor
 
 logger = logging.getLogger("twitter_agent")
 
@@ -21,11 +25,33 @@ CREATE TABLE IF NOT EXISTS users (
     twitter_access_token TEXT NOT NULL DEFAULT '',
     twitter_access_token_secret TEXT NOT NULL DEFAULT '',
     telegram_chat_id INTEGER DEFAULT 0,
-    topics_json TEXT NOT NULL DEFAULT '[]',
     active INTEGER DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- A user's topics in display order. Keys of a topic beyond name, tone,
+-- hashtags and subreddits (time_filter, posts_per_subreddit, scoring...)
+-- are kept in settings as JSON.
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    tone TEXT NOT NULL DEFAULT 'informative',
+    hashtags TEXT NOT NULL DEFAULT '[]',
+    settings TEXT NOT NULL DEFAULT '{}',
+    position INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, name),
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+CREATE TABLE IF NOT EXISTS topic_subreddits (
+    topic_id INTEGER NOT NULL,
+    subreddit TEXT NOT NULL COLLATE NOCASE,
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (topic_id, subreddit),
+    FOREIGN KEY (topic_id) REFERENCES topics(id)
+) WITHOUT ROWID;
+
 CREATE TABLE IF NOT EXISTS scraped_posts (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     post_id TEXT UNIQUE NOT NULL,
@@ -38,11 +64,65 @@ CREATE TABLE IF NOT EXISTS scraped_posts (
     upvote_ratio REAL DEFAULT 0.0,
     post_url TEXT DEFAULT '',
     top_comments TEXT DEFAULT '[]',
+    comments_hydrated INTEGER DEFAULT 0,
     engagement_score REAL DEFAULT 0.0,
     topic TEXT NOT NULL,
+    created_utc REAL,
     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS run_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    topics_processed INTEGER DEFAULT 0,
+    tweets_scraped INTEGER DEFAULT 0,
+    tweets_generated INTEGER DEFAULT 0,
+    tweets_posted INTEGER DEFAULT 0,
+    fetches_saved INTEGER DEFAULT 0,
+    posts_refreshed INTEGER DEFAULT 0,
+    error_message TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- scraped_posts is a pool holding each Reddit post once; post_topics links
+-- a pooled post to every (topic, user) it was discovered for, with that
+-- topic's engagement score. user_id 0 marks links from before per-user
+-- membership, which count for every follower of the topic.
+CREATE TABLE IF NOT EXISTS post_topics (
+    post_id INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    user_id INTEGER NOT NULL DEFAULT 0,
+    engagement_score REAL DEFAULT 0.0,
+    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (post_id, topic, user_id),
+    FOREIGN KEY (post_id) REFERENCES scraped_posts(id)
+) WITHOUT ROWID;
+
+-- Serve get_top_posts' freshness window as a covering range scan, for one
+-- user's links and for a topic's links across all users respectively.
+CREATE INDEX IF NOT EXISTS idx_post_topics_fresh
+    ON post_topics(topic, user_id, scraped_at, engagement_score);
+CREATE INDEX IF NOT EXISTS idx_post_topics_topic_fresh
+    ON post_topics(topic, scraped_at, engagement_score);
+DROP INDEX IF EXISTS idx_scraped_topic_fresh;
+DROP INDEX IF EXISTS idx_scraped_topic;
+
+CREATE TRIGGER IF NOT EXISTS trg_post_topics_delete
+AFTER DELETE ON scraped_posts
+BEGIN
+    DELETE FROM post_topics WHERE post_id = OLD.id;
+END;
+CREATE INDEX IF NOT EXISTS idx_scraped_engagement ON scraped_posts(engagement_score DESC);
+CREATE INDEX IF NOT EXISTS idx_users_active ON users(active);
+DROP INDEX IF EXISTS idx_topics_name;
+DROP INDEX IF EXISTS idx_topic_subreddits_subreddit;
+"""
+
+# Generated tweets and their counters: created after SCHEMA, or alone in
+# a shard file (tweets_only).
+TWEETS_SCHEMA = """
 CREATE TABLE IF NOT EXISTS generated_tweets (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL DEFAULT 0,
@@ -59,44 +139,509 @@ CREATE TABLE IF NOT EXISTS generated_tweets (
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
 
-CREATE TABLE IF NOT EXISTS run_log (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    run_type TEXT NOT NULL,
+CREATE INDEX IF NOT EXISTS idx_generated_status ON generated_tweets(status);
+-- Keyset pagination of a user's tweets per status, newest first.
+CREATE INDEX IF NOT EXISTS idx_generated_user_status_created
+    ON generated_tweets(user_id, status, created_at, id);
+DROP INDEX IF EXISTS idx_generated_user;
+
+-- Per-user tweet counts by topic and status, kept current by the triggers
+-- below so the dashboard never scans generated_tweets.
+CREATE TABLE IF NOT EXISTS tweet_counters (
+    user_id INTEGER NOT NULL,
+    topic TEXT NOT NULL,
     status TEXT NOT NULL,
-    topics_processed INTEGER DEFAULT 0,
-    tweets_scraped INTEGER DEFAULT 0,
-    tweets_generated INTEGER DEFAULT 0,
-    tweets_posted INTEGER DEFAULT 0,
-    error_message TEXT,
-    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    finished_at TIMESTAMP
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, topic, status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_tweet_counters_insert
+AFTER INSERT ON generated_tweets
+BEGIN
+    INSERT INTO tweet_counters (user_id, topic, status, count)
+    VALUES (NEW.user_id, NEW.topic, NEW.status, 1)
+    ON CONFLICT(user_id, topic, status) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tweet_counters_delete
+AFTER DELETE ON generated_tweets
+BEGIN
+    UPDATE tweet_counters SET count = count - 1
+    WHERE user_id = OLD.user_id AND topic = OLD.topic AND status = OLD.status;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tweet_counters_update
+AFTER UPDATE OF user_id, topic, status ON generated_tweets
+WHEN OLD.user_id IS NOT NEW.user_id OR OLD.topic IS NOT NEW.topic
+     OR OLD.status IS NOT NEW.status
+BEGIN
+    UPDATE tweet_counters SET count = count - 1
+    WHERE user_id = OLD.user_id AND topic = OLD.topic AND status = OLD.status;
+    INSERT INTO tweet_counters (user_id, topic, status, count)
+    VALUES (NEW.user_id, NEW.topic, NEW.status, 1)
+    ON CONFLICT(user_id, topic, status) DO UPDATE SET count = count + 1;
+END;
+"""
+
+# Max bound parameters per statement for chunked IN (...) lookups.
+SQL_BATCH = 500
+# Rows per multi-row VALUES statement (4 parameters each).
+STATS_BATCH = 200
+
+# Full-text indexes over post and tweet text. External-content tables store
+# only the index; triggers keep them in step with their source tables. Kept
+# apart from SCHEMA because FTS5 is an optional SQLite module.
+FTS_TABLES = {"scraped_posts_fts": "scraped_posts", "generated_tweets_fts": "generated_tweets"}
+# Each FTS table with the triggers that feed it.
+FTS_SCHEMA = {
+    "scraped_posts_fts": """
+CREATE VIRTUAL TABLE IF NOT EXISTS scraped_posts_fts USING fts5(
+    title, content, top_comments,
+    content='scraped_posts', content_rowid='id', tokenize='porter unicode61'
 );
 
-CREATE INDEX IF NOT EXISTS idx_scraped_topic ON scraped_posts(topic);
-CREATE INDEX IF NOT EXISTS idx_scraped_engagement ON scraped_posts(engagement_score DESC);
-CREATE INDEX IF NOT EXISTS idx_generated_status ON generated_tweets(status);
-CREATE INDEX IF NOT EXISTS idx_generated_user ON generated_tweets(user_id);
-CREATE INDEX IF NOT EXISTS idx_users_active ON users(active);
+CREATE TRIGGER IF NOT EXISTS trg_scraped_posts_fts_insert
+AFTER INSERT ON scraped_posts
+BEGIN
+    INSERT INTO scraped_posts_fts (rowid, title, content, top_comments)
+    VALUES (NEW.id, NEW.title, NEW.content, NEW.top_comments);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_scraped_posts_fts_delete
+AFTER DELETE ON scraped_posts
+BEGIN
+    INSERT INTO scraped_posts_fts (scraped_posts_fts, rowid, title, content, top_comments)
+    VALUES ('delete', OLD.id, OLD.title, OLD.content, OLD.top_comments);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_scraped_posts_fts_update
+AFTER UPDATE OF title, content, top_comments ON scraped_posts
+BEGIN
+    INSERT INTO scraped_posts_fts (scraped_posts_fts, rowid, title, content, top_comments)
+    VALUES ('delete', OLD.id, OLD.title, OLD.content, OLD.top_comments);
+    INSERT INTO scraped_posts_fts (rowid, title, content, top_comments)
+    VALUES (NEW.id, NEW.title, NEW.content, NEW.top_comments);
+END;
+""",
+    "generated_tweets_fts": """
+CREATE VIRTUAL TABLE IF NOT EXISTS generated_tweets_fts USING fts5(
+    content, content='generated_tweets', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_generated_tweets_fts_insert
+AFTER INSERT ON generated_tweets
+BEGIN
+    INSERT INTO generated_tweets_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generated_tweets_fts_delete
+AFTER DELETE ON generated_tweets
+BEGIN
+    INSERT INTO generated_tweets_fts (generated_tweets_fts, rowid, content)
+    VALUES ('delete', OLD.id, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_generated_tweets_fts_update
+AFTER UPDATE OF content ON generated_tweets
+BEGIN
+    INSERT INTO generated_tweets_fts (generated_tweets_fts, rowid, content)
+    VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO generated_tweets_fts (rowid, content) VALUES (NEW.id, NEW.content);
+END;
+""",
+}
+
+
+# Matches ranked per post search; see Database.search_posts.
+SEARCH_CANDIDATES = 5000
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, quoted so
+    punctuation can't break the syntax; a trailing * keeps prefix search."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+# Columns get_top_posts loads; scraped_at of the pool row is not needed.
+POST_COLUMNS = (
+    "id", "post_id", "subreddit", "author", "title", "content", "score",
+    "num_comments", "upvote_ratio", "post_url", "top_comments",
+    "comments_hydrated", "created_utc",
+)
+
+
+def _top_posts_sql(by_user: bool, body_chars: int = 0) -> str:
+    """Ranks a topic's links inside idx_post_topics_fresh (by_user) or
+    idx_post_topics_topic_fresh alone, then loads only the winning pooled
+    rows; check_query_plans keeps it that way.
+    body_chars > 0 truncates content in SQLite instead of copying it all."""
+    user_filter = "AND user_id IN (?, 0)" if by_user else ""
+    columns = ", ".join(
+        f"substr(p.content, 1, {int(body_chars)}) AS content"
+        if name == "content" and body_chars > 0 else f"p.{name}"
+        for name in POST_COLUMNS
+    )
+    return f"""
+SELECT {columns}, m.score AS topic_score, m.linked_at FROM (
+    SELECT post_id, MAX(engagement_score) AS score, MIN(scraped_at) AS linked_at
+    FROM post_topics
+    WHERE topic = ? {user_filter} AND scraped_at >= ?
+    GROUP BY post_id ORDER BY score DESC LIMIT ?
+) m JOIN scraped_posts p ON p.id = m.post_id
+ORDER BY m.score DESC
 """
 
 
-class Database:
-    def __init__(self, db_path: str = "./data/agent.db"):
+# Mirrors ScrapedPost.compute_engagement_score; {p} prefixes scraped_posts
+# columns. Parameters: the three weights, then half_life_hours.
+ENGAGEMENT_SQL = """({p}score * ? + {p}num_comments * ? + {p}upvote_ratio * ?)
+    * decay((julianday('now') - COALESCE(julianday({p}created_utc, 'unixepoch'),
+                                         julianday({p}scraped_at))) * 24.0, ?)"""
+
+
+def _links_sql(refresh: bool) -> str:
+    """Links a pooled post to a (topic, user_id); refresh updates the score
+    and scraped_at of links that exist already, so a post scraped again
+    counts as fresh. Parameters come from _link_rows."""
+    conflict = (
+        """DO UPDATE SET engagement_score = excluded.engagement_score,
+                         scraped_at = CURRENT_TIMESTAMP"""
+        if refresh else "DO NOTHING"
+    )
+    return f"""INSERT INTO post_topics (post_id, topic, user_id, engagement_score)
+               SELECT id, ?, ?, ? FROM scraped_posts WHERE post_id = ?
+               ON CONFLICT(post_id, topic, user_id) {conflict}"""
+
+
+def _link_rows(posts: List[ScrapedPost]) -> list:
+    return [(post.topic, post.user_id, post.engagement_score, post.post_id) for post in posts]
+
+
+def _age_cutoff(max_age_hours: int) -> str:
+    """scraped_at lower bound in SQLite's CURRENT_TIMESTAMP format."""
+    if max_age_hours <= 0:
+        return ""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# generated_tweets columns copied by import_tweets.
+TWEET_COLUMNS = """id, user_id, topic, content, inspiration_post_ids, status,
+    telegram_message_id, telegram_chat_id, created_at, approved_at, posted_at,
+    posted_tweet_id"""
+
+
+# Tables with a retention policy: age column and extra filter for rows to keep.
+RETENTION_TABLES = {
+    # A post's age is that of its newest post_topics link, so one scraped
+    # again for another topic or user stays; links are never older than the
+    # pool row, which lets scraped_at pick the candidates. Posts that
+    # inspired a generated tweet stay for the tweet's history;
+    # temp.kept_posts holds those referenced from other files (see keep_posts).
+    "scraped_posts": ("scraped_at", """NOT EXISTS (
+        SELECT 1 FROM post_topics
+        WHERE post_id = scraped_posts.id AND scraped_at >= datetime('now', :age))
+        AND id NOT IN (
+        SELECT value FROM generated_tweets, json_each(generated_tweets.inspiration_post_ids))
+        AND id NOT IN (SELECT post_id FROM temp.kept_posts)"""),
+    "run_log": ("started_at", "1"),
+}
+
+# Columns added after tables were first created; CREATE TABLE IF NOT EXISTS
+# leaves existing databases untouched, so they are added on init.
+MIGRATIONS = [
+    ("run_log", "fetches_saved", "INTEGER DEFAULT 0"),
+    # Rows scraped before lazy comment loading always had comments fetched.
+    ("scraped_posts", "comments_hydrated", "INTEGER DEFAULT 1"),
+    ("run_log", "posts_refreshed", "INTEGER DEFAULT 0"),
+    ("scraped_posts", "created_utc", "REAL"),
+]
+
+
+class _WriterConnection:
+    """The writer connection; every statement first waits on lock, which
+    save_scraped_posts holds while its savepoint is open so no other write
+    can land inside it and be undone by a rollback to it. Everything else
+    is passed through to the aiosqlite connection."""
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+        self.lock = asyncio.Lock()
+
+    async def execute(self, sql: str, parameters=None) -> aiosqlite.Cursor:
+        async with self.lock:
+            return await self.conn.execute(sql, parameters)
+
+    async def executemany(self, sql: str, parameters) -> aiosqlite.Cursor:
+        async with self.lock:
+            return await self.conn.executemany(sql, parameters)
+
+    async def executescript(self, script: str) -> aiosqlite.Cursor:
+        async with self.lock:
+            return await self.conn.executescript(script)
+
+    async def commit(self):
+        async with self.lock:
+            await self.conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class Database(Storage):
+    """SQLite storage in WAL mode: one writer connection (``_db``) plus a pool
+    of read-only connections so reads don't queue behind long commits.
+
+    With group_commit_ms > 0, small writes (generated tweets, status updates,
+    run log) are committed together once per window instead of one fsync
+    each. Pool readers only see them after that commit; call flush() when a
+    caller needs its writes durable or visible right away.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./data/agent.db",
+        read_pool_size: int = 4,
+        busy_timeout_ms: int = 5000,
+        synchronous: str = "NORMAL",
+        group_commit_ms: int = 0,
+        user_cache_size: int = 1024,
+        user_cache_ttl: float = 60.0,
+        tweet_id_base: int = 0,
+        tweets_only: bool = False,
+    ):
+        super().__init__(user_cache_size, user_cache_ttl)
         self.db_path = db_path
-        self._db: Optional[aiosqlite.Connection] = None
+        self.tweet_id_base = tweet_id_base
+        # A shard file: only TWEETS_SCHEMA and the tweet search index.
+        self.tweets_only = tweets_only
+        self.fts_tables = ["generated_tweets_fts"] if tweets_only else list(FTS_TABLES)
+        self.read_pool_size = read_pool_size if db_path != ":memory:" else 0
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous.upper()
+        if self.synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid synchronous level: {synchronous}")
+        self.group_commit_ms = group_commit_ms
+        self._db: Optional[_WriterConnection] = None
+        self._commit_task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
 
     async def init(self):
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self._db = await aiosqlite.connect(self.db_path)
-        self._db.row_factory = aiosqlite.Row
-        await self._db.executescript(SCHEMA)
+        self._db = _WriterConnection(await aiosqlite.connect(self.db_path))
+        self._db.conn.row_factory = aiosqlite.Row
+        await self._db.create_function("decay", 2, decay_factor, deterministic=True)
+        # Only takes effect on a new file; see incremental_vacuum for old ones.
+        await self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._configure(self._db)
+        if not self.tweets_only:
+            await self._db.executescript(SCHEMA)
+        await self._db.executescript(TWEETS_SCHEMA)
+        await self._init_fts()
+        if not self.tweets_only:
+            await self._migrate()
+            await self._migrate_topics_json()
+            await self._seed_post_topics()
+            await self._db.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS kept_posts (post_id INTEGER PRIMARY KEY)"
+            )
+        await self._seed_tweet_counters()
+        if self.tweet_id_base:
+            await self._reserve_tweet_ids()
         await self._db.commit()
-        logger.info(f"Database initialized at {self.db_path}")
+        if not self.tweets_only:
+            await self.check_query_plans()
+
+        self._idle = asyncio.Queue()
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            await self._configure(conn)
+            self._readers.append(conn)
+            self._idle.put_nowait(conn)
+        logger.info(
+            f"Database initialized at {self.db_path} "
+            f"(WAL, {len(self._readers)} readers, synchronous={self.synchronous})"
+        )
+
+    def database_files(self) -> List[str]:
+        return [] if self.db_path == ":memory:" else [self.db_path]
+
+    async def _configure(self, conn: aiosqlite.Connection):
+        await conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        await conn.execute(f"PRAGMA synchronous={self.synchronous}")
+
+    @asynccontextmanager
+    async def _read(self):
+        """Borrow a read-only connection; falls back to the writer without a pool."""
+        if not self._readers:
+            yield self._db
+            return
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def _commit_soon(self):
+        """Commit now, or within group_commit_ms when write-behind is enabled."""
+        if not self.group_commit_ms:
+            await self._db.commit()
+        elif self._commit_task is None:
+            self._commit_task = asyncio.create_task(self._group_commit())
+
+    async def _group_commit(self):
+        try:
+            await asyncio.wait_for(self._flush_now.wait(), self.group_commit_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        # Writes issued from here on start the next group.
+        self._commit_task = None
+        self._flush_now.clear()
+        await self._db.commit()
+
+    async def flush(self):
+        """Commit pending write-behind writes and wait until they are durable."""
+        task = self._commit_task
+        if task is not None:
+            self._flush_now.set()
+            await asyncio.shield(task)
 
     async def close(self):
+        await self.flush()
+        for conn in self._readers:
+            await conn.close()
+        self._readers = []
         if self._db:
             await self._db.close()
 
+    async def _migrate(self):
+        for table, column, definition in MIGRATIONS:
+            cursor = await self._db.execute(f"PRAGMA table_info({table})")
+            columns = {row["name"] for row in await cursor.fetchall()}
+            if column not in columns:
+                await self._db.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                )
+                logger.info(f"Added column {table}.{column}")
+
+    async def _init_fts(self):
+        cursor = await self._db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        existing = {row["name"] for row in await cursor.fetchall()}
+        try:
+            await self._db.executescript("".join(FTS_SCHEMA[fts] for fts in self.fts_tables))
+        except Exception as e:
+            logger.warning(f"Full-text search disabled, FTS5 unavailable: {e}")
+            return
+        self.fts_enabled = True
+        for fts in self.fts_tables:
+            if fts not in existing:
+                await self.rebuild_search_index(fts)
+
+    async def rebuild_search_index(self, fts_table: Optional[str] = None):
+        """Re-index FTS tables from their source tables."""
+        for fts in [fts_table] if fts_table else self.fts_tables:
+            await self._db.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        await self._db.commit()
+
+    async def check_query_plans(self) -> List[str]:
+        """EXPLAIN the hot read queries; warn if one stops using its index."""
+        plans = []
+        for by_user, params, index in (
+            (True, ("", 0, "", 1), "idx_post_topics_fresh"),
+            (False, ("", "", 1), "idx_post_topics_topic_fresh"),
+        ):
+            cursor = await self._db.execute(
+                f"EXPLAIN QUERY PLAN {_top_posts_sql(by_user)}", params
+            )
+            plan = [row["detail"] for row in await cursor.fetchall()]
+            if not any(
+                f"COVERING INDEX {index} (" in step and "scraped_at>?" in step for step in plan
+            ):
+                logger.warning(f"get_top_posts is not an index-only range scan: {plan}")
+            plans.extend(plan)
+        return plans
+
+    async def _migrate_topics_json(self):
+        """Move topics from the legacy users.topics_json blob into topics tables."""
+        cursor = await self._db.execute("PRAGMA table_info(users)")
+        if "topics_json" not in {row["name"] for row in await cursor.fetchall()}:
+            return
+        cursor = await self._db.execute(
+            "SELECT id, topics_json FROM users WHERE topics_json NOT IN ('', '[]')"
+        )
+        rows = await cursor.fetchall()
+        for row in rows:
+            await self._write_topics(row["id"], json.loads(row["topics_json"] or "[]"))
+        try:
+            await self._db.execute("ALTER TABLE users DROP COLUMN topics_json")
+        except Exception as e:  # SQLite < 3.35 cannot drop columns
+            await self._db.execute("UPDATE users SET topics_json = '[]'")
+            logger.warning(f"Kept emptied users.topics_json column: {e}")
+        logger.info(f"Migrated topics of {len(rows)} users out of users.topics_json")
+
+    async def _seed_tweet_counters(self):
+        """Fill tweet_counters once for databases created before it existed."""
+        cursor = await self._db.execute(
+            "SELECT EXISTS(SELECT 1 FROM tweet_counters), EXISTS(SELECT 1 FROM generated_tweets)"
+        )
+        has_counters, has_tweets = await cursor.fetchone()
+        if has_tweets and not has_counters:
+            await self.rebuild_tweet_counters()
+
+    async def _seed_post_topics(self):
+        """Link posts stored before the pool existed to the topic they carry."""
+        cursor = await self._db.execute(
+            "SELECT EXISTS(SELECT 1 FROM post_topics), EXISTS(SELECT 1 FROM scraped_posts)"
+        )
+        has_links, has_posts = await cursor.fetchone()
+        if has_posts and not has_links:
+            cursor = await self._db.execute(
+                """INSERT INTO post_topics (post_id, topic, user_id, engagement_score, scraped_at)
+                   SELECT id, topic, 0, engagement_score, scraped_at FROM scraped_posts"""
+            )
+            logger.info(f"Linked {cursor.rowcount} pooled posts to their topics")
+
+    async def _reserve_tweet_ids(self):
+        """Start generated_tweets ids above tweet_id_base (a shard's id range)."""
+        cursor = await self._db.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'generated_tweets'"
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            await self._db.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('generated_tweets', ?)",
+                (self.tweet_id_base,),
+            )
+        elif row["seq"] < self.tweet_id_base:
+            await self._db.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'generated_tweets'",
+                (self.tweet_id_base,),
+            )
+
+    async def rebuild_tweet_counters(self) -> int:
+        """Recompute tweet_counters from generated_tweets. Returns row count."""
+        await self.flush()
+        await self._db.execute("DELETE FROM tweet_counters")
+        cursor = await self._db.execute(
+            """INSERT INTO tweet_counters (user_id, topic, status, count)
+               SELECT user_id, topic, status, COUNT(*) FROM generated_tweets
+               GROUP BY user_id, topic, status"""
+        )
+        await self._db.commit()
+        logger.info(f"Rebuilt tweet counters ({cursor.rowcount} rows)")
+        return cursor.rowcount
+
     # --- Users ---
 
     async def add_user(self, user: User) -> int:
@@ -104,51 +649,30 @@ class Database:
             """INSERT OR REPLACE INTO users
                (email, password_hash, reddit_client_id, reddit_client_secret,
                 twitter_api_key, twitter_api_secret, twitter_access_token,
-                twitter_access_token_secret, telegram_chat_id, topics_json)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                twitter_access_token_secret, telegram_chat_id)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (user.email, user.password_hash, user.reddit_client_id,
              user.reddit_client_secret, user.twitter_api_key,
              user.twitter_api_secret, user.twitter_access_token,
              user.twitter_access_token_secret,
-             user.telegram_chat_id, user.topics_json),
+             user.telegram_chat_id),
         )
+        user_id = cursor.lastrowid
+        await self._write_topics(user_id, user.topics)
         await self._db.commit()
-        return cursor.lastrowid
+        # INSERT OR REPLACE may have given an existing email a new id.
+        self.user_cache.invalidate()
+        return user_id
 
-    async def get_user_by_email(self, email: str) -> Optional[User]:
-        cursor = await self._db.execute(
-            "SELECT * FROM users WHERE email = ?", (email,)
-        )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-        return self._row_to_user(row)
-
-    async def get_user_by_id(self, user_id: int) -> Optional[User]:
-        cursor = await self._db.execute(
-            "SELECT * FROM users WHERE id = ?", (user_id,)
-        )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-        return self._row_to_user(row)
-
-    def _row_to_user(self, row) -> User:
-        return User(
-            id=row["id"],
-            email=row["email"],
-            password_hash=row["password_hash"],
-            reddit_client_id=row["reddit_client_id"],
-            reddit_client_secret=row["reddit_client_secret"],
-            twitter_api_key=row["twitter_api_key"],
-            twitter_api_secret=row["twitter_api_secret"],
-            twitter_access_token=row["twitter_access_token"],
-            twitter_access_token_secret=row["twitter_access_token_secret"],
-            telegram_chat_id=row["telegram_chat_id"],
-            topics_json=row["topics_json"],
-            active=bool(row["active"]),
-            created_at=row["created_at"],
-        )
+    async def _fetch_user(self, column: str, value) -> Optional[User]:
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                f"SELECT * FROM users WHERE {column} = ?", (value,)
+            )
+            row = await cursor.fetchone()
+            if not row:
+                return None
+            return (await self._with_topics(conn, [self._row_to_user(row)]))[0]
 
     async def update_user_credentials(self, user_id: int, **kwargs):
         sets = []
@@ -170,121 +694,356 @@ class Database:
             f"UPDATE users SET {', '.join(sets)} WHERE id = ?", params
         )
         await self._db.commit()
+        self.user_cache.invalidate(user_id)
 
-    async def update_user_topics_by_id(self, user_id: int, topics_json: str):
-        await self._db.execute(
-            "UPDATE users SET topics_json = ? WHERE id = ?",
-            (topics_json, user_id),
-        )
-        await self._db.commit()
+    async def get_tweets_page(
+        self,
+        user_id: int,
+        statuses: Sequence[str],
+        limit: int = 50,
+        topic: Optional[str] = None,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> List[GeneratedTweet]:
+        """Newest-first page of a user's tweets in any of statuses.
 
-    async def get_tweet_history(self, user_id: int, limit: int = 50) -> List[GeneratedTweet]:
-        cursor = await self._db.execute(
-            """SELECT * FROM generated_tweets
-               WHERE user_id = ? AND status IN ('posted', 'approved', 'rejected')
-               ORDER BY created_at DESC LIMIT ?""",
-            (user_id, limit),
-        )
-        rows = await cursor.fetchall()
-        return [self._row_to_generated_tweet(row) for row in rows]
+        before is the (created_at, id) of the last tweet of the previous
+        page. Each status is read as its own keyset range on
+        idx_generated_user_status_created and the pages merged, so cost
+        depends on limit, not on how many tweets the user has.
+        """
+        sql = """SELECT * FROM generated_tweets
+                 WHERE user_id = ? AND status = ?"""
+        extra: list = []
+        if topic is not None:
+            sql += " AND topic = ?"
+            extra.append(topic)
+        if before is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            extra.extend(before)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+
+        rows = []
+        async with self._read() as conn:
+            for status in dict.fromkeys(statuses):
+                cursor = await conn.execute(sql, (user_id, status, *extra, limit))
+                rows.extend(await cursor.fetchall())
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        return [self._row_to_generated_tweet(row) for row in rows[:limit]]
 
     async def get_dashboard_stats(self, user_id: int) -> dict:
-        pending = await self._db.execute(
-            "SELECT COUNT(*) as c FROM generated_tweets WHERE user_id = ? AND status = 'pending'",
-            (user_id,),
+        """Tweet counts for a user, read from tweet_counters."""
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                "SELECT topic, status, count FROM tweet_counters WHERE user_id = ? AND count > 0",
+                (user_id,),
+            )
+            return self._stats_from_counters(await cursor.fetchall())
+
+    async def get_active_users(self) -> List[User]:
+        async with self._read() as conn:
+            cursor = await conn.execute("SELECT * FROM users WHERE active = 1")
+            rows = await cursor.fetchall()
+            return await self._with_topics(conn, [self._row_to_user(row) for row in rows])
+
+    # --- Topics ---
+
+    async def _with_topics(self, conn: aiosqlite.Connection, users: List[User]) -> List[User]:
+        """Attach each user's topics, loaded with two indexed queries."""
+        by_id = {user.id: user for user in users}
+        if not by_id:
+            return users
+        placeholders = ", ".join("?" * len(by_id))
+        cursor = await conn.execute(
+            f"""SELECT * FROM topics WHERE user_id IN ({placeholders})
+                ORDER BY user_id, position""",
+            list(by_id),
         )
-        pending_count = (await pending.fetchone())["c"]
+        topics = {}
+        for row in await cursor.fetchall():
+            topic = self._row_to_topic(row)
+            topics[row["id"]] = topic
+            by_id[row["user_id"]].topics.append(topic)
+        if topics:
+            cursor = await conn.execute(
+                f"""SELECT topic_id, subreddit FROM topic_subreddits
+                    WHERE topic_id IN ({", ".join("?" * len(topics))})
+                    ORDER BY topic_id, position""",
+                list(topics),
+            )
+            for row in await cursor.fetchall():
+                topics[row["topic_id"]]["subreddits"].append(row["subreddit"])
+        return users
 
-        posted = await self._db.execute(
-            "SELECT COUNT(*) as c FROM generated_tweets WHERE user_id = ? AND status = 'posted'",
+    async def _write_topics(self, user_id: int, topics: list):
+        """Replace a user's topics without committing."""
+        await self._db.execute(
+            "DELETE FROM topic_subreddits WHERE topic_id IN (SELECT id FROM topics WHERE user_id = ?)",
             (user_id,),
         )
-        posted_count = (await posted.fetchone())["c"]
+        await self._db.execute("DELETE FROM topics WHERE user_id = ?", (user_id,))
+        for position, topic in enumerate(topics):
+            await self._insert_topic(user_id, topic, position)
 
-        total = await self._db.execute(
-            "SELECT COUNT(*) as c FROM generated_tweets WHERE user_id = ?",
-            (user_id,),
+    async def _insert_topic(self, user_id: int, topic, position: int):
+        cursor = await self._db.execute(
+            """INSERT INTO topics (user_id, name, tone, hashtags, settings, position)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (user_id, *self._topic_columns(topic), position),
+        )
+        subreddits = topic.get("subreddits", []) if isinstance(topic, dict) else []
+        await self._db.executemany(
+            """INSERT OR IGNORE INTO topic_subreddits (topic_id, subreddit, position)
+               VALUES (?, ?, ?)""",
+            [(cursor.lastrowid, sub, i) for i, sub in enumerate(subreddits)],
         )
-        total_count = (await total.fetchone())["c"]
 
-        return {
-            "pending": pending_count,
-            "posted": posted_count,
-            "total_generated": total_count,
-        }
+    async def set_user_topics(self, user_id: int, topics: list):
+        await self._write_topics(user_id, topics)
+        await self._db.commit()
+        self.user_cache.invalidate(user_id)
 
-    async def get_user_by_chat_id(self, chat_id: int) -> Optional[User]:
+    async def add_topic(self, user_id: int, topic: dict) -> bool:
+        """Append a topic; returns False if the user already has one by that name."""
         cursor = await self._db.execute(
-            "SELECT * FROM users WHERE telegram_chat_id = ?", (chat_id,)
+            "SELECT EXISTS(SELECT 1 FROM topics WHERE user_id = ? AND name = ?), "
+            "COALESCE(MAX(position) + 1, 0) FROM topics WHERE user_id = ?",
+            (user_id, topic["name"], user_id),
         )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-        return self._row_to_user(row)
-
-    async def get_active_users(self) -> List[User]:
-        cursor = await self._db.execute("SELECT * FROM users WHERE active = 1")
-        rows = await cursor.fetchall()
-        return [self._row_to_user(row) for row in rows]
+        exists, position = await cursor.fetchone()
+        if exists:
+            return False
+        await self._insert_topic(user_id, topic, position)
+        await self._db.commit()
+        self.user_cache.invalidate(user_id)
+        return True
 
-    async def update_user_topics(self, chat_id: int, topics_json: str):
+    async def remove_topic(self, user_id: int, name: str) -> bool:
+        """Delete a topic by name; returns False if the user has no such topic."""
         await self._db.execute(
-            "UPDATE users SET topics_json = ? WHERE telegram_chat_id = ?",
-            (topics_json, chat_id),
+            """DELETE FROM topic_subreddits WHERE topic_id IN
+               (SELECT id FROM topics WHERE user_id = ? AND name = ?)""",
+            (user_id, name),
+        )
+        cursor = await self._db.execute(
+            "DELETE FROM topics WHERE user_id = ? AND name = ?", (user_id, name)
         )
         await self._db.commit()
+        self.user_cache.invalidate(user_id)
+        return cursor.rowcount > 0
 
     # --- Scraped Posts ---
 
-    async def save_scraped_posts(self, posts: List[ScrapedPost]) -> int:
-        count = 0
+    async def save_scraped_posts(self, posts: List[ScrapedPost], upsert: bool = False) -> IngestResult:
+        """Store posts in one transaction: once each in the pool, plus a
+        post_topics link per (topic, user_id). With upsert, posts already
+        stored get their score, comments and engagement refreshed instead of
+        being skipped. Returns how many pool rows were really inserted and
+        updated."""
+        if not posts:
+            return IngestResult()
+        conflict = ""
+        if upsert:
+            conflict = """
+               ON CONFLICT(post_id) DO UPDATE SET
+                 score = excluded.score,
+                 num_comments = excluded.num_comments,
+                 upvote_ratio = excluded.upvote_ratio,
+                 top_comments = CASE WHEN excluded.comments_hydrated
+                                     THEN excluded.top_comments
+                                     ELSE scraped_posts.top_comments END,
+                 comments_hydrated = MAX(scraped_posts.comments_hydrated,
+                                         excluded.comments_hydrated),
+                 engagement_score = excluded.engagement_score,
+                 created_utc = COALESCE(scraped_posts.created_utc, excluded.created_utc)"""
+        sql = f"""INSERT {'' if upsert else 'OR IGNORE '}INTO scraped_posts
+               (post_id, subreddit, author, title, content, score,
+                num_comments, upvote_ratio, post_url, top_comments,
+                comments_hydrated, engagement_score, topic, created_utc)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?){conflict}"""
+
+        # A post fanned out to several topics goes into the pool once, as
+        # first seen; every copy still gets its own post_topics link.
+        first_seen: Dict[str, ScrapedPost] = {}
         for post in posts:
+            first_seen.setdefault(post.post_id, post)
+        pooled = list(first_seen.values())
+        rows = [
+            (post.post_id, post.subreddit, post.author, post.title,
+             post.content, post.score, post.num_comments,
+             post.upvote_ratio, post.post_url, post.top_comments_json,
+             int(post.comments_hydrated), post.engagement_score, post.topic,
+             post.created_utc or None)
+            for post in pooled
+        ]
+        try:
+            existing, changes = await self._ingest(
+                [post.post_id for post in pooled], sql, rows,
+                _links_sql(refresh=upsert), _link_rows(posts),
+            )
+        except Exception as e:
+            logger.error(f"Failed to save {len(posts)} posts: {e}")
+            raise
+        inserted = len(pooled) - existing
+        return IngestResult(inserted=inserted, updated=changes - inserted)
+
+    async def _ingest(
+        self, post_ids: List[str], sql: str, rows: list, links_sql: str, links: list,
+    ) -> Tuple[int, int]:
+        """Write pool rows and their links inside a savepoint, then commit;
+        returns how many post_ids were already stored and the pool rows
+        changed. Holds the writer lock throughout, so a failed batch rolls
+        back only its own writes."""
+        conn = self._db.conn
+        existing = 0
+        async with self._db.lock:
+            await conn.execute("SAVEPOINT ingest")
             try:
-                await self._db.execute(
-                    """INSERT OR IGNORE INTO scraped_posts
-                       (post_id, subreddit, author, title, content, score,
-                        num_comments, upvote_ratio, post_url, top_comments,
-                        engagement_score, topic)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (post.post_id, post.subreddit, post.author, post.title,
-                     post.content, post.score, post.num_comments,
-                     post.upvote_ratio, post.post_url, post.top_comments_json,
-                     post.engagement_score, post.topic),
+                for i in range(0, len(post_ids), SQL_BATCH):
+                    chunk = post_ids[i:i + SQL_BATCH]
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor = await conn.execute(
+                        f"SELECT COUNT(*) FROM scraped_posts WHERE post_id IN ({placeholders})",
+                        chunk,
+                    )
+                    existing += (await cursor.fetchone())[0]
+                # rowcount, unlike total_changes, leaves out rows the FTS and
+                # post_topics triggers touch.
+                changes = (await conn.executemany(sql, rows)).rowcount
+                await conn.executemany(links_sql, links)
+            except BaseException:
+                await conn.execute("ROLLBACK TO ingest")
+                raise
+            finally:
+                await conn.execute("RELEASE ingest")
+            await conn.commit()
+        return existing, changes
+
+    async def link_posts(self, posts: List[ScrapedPost]) -> int:
+        """Link already pooled posts to their topic and user_id, e.g. posts
+        incremental discovery skipped as unchanged. Returns new links."""
+        if not posts:
+            return 0
+        await self.flush()
+        before = self._db.total_changes
+        await self._db.executemany(_links_sql(refresh=False), _link_rows(posts))
+        await self._db.commit()
+        return self._db.total_changes - before
+
+    async def get_known_post_scores(self, post_ids: List[str]) -> Dict[str, int]:
+        """Return {post_id: score} for the given ids that are already stored."""
+        async with self._read() as conn:
+            known = {}
+            for i in range(0, len(post_ids), SQL_BATCH):
+                chunk = post_ids[i:i + SQL_BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = await conn.execute(
+                    f"SELECT post_id, score FROM scraped_posts WHERE post_id IN ({placeholders})",
+                    chunk,
                 )
-                count += 1
-            except Exception as e:
-                logger.warning(f"Failed to save post {post.post_id}: {e}")
+                for row in await cursor.fetchall():
+                    known[row["post_id"]] = row["score"]
+            return known
+
+    async def get_post_ids_for_refresh(self, max_age_hours: int = 48, limit: int = 5000) -> List[str]:
+        """Reddit ids of recently scraped posts, newest first."""
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                """SELECT post_id FROM scraped_posts
+                   WHERE scraped_at >= datetime('now', ?)
+                   ORDER BY scraped_at DESC LIMIT ?""",
+                (f"-{int(max_age_hours)} hours", limit),
+            )
+            return [row["post_id"] for row in await cursor.fetchall()]
+
+    async def update_post_stats(self, stats: List[dict]) -> int:
+        """Apply refreshed score/num_comments/upvote_ratio, one multi-row
+        UPDATE per batch of posts. Call rescore_posts afterwards."""
+        # rowcount is unreliable for statements starting with WITH.
+        before = self._db.total_changes
+        for i in range(0, len(stats), STATS_BATCH):
+            chunk = stats[i:i + STATS_BATCH]
+            values = ", ".join("(?, ?, ?, ?)" for _ in chunk)
+            params = []
+            for s in chunk:
+                params.extend((s["post_id"], s["score"], s["num_comments"], s["upvote_ratio"]))
+            await self._db.execute(
+                f"""WITH fresh(post_id, score, num_comments, upvote_ratio) AS (VALUES {values})
+                    UPDATE scraped_posts SET
+                      score = fresh.score,
+                      num_comments = fresh.num_comments,
+                      upvote_ratio = fresh.upvote_ratio
+                    FROM fresh WHERE scraped_posts.post_id = fresh.post_id""",
+                params,
+            )
         await self._db.commit()
-        return count
+        return self._db.total_changes - before
 
-    async def get_top_posts(self, topic: str, limit: int = 20) -> List[ScrapedPost]:
-        cursor = await self._db.execute(
-            """SELECT * FROM scraped_posts
-               WHERE topic = ?
-               ORDER BY engagement_score DESC
-               LIMIT ?""",
-            (topic, limit),
+    async def rescore_posts(
+        self,
+        profiles: Dict[ProfileKey, ScoringProfile],
+        default: ScoringProfile = DEFAULT_PROFILE,
+    ) -> int:
+        """Recompute engagement scores: pooled posts under the default
+        profile, then each topic link under the profile of its (user_id,
+        topic), one UPDATE per profile. Age is taken from created_utc,
+        falling back to scraped_at. Returns how many links were rescored."""
+        groups: Dict[ScoringProfile, List[ProfileKey]] = {}
+        for key, profile in profiles.items():
+            groups.setdefault(profile, []).append(key)
+
+        def pairs(keys: List[ProfileKey]) -> str:
+            values = ", ".join(["(?, ?)"] * len(keys))
+            return f"(post_topics.user_id, post_topics.topic) IN (VALUES {values})"
+
+        statements = [(profile, pairs(keys), keys) for profile, keys in groups.items()]
+        others = [key for keys in groups.values() for key in keys]
+        statements.append((default, f"NOT {pairs(others)}" if others else "1", others))
+
+        # Pool rows keep the default score; per-topic scores live on the links.
+        await self._db.execute(
+            f"UPDATE scraped_posts SET engagement_score = {ENGAGEMENT_SQL.format(p='')}",
+            (default.score_weight, default.comments_weight, default.ratio_weight,
+             default.half_life_hours),
         )
-        rows = await cursor.fetchall()
-        return [
-            ScrapedPost(
-                id=row["id"],
-                post_id=row["post_id"],
-                subreddit=row["subreddit"],
-                author=row["author"],
-                title=row["title"],
-                content=row["content"],
-                score=row["score"],
-                num_comments=row["num_comments"],
-                upvote_ratio=row["upvote_ratio"],
-                post_url=row["post_url"],
-                top_comments=ScrapedPost.parse_top_comments(row["top_comments"]),
-                engagement_score=row["engagement_score"],
-                topic=row["topic"],
-                scraped_at=row["scraped_at"],
+        before = self._db.total_changes
+        for profile, where, keys in statements:
+            await self._db.execute(
+                f"""UPDATE post_topics SET engagement_score = {ENGAGEMENT_SQL.format(p='p.')}
+                    FROM scraped_posts p
+                    WHERE p.id = post_topics.post_id AND {where}""",
+                (profile.score_weight, profile.comments_weight, profile.ratio_weight,
+                 profile.half_life_hours, *(value for key in keys for value in key)),
             )
-            for row in rows
-        ]
+        await self._db.commit()
+        return self._db.total_changes - before
+
+    async def update_post_comments(self, posts: List[ScrapedPost]):
+        """Store comments loaded after the post was saved."""
+        await self._db.executemany(
+            "UPDATE scraped_posts SET top_comments = ?, comments_hydrated = 1 WHERE post_id = ?",
+            [(post.top_comments_json, post.post_id) for post in posts],
+        )
+        await self._db.commit()
+
+    async def get_top_posts(
+        self,
+        topic: str,
+        limit: int = 20,
+        max_age_hours: int = 0,
+        user_id: Optional[int] = None,
+        body_chars: int = 0,
+    ) -> List[ScrapedPost]:
+        """Best posts linked to a topic by that topic's engagement score,
+        limited to links made in the last max_age_hours (0 = all time). With
+        user_id, only posts discovered for that user's topic. body_chars > 0
+        loads only that much of each post's content."""
+        params = (topic, user_id) if user_id is not None else (topic,)
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                _top_posts_sql(user_id is not None, body_chars),
+                (*params, _age_cutoff(max_age_hours), limit),
+            )
+            return [self._row_to_top_post(row, topic) for row in await cursor.fetchall()]
 
     # --- Generated Tweets ---
 
@@ -298,21 +1057,23 @@ class Database:
              tweet.inspiration_ids_json, tweet.status,
              tweet.telegram_message_id, tweet.telegram_chat_id),
         )
-        await self._db.commit()
+        await self._commit_soon()
         return cursor.lastrowid
 
     async def get_pending_tweets(self, user_id: Optional[int] = None) -> List[GeneratedTweet]:
-        if user_id:
-            cursor = await self._db.execute(
-                "SELECT * FROM generated_tweets WHERE status = 'pending' AND user_id = ?",
-                (user_id,),
-            )
-        else:
-            cursor = await self._db.execute(
-                "SELECT * FROM generated_tweets WHERE status = 'pending'"
-            )
-        rows = await cursor.fetchall()
-        return [self._row_to_generated_tweet(row) for row in rows]
+        async with self._read() as conn:
+            if user_id:
+                cursor = await conn.execute(
+                    """SELECT * FROM generated_tweets WHERE status = 'pending' AND user_id = ?
+                       ORDER BY created_at, id""",
+                    (user_id,),
+                )
+            else:
+                cursor = await conn.execute(
+                    "SELECT * FROM generated_tweets WHERE status = 'pending' ORDER BY created_at, id"
+                )
+            rows = await cursor.fetchall()
+            return [self._row_to_generated_tweet(row) for row in rows]
 
     async def update_tweet_status(self, tweet_id: int, status: str, **kwargs):
         sets = ["status = ?"]
@@ -336,34 +1097,198 @@ class Database:
         await self._db.execute(
             f"UPDATE generated_tweets SET {', '.join(sets)} WHERE id = ?", params
         )
-        await self._db.commit()
+        await self._commit_soon()
 
     async def get_generated_tweet_by_id(self, tweet_id: int) -> Optional[GeneratedTweet]:
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                "SELECT * FROM generated_tweets WHERE id = ?", (tweet_id,)
+            )
+            row = await cursor.fetchone()
+            if not row:
+                return None
+            return self._row_to_generated_tweet(row)
+
+    async def import_tweets(self, source_path: str, shard: int = 0, shard_count: int = 1) -> int:
+        """Copy generated tweets of users with user_id % shard_count == shard
+        from another database file, keeping their ids. Rows already here are
+        skipped, so an interrupted move can simply be repeated."""
+        await self.flush()
+        await self._db.execute("ATTACH DATABASE ? AS source", (source_path,))
+        try:
+            cursor = await self._db.execute(
+                f"""INSERT OR IGNORE INTO generated_tweets ({TWEET_COLUMNS})
+                    SELECT {TWEET_COLUMNS} FROM source.generated_tweets
+                    WHERE user_id % ? = ?""",
+                (shard_count, shard),
+            )
+            await self._db.commit()
+        finally:
+            await self._db.execute("DETACH DATABASE source")
+        return cursor.rowcount
+
+    async def clear_tweets(self) -> int:
+        """Delete every generated tweet and its counters; returns rows deleted."""
+        await self.flush()
+        cursor = await self._db.execute("DELETE FROM generated_tweets")
+        await self._db.execute("DELETE FROM tweet_counters")
+        await self._db.commit()
+        return cursor.rowcount
+
+    async def get_inspiration_post_ids(self) -> Set[int]:
+        """Ids of pooled posts that inspired a tweet stored in this file."""
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                """SELECT DISTINCT value FROM generated_tweets,
+                   json_each(generated_tweets.inspiration_post_ids)"""
+            )
+            return {row[0] for row in await cursor.fetchall()}
+
+    # --- Search ---
+
+    async def search_posts(
+        self,
+        text: str,
+        limit: int = 20,
+        offset: int = 0,
+        topic: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> List[dict]:
+        """Scraped posts matching text, best bm25 match first (title weighted 3x).
+
+        Only the newest SEARCH_CANDIDATES matches are ranked, which keeps
+        terms found in most of the corpus from scoring every document.
+        topic keeps posts linked to it in post_topics, for user_id's links
+        and shared ones when user_id is given.
+        """
+        query = fts_query(text)
+        if not self.fts_enabled or not query:
+            return []
+        sql = """SELECT p.id, p.post_id, p.subreddit, p.title, p.topic, p.score,
+                        p.post_url, p.scraped_at, c.relevance
+                 FROM (SELECT rowid, bm25(scraped_posts_fts, 3.0, 1.0, 0.5) AS relevance
+                       FROM scraped_posts_fts WHERE scraped_posts_fts MATCH ?
+                       ORDER BY rowid DESC LIMIT ?) c
+                 JOIN scraped_posts p ON p.id = c.rowid"""
+        params: list = [query, SEARCH_CANDIDATES]
+        if topic is not None:
+            user_filter = "AND pt.user_id IN (?, 0)" if user_id is not None else ""
+            sql += f""" WHERE EXISTS (SELECT 1 FROM post_topics pt
+                                      WHERE pt.post_id = p.id AND pt.topic = ? {user_filter})"""
+            params += [topic, user_id] if user_id is not None else [topic]
+        sql += " ORDER BY c.relevance LIMIT ? OFFSET ?"
+        async with self._read() as conn:
+            cursor = await conn.execute(sql, (*params, limit, offset))
+            results = [dict(row) for row in await cursor.fetchall()]
+            if not results:
+                return results
+            # Snippets for the page only; computing them in the ranking query
+            # would do it for every candidate.
+            ids = [r["id"] for r in results]
+            cursor = await conn.execute(
+                f"""SELECT rowid, snippet(scraped_posts_fts, -1, '[', ']', '...', 16) AS snippet
+                    FROM scraped_posts_fts
+                    WHERE scraped_posts_fts MATCH ? AND rowid IN ({', '.join('?' * len(ids))})""",
+                (query, *ids),
+            )
+            snippets = {row["rowid"]: row["snippet"] for row in await cursor.fetchall()}
+        for result in results:
+            result["snippet"] = snippets.get(result["id"], "")
+        return results
+
+    async def search_tweets(
+        self, user_id: int, text: str, limit: int = 20, offset: int = 0
+    ) -> List[dict]:
+        """A user's generated tweets matching text, best match first."""
+        query = fts_query(text)
+        if not self.fts_enabled or not query:
+            return []
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                """SELECT t.id, t.topic, t.content, t.status, t.created_at,
+                          snippet(generated_tweets_fts, 0, '[', ']', '...', 16) AS snippet,
+                          bm25(generated_tweets_fts) AS relevance
+                   FROM generated_tweets_fts JOIN generated_tweets t ON t.id = generated_tweets_fts.rowid
+                   WHERE generated_tweets_fts MATCH ? AND t.user_id = ?
+                   ORDER BY relevance LIMIT ? OFFSET ?""",
+                (query, user_id, limit, offset),
+            )
+            return [dict(row) for row in await cursor.fetchall()]
+
+    # --- Retention ---
+
+    async def get_expired_rows(self, table: str, max_age_days: int, limit: int = 1000) -> List[dict]:
+        """Oldest rows of a RETENTION_TABLES table past max_age_days.
+        Scraped posts carry their post_topics links under "links", since
+        deleting the post deletes them too."""
+        column, keep = RETENTION_TABLES[table]
         cursor = await self._db.execute(
-            "SELECT * FROM generated_tweets WHERE id = ?", (tweet_id,)
+            f"""SELECT * FROM {table}
+                WHERE {column} < datetime('now', :age) AND {keep}
+                ORDER BY {column} LIMIT :limit""",
+            {"age": f"-{int(max_age_days)} days", "limit": limit},
         )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-        return self._row_to_generated_tweet(row)
-
-    def _row_to_generated_tweet(self, row) -> GeneratedTweet:
-        return GeneratedTweet(
-            id=row["id"],
-            user_id=row["user_id"],
-            topic=row["topic"],
-            content=row["content"],
-            inspiration_post_ids=GeneratedTweet.parse_inspiration_ids(
-                row["inspiration_post_ids"]
-            ),
-            status=row["status"],
-            telegram_message_id=row["telegram_message_id"],
-            telegram_chat_id=row["telegram_chat_id"],
-            created_at=row["created_at"],
-            approved_at=row["approved_at"],
-            posted_at=row["posted_at"],
-            posted_tweet_id=row["posted_tweet_id"],
+        rows = [dict(row) for row in await cursor.fetchall()]
+        if table == "scraped_posts" and rows:
+            links = {row["id"]: [] for row in rows}
+            ids = list(links)
+            for i in range(0, len(ids), SQL_BATCH):
+                chunk = ids[i:i + SQL_BATCH]
+                cursor = await self._db.execute(
+                    f"""SELECT post_id, topic, user_id, engagement_score, scraped_at
+                        FROM post_topics WHERE post_id IN ({', '.join('?' * len(chunk))})""",
+                    chunk,
+                )
+                for link in await cursor.fetchall():
+                    link = dict(link)
+                    links[link.pop("post_id")].append(link)
+            for row in rows:
+                row["links"] = links[row["id"]]
+        return rows
+
+    async def keep_posts(self, post_ids: Iterable[int]):
+        """Replace the posts retention keeps on top of those this file's own
+        tweets reference; used when tweets live in shard files."""
+        await self.flush()
+        await self._db.execute("DELETE FROM temp.kept_posts")
+        await self._db.executemany(
+            "INSERT OR IGNORE INTO temp.kept_posts (post_id) VALUES (?)",
+            [(post_id,) for post_id in post_ids],
         )
+        await self._db.commit()
+
+    async def delete_rows(self, table: str, ids: List[int]) -> int:
+        if table not in RETENTION_TABLES:
+            raise ValueError(f"No retention policy for table {table}")
+        await self.flush()
+        deleted = 0
+        for i in range(0, len(ids), SQL_BATCH):
+            chunk = ids[i:i + SQL_BATCH]
+            cursor = await self._db.execute(
+                f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            deleted += cursor.rowcount
+        await self._db.commit()
+        return deleted
+
+    async def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Return free pages to the filesystem; 0 pages means all of them.
+
+        Files created before auto_vacuum=INCREMENTAL are converted with one
+        full VACUUM first. Returns the number of pages released.
+        """
+        await self.flush()
+        cursor = await self._db.execute("PRAGMA auto_vacuum")
+        if (await cursor.fetchone())[0] != 2:
+            logger.info("Converting database to incremental auto-vacuum (one-off VACUUM)")
+            await self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            await self._db.execute("VACUUM")
+        cursor = await self._db.execute("PRAGMA freelist_count")
+        before = (await cursor.fetchone())[0]
+        # The pragma frees one page per step; execute() would only step it once.
+        await self._db.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        cursor = await self._db.execute("PRAGMA freelist_count")
+        return before - (await cursor.fetchone())[0]
 
     # --- Run Log ---
 
@@ -371,14 +1296,17 @@ class Database:
         await self._db.execute(
             """INSERT INTO run_log
                (run_type, status, topics_processed, tweets_scraped,
-                tweets_generated, tweets_posted, error_message, finished_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                tweets_generated, tweets_posted, fetches_saved,
+                posts_refreshed, error_message, finished_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (run_type, status,
              stats.get("topics_processed", 0),
              stats.get("tweets_scraped", 0),
              stats.get("tweets_generated", 0),
              stats.get("tweets_posted", 0),
+             stats.get("fetches_saved", 0),
+             stats.get("posts_refreshed", 0),
              stats.get("error_message"),
              datetime.utcnow().isoformat()),
         )
-        await self._db.commit()
+        await self._commit_soon()
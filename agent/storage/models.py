@@ -1,10 +1,16 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
-import json
+import time
 
+from agent.storage import codec
+from agent.storage.scoring import DEFAULT_PROFILE, ScoringProfile
 
-@dataclass
+# Models are slotted: no per-instance __dict__, which adds up when a
+# generation run loads posts for every topic of every user.
+
+
+@dataclass(slots=True)
 class ScrapedPost:
     post_id: str
     subreddit: str
@@ -16,31 +22,53 @@ class ScrapedPost:
     upvote_ratio: float = 0.0
     post_url: str = ""
     top_comments: List[str] = field(default_factory=list)
+    comments_hydrated: bool = False  # False until top_comments has been fetched
     engagement_score: float = 0.0
     topic: str = ""
+    created_utc: float = 0.0  # Reddit post creation time, 0 if unknown
+    user_id: int = 0  # user the post was discovered for, 0 = shared
     scraped_at: Optional[datetime] = None
     id: Optional[int] = None
 
     @property
     def top_comments_json(self) -> str:
-        return json.dumps(self.top_comments)
+        return codec.dumps(self.top_comments)
 
     @staticmethod
     def parse_top_comments(raw: str) -> List[str]:
         if not raw:
             return []
-        return json.loads(raw)
+        return codec.loads(raw)
 
-    def compute_engagement_score(self) -> float:
+    def compute_engagement_score(
+        self, profile: ScoringProfile = DEFAULT_PROFILE, now: Optional[float] = None
+    ) -> float:
+        age_hours = 0.0
+        if self.created_utc:
+            age_hours = ((now or time.time()) - self.created_utc) / 3600
         self.engagement_score = (
-            self.score * 1.0
-            + self.num_comments * 2.0
-            + self.upvote_ratio * 100.0
+            profile.base(self.score, self.num_comments, self.upvote_ratio)
+            * profile.decay(age_hours)
         )
         return self.engagement_score
 
 
-@dataclass
+@dataclass(slots=True)
+class IngestResult:
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.updated
+
+    def __iadd__(self, other: "IngestResult") -> "IngestResult":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        return self
+
+
+@dataclass(slots=True)
 class GeneratedTweet:
     topic: str
     content: str
@@ -57,16 +85,16 @@ class GeneratedTweet:
 
     @property
     def inspiration_ids_json(self) -> str:
-        return json.dumps(self.inspiration_post_ids)
+        return codec.dumps(self.inspiration_post_ids)
 
     @staticmethod
     def parse_inspiration_ids(raw: str) -> List[int]:
         if not raw:
             return []
-        return json.loads(raw)
+        return codec.loads(raw)
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     email: str = ""
     password_hash: str = ""
@@ -77,15 +105,8 @@ class User:
     twitter_access_token: str = ""
     twitter_access_token_secret: str = ""
     telegram_chat_id: int = 0
-    topics_json: str = "[]"
+    # Topic dicts (name, subreddits, tone, hashtags, ...) from the topics tables.
+    topics: List[dict] = field(default_factory=list)
     active: bool = True
     created_at: Optional[datetime] = None
     id: Optional[int] = None
-
-    @property
-    def topics(self) -> list:
-        return json.loads(self.topics_json) if self.topics_json else []
-
-    @topics.setter
-    def topics(self, value: list):
-        self.topics_json = json.dumps(value)
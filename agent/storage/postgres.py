@@ -0,0 +1,803 @@
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from agent.storage.base import Storage
+from agent.storage.models import GeneratedTweet, IngestResult, ScrapedPost, User
+from agent.storage.scoring import DEFAULT_PROFILE, ProfileKey, ScoringProfile
+
+logger = logging.getLogger("twitter_agent")
+
+# Same tables as the SQLite schema. Differences: tsvector columns with GIN
+# indexes replace FTS5, ON DELETE CASCADE replaces the cleanup triggers, and
+# timestamps are naive UTC like SQLite's CURRENT_TIMESTAMP.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id BIGSERIAL PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL DEFAULT '',
+    reddit_client_id TEXT NOT NULL DEFAULT '',
+    reddit_client_secret TEXT NOT NULL DEFAULT '',
+    twitter_api_key TEXT NOT NULL DEFAULT '',
+    twitter_api_secret TEXT NOT NULL DEFAULT '',
+    twitter_access_token TEXT NOT NULL DEFAULT '',
+    twitter_access_token_secret TEXT NOT NULL DEFAULT '',
+    telegram_chat_id BIGINT DEFAULT 0,
+    active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT timezone('utc', now())
+);
+CREATE INDEX IF NOT EXISTS idx_users_active ON users(active);
+CREATE INDEX IF NOT EXISTS idx_users_chat ON users(telegram_chat_id);
+
+CREATE TABLE IF NOT EXISTS topics (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    tone TEXT NOT NULL DEFAULT 'informative',
+    hashtags TEXT NOT NULL DEFAULT '[]',
+    settings TEXT NOT NULL DEFAULT '{}',
+    position INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, name)
+);
+DROP INDEX IF EXISTS idx_topics_name;
+
+CREATE TABLE IF NOT EXISTS topic_subreddits (
+    topic_id BIGINT NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    subreddit TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0
+);
+-- Subreddit names compare case-insensitively, as COLLATE NOCASE does in SQLite.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_topic_subreddits_key
+    ON topic_subreddits(topic_id, lower(subreddit));
+DROP INDEX IF EXISTS idx_topic_subreddits_subreddit;
+
+CREATE TABLE IF NOT EXISTS scraped_posts (
+    id BIGSERIAL PRIMARY KEY,
+    post_id TEXT UNIQUE NOT NULL,
+    subreddit TEXT NOT NULL,
+    author TEXT DEFAULT '',
+    title TEXT NOT NULL,
+    content TEXT NOT NULL DEFAULT '',
+    score INTEGER DEFAULT 0,
+    num_comments INTEGER DEFAULT 0,
+    upvote_ratio DOUBLE PRECISION DEFAULT 0.0,
+    post_url TEXT DEFAULT '',
+    top_comments TEXT DEFAULT '[]',
+    comments_hydrated BOOLEAN DEFAULT FALSE,
+    engagement_score DOUBLE PRECISION DEFAULT 0.0,
+    topic TEXT NOT NULL,
+    created_utc DOUBLE PRECISION,
+    scraped_at TIMESTAMP DEFAULT timezone('utc', now()),
+    search TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(to_tsvector('english', content), 'B')
+        || setweight(to_tsvector('english', coalesce(top_comments, '')), 'C')
+    ) STORED
+);
+CREATE INDEX IF NOT EXISTS idx_scraped_engagement ON scraped_posts(engagement_score DESC);
+CREATE INDEX IF NOT EXISTS idx_scraped_scraped_at ON scraped_posts(scraped_at);
+CREATE INDEX IF NOT EXISTS idx_scraped_search ON scraped_posts USING GIN (search);
+
+CREATE TABLE IF NOT EXISTS post_topics (
+    post_id BIGINT NOT NULL REFERENCES scraped_posts(id) ON DELETE CASCADE,
+    topic TEXT NOT NULL,
+    user_id BIGINT NOT NULL DEFAULT 0,
+    engagement_score DOUBLE PRECISION DEFAULT 0.0,
+    scraped_at TIMESTAMP DEFAULT timezone('utc', now()),
+    PRIMARY KEY (post_id, topic, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_post_topics_fresh
+    ON post_topics(topic, user_id, scraped_at, engagement_score, post_id);
+CREATE INDEX IF NOT EXISTS idx_post_topics_topic_fresh
+    ON post_topics(topic, scraped_at, engagement_score, post_id);
+
+-- user_id 0 marks tweets not tied to a user, so no foreign key here.
+CREATE TABLE IF NOT EXISTS generated_tweets (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL DEFAULT 0,
+    topic TEXT NOT NULL,
+    content TEXT NOT NULL,
+    inspiration_post_ids TEXT DEFAULT '[]',
+    status TEXT DEFAULT 'pending',
+    telegram_message_id BIGINT,
+    telegram_chat_id BIGINT,
+    created_at TIMESTAMP DEFAULT timezone('utc', now()),
+    approved_at TIMESTAMP,
+    posted_at TIMESTAMP,
+    posted_tweet_id TEXT,
+    search TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+);
+CREATE INDEX IF NOT EXISTS idx_generated_status ON generated_tweets(status);
+CREATE INDEX IF NOT EXISTS idx_generated_user_status_created
+    ON generated_tweets(user_id, status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_generated_search ON generated_tweets USING GIN (search);
+
+CREATE TABLE IF NOT EXISTS run_log (
+    id BIGSERIAL PRIMARY KEY,
+    run_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    topics_processed INTEGER DEFAULT 0,
+    tweets_scraped INTEGER DEFAULT 0,
+    tweets_generated INTEGER DEFAULT 0,
+    tweets_posted INTEGER DEFAULT 0,
+    fetches_saved INTEGER DEFAULT 0,
+    posts_refreshed INTEGER DEFAULT 0,
+    error_message TEXT,
+    started_at TIMESTAMP DEFAULT timezone('utc', now()),
+    finished_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tweet_counters (
+    user_id BIGINT NOT NULL,
+    topic TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, topic, status)
+);
+
+CREATE OR REPLACE FUNCTION tweet_counters_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND (OLD.user_id, OLD.topic, OLD.status)
+            IS NOT DISTINCT FROM (NEW.user_id, NEW.topic, NEW.status) THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE tweet_counters SET count = count - 1
+        WHERE user_id = OLD.user_id AND topic = OLD.topic AND status = OLD.status;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO tweet_counters (user_id, topic, status, count)
+        VALUES (NEW.user_id, NEW.topic, NEW.status, 1)
+        ON CONFLICT (user_id, topic, status) DO UPDATE SET count = tweet_counters.count + 1;
+    END IF;
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE TRIGGER trg_tweet_counters
+AFTER INSERT OR DELETE OR UPDATE OF user_id, topic, status ON generated_tweets
+FOR EACH ROW EXECUTE FUNCTION tweet_counters_sync();
+
+-- Same as agent.storage.scoring.decay_factor.
+CREATE OR REPLACE FUNCTION decay(age_hours DOUBLE PRECISION, half_life DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN age_hours IS NULL OR age_hours <= 0 OR half_life <= 0 THEN 1.0
+                ELSE power(0.5, age_hours / half_life) END
+$$;
+"""
+
+# Serializes schema creation when several processes start at once.
+SCHEMA_LOCK = 7351
+
+# Matches ranked per post search, as in the SQLite backend.
+SEARCH_CANDIDATES = 5000
+
+INGEST_COLUMNS = (
+    "ord", "post_id", "subreddit", "author", "title", "content", "score",
+    "num_comments", "upvote_ratio", "post_url", "top_comments",
+    "comments_hydrated", "engagement_score", "topic", "created_utc", "user_id",
+)
+
+# Staging table COPY writes into; dropped when the transaction ends.
+INGEST_TABLE = """
+CREATE TEMP TABLE ingest_posts (
+    ord INTEGER, post_id TEXT, subreddit TEXT, author TEXT, title TEXT,
+    content TEXT, score INTEGER, num_comments INTEGER,
+    upvote_ratio DOUBLE PRECISION, post_url TEXT, top_comments TEXT,
+    comments_hydrated BOOLEAN, engagement_score DOUBLE PRECISION, topic TEXT,
+    created_utc DOUBLE PRECISION, user_id BIGINT
+) ON COMMIT DROP
+"""
+
+POST_COLUMNS = (
+    "id", "post_id", "subreddit", "author", "title", "content", "score",
+    "num_comments", "upvote_ratio", "post_url", "top_comments",
+    "comments_hydrated", "created_utc",
+)
+
+# Mirrors ScrapedPost.compute_engagement_score; {p} prefixes scraped_posts
+# columns. Parameters $1-$4: the three weights, then half_life_hours.
+ENGAGEMENT_SQL = """({p}score * $1::float8 + {p}num_comments * $2::float8
+     + {p}upvote_ratio * $3::float8)
+    * decay(EXTRACT(EPOCH FROM timezone('utc', now()) - COALESCE(
+                timezone('utc', to_timestamp({p}created_utc)), {p}scraped_at)) / 3600.0, $4::float8)"""
+
+USER_COLUMNS = (
+    "email", "password_hash", "reddit_client_id", "reddit_client_secret",
+    "twitter_api_key", "twitter_api_secret", "twitter_access_token",
+    "twitter_access_token_secret", "telegram_chat_id",
+)
+
+
+def ts_query(text: str) -> str:
+    """Turn free text into a to_tsquery string: every word must match and a
+    trailing * keeps prefix search, like fts_query does for FTS5."""
+    terms = []
+    for word in text.split():
+        suffix = ":*" if word.endswith("*") else ""
+        terms.extend(f"'{part}'{suffix}" for part in re.findall(r"\w+", word))
+    return " & ".join(terms)
+
+
+def _count(status: str) -> int:
+    """Row count from a command status such as 'INSERT 0 12' or 'UPDATE 3'."""
+    return int(status.split()[-1])
+
+
+def _age_cutoff(max_age_hours: int) -> datetime:
+    if max_age_hours <= 0:
+        return datetime.min
+    return datetime.utcnow() - timedelta(hours=max_age_hours)
+
+
+def _top_posts_sql(by_user: bool) -> str:
+    user_filter = "AND user_id = ANY($2::bigint[])" if by_user else ""
+    n = 3 if by_user else 2
+    columns = ", ".join(
+        f"CASE WHEN ${n + 2} > 0 THEN left(p.content, ${n + 2}) ELSE p.content END AS content"
+        if name == "content" else f"p.{name}"
+        for name in POST_COLUMNS
+    )
+    return f"""
+SELECT {columns}, m.score AS topic_score, m.linked_at FROM (
+    SELECT post_id, MAX(engagement_score) AS score, MIN(scraped_at) AS linked_at
+    FROM post_topics
+    WHERE topic = $1 {user_filter} AND scraped_at >= ${n}
+    GROUP BY post_id ORDER BY score DESC LIMIT ${n + 1}
+) m JOIN scraped_posts p ON p.id = m.post_id
+ORDER BY m.score DESC
+"""
+
+
+class PostgresDatabase(Storage):
+    """Postgres storage on an asyncpg connection pool, for running several
+    backend processes against one database.
+
+    asyncpg prepares every parameterized query server-side and keeps it in a
+    per-connection cache (statement_cache_size; set it to 0 behind
+    PgBouncer in transaction mode). Post ingestion COPYs each batch into a
+    temporary table and merges it with one INSERT ... SELECT.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        pool_size: int = 10,
+        statement_cache_size: int = 256,
+        user_cache_size: int = 1024,
+        user_cache_ttl: float = 60.0,
+    ):
+        super().__init__(user_cache_size, user_cache_ttl)
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.statement_cache_size = statement_cache_size
+        self._pool: Optional[asyncpg.Pool] = None
+
+    async def init(self):
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=1,
+            max_size=self.pool_size,
+            statement_cache_size=self.statement_cache_size,
+        )
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", SCHEMA_LOCK)
+            await conn.execute(SCHEMA)
+        self.fts_enabled = True
+        logger.info(f"Database initialized on Postgres (pool of {self.pool_size})")
+
+    async def close(self):
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+
+    # --- Users ---
+
+    async def add_user(self, user: User) -> int:
+        values = [getattr(user, column) for column in USER_COLUMNS]
+        placeholders = ", ".join(f"${i}" for i in range(1, len(values) + 1))
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in USER_COLUMNS if c != "email")
+        async with self._pool.acquire() as conn, conn.transaction():
+            user_id = await conn.fetchval(
+                f"""INSERT INTO users ({', '.join(USER_COLUMNS)}) VALUES ({placeholders})
+                    ON CONFLICT (email) DO UPDATE SET {updates} RETURNING id""",
+                *values,
+            )
+            await self._write_topics(conn, user_id, user.topics)
+        self.user_cache.invalidate(user_id)
+        return user_id
+
+    async def _fetch_user(self, column: str, value) -> Optional[User]:
+        async with self._pool.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT * FROM users WHERE {column} = $1", value)
+            if not row:
+                return None
+            return (await self._with_topics(conn, [self._row_to_user(row)]))[0]
+
+    async def update_user_credentials(self, user_id: int, **kwargs):
+        allowed = [
+            "reddit_client_id", "reddit_client_secret",
+            "twitter_api_key", "twitter_api_secret",
+            "twitter_access_token", "twitter_access_token_secret",
+            "telegram_chat_id",
+        ]
+        keys = [key for key in allowed if key in kwargs]
+        if not keys:
+            return
+        sets = ", ".join(f"{key} = ${i}" for i, key in enumerate(keys, 2))
+        await self._pool.execute(
+            f"UPDATE users SET {sets} WHERE id = $1", user_id, *(kwargs[k] for k in keys)
+        )
+        self.user_cache.invalidate(user_id)
+
+    async def get_active_users(self) -> List[User]:
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch("SELECT * FROM users WHERE active ORDER BY id")
+            return await self._with_topics(conn, [self._row_to_user(row) for row in rows])
+
+    # --- Topics ---
+
+    async def _with_topics(self, conn: asyncpg.Connection, users: List[User]) -> List[User]:
+        by_id = {user.id: user for user in users}
+        if not by_id:
+            return users
+        topics = {}
+        for row in await conn.fetch(
+            "SELECT * FROM topics WHERE user_id = ANY($1::bigint[]) ORDER BY user_id, position",
+            list(by_id),
+        ):
+            topic = self._row_to_topic(row)
+            topics[row["id"]] = topic
+            by_id[row["user_id"]].topics.append(topic)
+        if topics:
+            for row in await conn.fetch(
+                """SELECT topic_id, subreddit FROM topic_subreddits
+                   WHERE topic_id = ANY($1::bigint[]) ORDER BY topic_id, position""",
+                list(topics),
+            ):
+                topics[row["topic_id"]]["subreddits"].append(row["subreddit"])
+        return users
+
+    async def _write_topics(self, conn: asyncpg.Connection, user_id: int, topics: list):
+        await conn.execute("DELETE FROM topics WHERE user_id = $1", user_id)
+        for position, topic in enumerate(topics):
+            await self._insert_topic(conn, user_id, topic, position)
+
+    async def _insert_topic(self, conn: asyncpg.Connection, user_id: int, topic, position=None) -> bool:
+        """Insert a topic at position (default: last). False if the name is taken."""
+        topic_id = await conn.fetchval(
+            """INSERT INTO topics (user_id, name, tone, hashtags, settings, position)
+               VALUES ($1, $2, $3, $4, $5, COALESCE($6,
+                   (SELECT COALESCE(MAX(position) + 1, 0) FROM topics WHERE user_id = $1)))
+               ON CONFLICT (user_id, name) DO NOTHING RETURNING id""",
+            user_id, *self._topic_columns(topic), position,
+        )
+        if topic_id is None:
+            return False
+        subreddits = topic.get("subreddits", []) if isinstance(topic, dict) else []
+        await conn.executemany(
+            """INSERT INTO topic_subreddits (topic_id, subreddit, position)
+               VALUES ($1, $2, $3) ON CONFLICT DO NOTHING""",
+            [(topic_id, sub, i) for i, sub in enumerate(subreddits)],
+        )
+        return True
+
+    async def set_user_topics(self, user_id: int, topics: list):
+        async with self._pool.acquire() as conn, conn.transaction():
+            await self._write_topics(conn, user_id, topics)
+        self.user_cache.invalidate(user_id)
+
+    async def add_topic(self, user_id: int, topic: dict) -> bool:
+        async with self._pool.acquire() as conn, conn.transaction():
+            added = await self._insert_topic(conn, user_id, topic)
+        self.user_cache.invalidate(user_id)
+        return added
+
+    async def remove_topic(self, user_id: int, name: str) -> bool:
+        status = await self._pool.execute(
+            "DELETE FROM topics WHERE user_id = $1 AND name = $2", user_id, name
+        )
+        self.user_cache.invalidate(user_id)
+        return _count(status) > 0
+
+    # --- Scraped Posts ---
+
+    async def _stage(self, conn: asyncpg.Connection, posts: List[ScrapedPost]):
+        """COPY posts into the ingest_posts temp table of this transaction."""
+        await conn.execute(INGEST_TABLE)
+        await conn.copy_records_to_table(
+            "ingest_posts",
+            columns=INGEST_COLUMNS,
+            records=[
+                (i, post.post_id, post.subreddit, post.author, post.title,
+                 post.content, post.score, post.num_comments, post.upvote_ratio,
+                 post.post_url, post.top_comments_json, post.comments_hydrated,
+                 post.engagement_score, post.topic, post.created_utc or None,
+                 post.user_id)
+                for i, post in enumerate(posts)
+            ],
+        )
+
+    @staticmethod
+    async def _write_links(conn: asyncpg.Connection, refresh: bool) -> int:
+        conflict = (
+            """DO UPDATE SET engagement_score = EXCLUDED.engagement_score,
+                             scraped_at = timezone('utc', now())"""
+            if refresh else "DO NOTHING"
+        )
+        status = await conn.execute(
+            f"""INSERT INTO post_topics (post_id, topic, user_id, engagement_score)
+                SELECT DISTINCT ON (sp.id, i.topic, i.user_id)
+                       sp.id, i.topic, i.user_id, i.engagement_score
+                FROM ingest_posts i JOIN scraped_posts sp ON sp.post_id = i.post_id
+                ORDER BY sp.id, i.topic, i.user_id, i.ord DESC
+                ON CONFLICT (post_id, topic, user_id) {conflict}"""
+        )
+        return _count(status)
+
+    async def save_scraped_posts(self, posts: List[ScrapedPost], upsert: bool = False) -> IngestResult:
+        """COPY the batch into a staging table, then merge it into the pool
+        and post_topics in the same transaction. Counts come from RETURNING,
+        so they are exact even with concurrent writers."""
+        if not posts:
+            return IngestResult()
+        conflict = "DO NOTHING"
+        if upsert:
+            conflict = """DO UPDATE SET
+                 score = EXCLUDED.score,
+                 num_comments = EXCLUDED.num_comments,
+                 upvote_ratio = EXCLUDED.upvote_ratio,
+                 top_comments = CASE WHEN EXCLUDED.comments_hydrated
+                                     THEN EXCLUDED.top_comments
+                                     ELSE sp.top_comments END,
+                 comments_hydrated = sp.comments_hydrated OR EXCLUDED.comments_hydrated,
+                 engagement_score = EXCLUDED.engagement_score,
+                 created_utc = COALESCE(sp.created_utc, EXCLUDED.created_utc)"""
+        try:
+            async with self._pool.acquire() as conn, conn.transaction():
+                await self._stage(conn, posts)
+                # A post fanned out to several topics is merged once, as
+                # first seen; ON CONFLICT may touch each row only once.
+                rows = await conn.fetch(
+                    f"""INSERT INTO scraped_posts AS sp
+                          (post_id, subreddit, author, title, content, score,
+                           num_comments, upvote_ratio, post_url, top_comments,
+                           comments_hydrated, engagement_score, topic, created_utc)
+                        SELECT DISTINCT ON (post_id)
+                               post_id, subreddit, author, title, content, score,
+                               num_comments, upvote_ratio, post_url, top_comments,
+                               comments_hydrated, engagement_score, topic, created_utc
+                        FROM ingest_posts ORDER BY post_id, ord
+                        ON CONFLICT (post_id) {conflict}
+                        RETURNING xmax = 0 AS inserted"""
+                )
+                await self._write_links(conn, refresh=upsert)
+        except Exception as e:
+            logger.error(f"Failed to save {len(posts)} posts: {e}")
+            raise
+        inserted = sum(1 for row in rows if row["inserted"])
+        return IngestResult(inserted=inserted, updated=len(rows) - inserted)
+
+    async def link_posts(self, posts: List[ScrapedPost]) -> int:
+        if not posts:
+            return 0
+        async with self._pool.acquire() as conn, conn.transaction():
+            await self._stage(conn, posts)
+            return await self._write_links(conn, refresh=False)
+
+    async def get_known_post_scores(self, post_ids: List[str]) -> Dict[str, int]:
+        rows = await self._pool.fetch(
+            "SELECT post_id, score FROM scraped_posts WHERE post_id = ANY($1::text[])",
+            post_ids,
+        )
+        return {row["post_id"]: row["score"] for row in rows}
+
+    async def get_post_ids_for_refresh(self, max_age_hours: int = 48, limit: int = 5000) -> List[str]:
+        rows = await self._pool.fetch(
+            """SELECT post_id FROM scraped_posts
+               WHERE scraped_at >= timezone('utc', now()) - make_interval(hours => $1)
+               ORDER BY scraped_at DESC LIMIT $2""",
+            int(max_age_hours), limit,
+        )
+        return [row["post_id"] for row in rows]
+
+    async def update_post_stats(self, stats: List[dict]) -> int:
+        """Apply refreshed stats in one UPDATE joined to the unnested arrays."""
+        if not stats:
+            return 0
+        status = await self._pool.execute(
+            """UPDATE scraped_posts sp SET
+                 score = f.score,
+                 num_comments = f.num_comments,
+                 upvote_ratio = f.upvote_ratio
+               FROM unnest($1::text[], $2::int[], $3::int[], $4::float8[])
+                    AS f(post_id, score, num_comments, upvote_ratio)
+               WHERE sp.post_id = f.post_id""",
+            [s["post_id"] for s in stats],
+            [s["score"] for s in stats],
+            [s["num_comments"] for s in stats],
+            [s["upvote_ratio"] for s in stats],
+        )
+        return _count(status)
+
+    async def rescore_posts(
+        self,
+        profiles: Dict[ProfileKey, ScoringProfile],
+        default: ScoringProfile = DEFAULT_PROFILE,
+    ) -> int:
+        groups: Dict[ScoringProfile, List[ProfileKey]] = {}
+        for key, profile in profiles.items():
+            groups.setdefault(profile, []).append(key)
+        others = [key for keys in groups.values() for key in keys]
+        statements = [(profile, "IN", keys) for profile, keys in groups.items()]
+        statements.append((default, "NOT IN", others))
+
+        def weights(profile: ScoringProfile):
+            return (profile.score_weight, profile.comments_weight,
+                    profile.ratio_weight, profile.half_life_hours)
+
+        rescored = 0
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                f"UPDATE scraped_posts SET engagement_score = {ENGAGEMENT_SQL.format(p='')}",
+                *weights(default),
+            )
+            for profile, match, keys in statements:
+                status = await conn.execute(
+                    f"""UPDATE post_topics SET engagement_score = {ENGAGEMENT_SQL.format(p='p.')}
+                        FROM scraped_posts p
+                        WHERE p.id = post_topics.post_id
+                          AND (post_topics.user_id, post_topics.topic) {match}
+                              (SELECT * FROM unnest($5::bigint[], $6::text[]))""",
+                    *weights(profile), [key[0] for key in keys], [key[1] for key in keys],
+                )
+                rescored += _count(status)
+        return rescored
+
+    async def update_post_comments(self, posts: List[ScrapedPost]):
+        await self._pool.executemany(
+            "UPDATE scraped_posts SET top_comments = $1, comments_hydrated = TRUE WHERE post_id = $2",
+            [(post.top_comments_json, post.post_id) for post in posts],
+        )
+
+    async def get_top_posts(
+        self,
+        topic: str,
+        limit: int = 20,
+        max_age_hours: int = 0,
+        user_id: Optional[int] = None,
+        body_chars: int = 0,
+    ) -> List[ScrapedPost]:
+        params = (topic, [user_id, 0]) if user_id is not None else (topic,)
+        rows = await self._pool.fetch(
+            _top_posts_sql(user_id is not None),
+            *params, _age_cutoff(max_age_hours), limit, body_chars,
+        )
+        return [self._row_to_top_post(row, topic) for row in rows]
+
+    # --- Generated Tweets ---
+
+    async def save_generated_tweet(self, tweet: GeneratedTweet) -> int:
+        return await self._pool.fetchval(
+            """INSERT INTO generated_tweets
+               (user_id, topic, content, inspiration_post_ids, status,
+                telegram_message_id, telegram_chat_id)
+               VALUES ($1, $2, $3, $4, $5, $6, $7) RETURNING id""",
+            tweet.user_id, tweet.topic, tweet.content,
+            tweet.inspiration_ids_json, tweet.status,
+            tweet.telegram_message_id, tweet.telegram_chat_id,
+        )
+
+    async def get_pending_tweets(self, user_id: Optional[int] = None) -> List[GeneratedTweet]:
+        if user_id:
+            rows = await self._pool.fetch(
+                """SELECT * FROM generated_tweets WHERE status = 'pending' AND user_id = $1
+                   ORDER BY created_at, id""",
+                user_id,
+            )
+        else:
+            rows = await self._pool.fetch(
+                "SELECT * FROM generated_tweets WHERE status = 'pending' ORDER BY created_at, id"
+            )
+        return [self._row_to_generated_tweet(row) for row in rows]
+
+    async def update_tweet_status(self, tweet_id: int, status: str, **kwargs):
+        values = {"status": status}
+        if status == "approved":
+            values["approved_at"] = datetime.utcnow()
+        if status == "posted":
+            values["posted_at"] = datetime.utcnow()
+        for key in ("posted_tweet_id", "telegram_message_id", "content"):
+            if key in kwargs:
+                values[key] = kwargs[key]
+        sets = ", ".join(f"{key} = ${i}" for i, key in enumerate(values, 2))
+        await self._pool.execute(
+            f"UPDATE generated_tweets SET {sets} WHERE id = $1", tweet_id, *values.values()
+        )
+
+    async def get_generated_tweet_by_id(self, tweet_id: int) -> Optional[GeneratedTweet]:
+        row = await self._pool.fetchrow("SELECT * FROM generated_tweets WHERE id = $1", tweet_id)
+        return self._row_to_generated_tweet(row) if row else None
+
+    async def get_tweets_page(
+        self,
+        user_id: int,
+        statuses: Sequence[str],
+        limit: int = 50,
+        topic: Optional[str] = None,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> List[GeneratedTweet]:
+        """Newest-first keyset page, one index range per status as in SQLite."""
+        sql = "SELECT * FROM generated_tweets WHERE user_id = $1 AND status = $2"
+        extra: list = []
+        if topic is not None:
+            extra.append(topic)
+            sql += f" AND topic = ${len(extra) + 2}"
+        if before is not None:
+            extra.extend((datetime.fromisoformat(before[0]), before[1]))
+            sql += f" AND (created_at, id) < (${len(extra) + 1}, ${len(extra) + 2})"
+        sql += f" ORDER BY created_at DESC, id DESC LIMIT ${len(extra) + 3}"
+
+        rows = []
+        async with self._pool.acquire() as conn:
+            statement = await conn.prepare(sql)
+            for status in dict.fromkeys(statuses):
+                rows.extend(await statement.fetch(user_id, status, *extra, limit))
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        return [self._row_to_generated_tweet(row) for row in rows[:limit]]
+
+    async def get_dashboard_stats(self, user_id: int) -> dict:
+        rows = await self._pool.fetch(
+            "SELECT topic, status, count FROM tweet_counters WHERE user_id = $1 AND count > 0",
+            user_id,
+        )
+        return self._stats_from_counters(rows)
+
+    async def rebuild_tweet_counters(self) -> int:
+        async with self._pool.acquire() as conn, conn.transaction():
+            await conn.execute("LOCK TABLE generated_tweets IN SHARE MODE")
+            await conn.execute("DELETE FROM tweet_counters")
+            status = await conn.execute(
+                """INSERT INTO tweet_counters (user_id, topic, status, count)
+                   SELECT user_id, topic, status, COUNT(*) FROM generated_tweets
+                   GROUP BY user_id, topic, status"""
+            )
+        rows = _count(status)
+        logger.info(f"Rebuilt tweet counters ({rows} rows)")
+        return rows
+
+    # --- Search ---
+
+    async def search_posts(
+        self,
+        text: str,
+        limit: int = 20,
+        offset: int = 0,
+        topic: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> List[dict]:
+        """Posts matching text, best match first (title > body > comments).
+        relevance is a negated ts_rank so, as with bm25, lower is better.
+        topic filters on post_topics links, as in Database.search_posts."""
+        query = ts_query(text)
+        if not query:
+            return []
+        topic_filter = ""
+        if topic is not None:
+            user_filter = "AND pt.user_id IN ($6, 0)" if user_id is not None else ""
+            topic_filter = f"""WHERE EXISTS (SELECT 1 FROM post_topics pt
+                                     WHERE pt.post_id = p.id AND pt.topic = $5 {user_filter})"""
+        rows = await self._pool.fetch(
+            f"""WITH q AS (SELECT to_tsquery('english', $1) AS q),
+                page AS (
+                    SELECT p.id, p.post_id, p.subreddit, p.title, p.topic, p.score,
+                           p.post_url, p.scraped_at, c.relevance
+                    FROM (SELECT sp.id, -ts_rank(sp.search, q.q) AS relevance
+                          FROM scraped_posts sp, q WHERE sp.search @@ q.q
+                          ORDER BY sp.id DESC LIMIT $2) c
+                    JOIN scraped_posts p ON p.id = c.id
+                    {topic_filter}
+                    ORDER BY c.relevance LIMIT $3 OFFSET $4
+                )
+                SELECT page.*, ts_headline('english', p.title || ' ' || p.content, q.q,
+                           'StartSel=[, StopSel=], MaxWords=16, MinWords=8') AS snippet
+                FROM page JOIN scraped_posts p ON p.id = page.id, q
+                ORDER BY page.relevance""",
+            query, SEARCH_CANDIDATES, limit, offset,
+            *([topic] if topic is not None else []),
+            *([user_id] if topic is not None and user_id is not None else []),
+        )
+        return [dict(row) for row in rows]
+
+    async def search_tweets(
+        self, user_id: int, text: str, limit: int = 20, offset: int = 0
+    ) -> List[dict]:
+        query = ts_query(text)
+        if not query:
+            return []
+        rows = await self._pool.fetch(
+            """WITH q AS (SELECT to_tsquery('english', $1) AS q)
+               SELECT t.id, t.topic, t.content, t.status, t.created_at,
+                      ts_headline('english', t.content, q.q,
+                                  'StartSel=[, StopSel=], MaxWords=16, MinWords=8') AS snippet,
+                      -ts_rank(t.search, q.q) AS relevance
+               FROM generated_tweets t, q
+               WHERE t.search @@ q.q AND t.user_id = $2
+               ORDER BY relevance LIMIT $3 OFFSET $4""",
+            query, user_id, limit, offset,
+        )
+        return [dict(row) for row in rows]
+
+    # --- Retention ---
+
+    async def get_expired_rows(self, table: str, max_age_days: int, limit: int = 1000) -> List[dict]:
+        """As Database.get_expired_rows: a post is as old as its newest
+        post_topics link, and is returned with its links."""
+        if table == "scraped_posts":
+            column = "scraped_at"
+            keep = """NOT EXISTS (
+                SELECT 1 FROM post_topics pt
+                WHERE pt.post_id = scraped_posts.id
+                  AND pt.scraped_at >= timezone('utc', now()) - make_interval(days => $1))
+                AND id NOT IN (
+                SELECT value::bigint FROM generated_tweets,
+                       jsonb_array_elements_text(inspiration_post_ids::jsonb) AS value)"""
+        elif table == "run_log":
+            column, keep = "started_at", "TRUE"
+        else:
+            raise ValueError(f"No retention policy for table {table}")
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT * FROM {table}
+                    WHERE {column} < timezone('utc', now()) - make_interval(days => $1) AND {keep}
+                    ORDER BY {column} LIMIT $2""",
+                int(max_age_days), limit,
+            )
+            rows = [{k: v for k, v in row.items() if k != "search"} for row in rows]
+            if table == "scraped_posts" and rows:
+                links = {row["id"]: [] for row in rows}
+                for link in await conn.fetch(
+                    """SELECT post_id, topic, user_id, engagement_score, scraped_at
+                       FROM post_topics WHERE post_id = ANY($1::bigint[])""",
+                    list(links),
+                ):
+                    link = dict(link)
+                    links[link.pop("post_id")].append(link)
+                for row in rows:
+                    row["links"] = links[row["id"]]
+        return rows
+
+    async def delete_rows(self, table: str, ids: List[int]) -> int:
+        if table not in ("scraped_posts", "run_log"):
+            raise ValueError(f"No retention policy for table {table}")
+        status = await self._pool.execute(
+            f"DELETE FROM {table} WHERE id = ANY($1::bigint[])", ids
+        )
+        return _count(status)
+
+    async def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Autovacuum makes deleted rows' space reusable on Postgres, so there
+        is nothing to release here."""
+        return 0
+
+    # --- Run Log ---
+
+    async def log_run(self, run_type: str, status: str, **stats):
+        await self._pool.execute(
+            """INSERT INTO run_log
+               (run_type, status, topics_processed, tweets_scraped,
+                tweets_generated, tweets_posted, fetches_saved,
+                posts_refreshed, error_message, finished_at)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)""",
+            run_type, status,
+            stats.get("topics_processed", 0),
+            stats.get("tweets_scraped", 0),
+            stats.get("tweets_generated", 0),
+            stats.get("tweets_posted", 0),
+            stats.get("fetches_saved", 0),
+            stats.get("posts_refreshed", 0),
+            stats.get("error_message"),
+            datetime.utcnow(),
+        )
@@ -0,0 +1,68 @@
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from agent.storage.base import Storage
+from agent.utils.config import RetentionConfig
+
+logger = logging.getLogger("twitter_agent")
+
+
+class RetentionManager:
+    """Archives aged rows to gzip NDJSON, deletes them, then vacuums.
+
+    Each table is processed in batches: a batch is appended to that run's
+    archive file before it is deleted, so an interrupted run never loses
+    rows (at worst a batch is archived twice).
+    """
+
+    def __init__(self, db: Storage, config: RetentionConfig):
+        self.db = db
+        self.config = config
+
+    def policies(self) -> Dict[str, int]:
+        return {
+            table: days
+            for table, days in (
+                ("scraped_posts", self.config.scraped_posts_days),
+                ("run_log", self.config.run_log_days),
+            )
+            if days > 0
+        }
+
+    async def run(self) -> dict:
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        pruned = {}
+        await self.db.begin_retention()
+        for table, days in self.policies().items():
+            pruned[table] = await self._prune(table, days, stamp)
+
+        pages = await self.db.incremental_vacuum(self.config.vacuum_pages)
+        logger.info(f"Retention complete: pruned {pruned}, released {pages} pages")
+        return {"pruned": pruned, "pages_released": pages}
+
+    async def _prune(self, table: str, days: int, stamp: str) -> int:
+        archive = Path(self.config.archive_dir) / f"{table}-{stamp}.ndjson.gz"
+        total = 0
+        while True:
+            rows = await self.db.get_expired_rows(table, days, self.config.batch_size)
+            if not rows:
+                break
+            if self.config.archive:
+                await asyncio.to_thread(self._append, archive, rows)
+            total += await self.db.delete_rows(table, [row["id"] for row in rows])
+        if total:
+            where = f" (archived to {archive})" if self.config.archive else ""
+            logger.info(f"Pruned {total} {table} rows older than {days} days{where}")
+        return total
+
+    @staticmethod
+    def _append(path: Path, rows: List[dict]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
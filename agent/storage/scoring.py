@@ -0,0 +1,58 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, Optional, Tuple
+
+# (user_id, topic name); user_id 0 is the config file's topics and the
+# shared links that count for every follower of a topic.
+ProfileKey = Tuple[int, str]
+
+
+@dataclass(frozen=True)
+class ScoringProfile:
+    """Engagement weights plus hot-style time decay for one topic.
+
+    engagement = (score*w_s + comments*w_c + upvote_ratio*w_r) * 0.5 ** (age / half_life)
+    A half_life_hours of 0 disables decay.
+    """
+    score_weight: float = 1.0
+    comments_weight: float = 2.0
+    ratio_weight: float = 100.0
+    half_life_hours: float = 24.0
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "ScoringProfile":
+        if not data:
+            return DEFAULT_PROFILE
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: float(v) for k, v in data.items() if k in names})
+
+    def base(self, score: float, num_comments: float, upvote_ratio: float) -> float:
+        return (
+            score * self.score_weight
+            + num_comments * self.comments_weight
+            + upvote_ratio * self.ratio_weight
+        )
+
+    def decay(self, age_hours: float) -> float:
+        return decay_factor(age_hours, self.half_life_hours)
+
+
+DEFAULT_PROFILE = ScoringProfile()
+
+
+def decay_factor(age_hours: Optional[float], half_life_hours: float) -> float:
+    """Fraction of engagement kept after age_hours. Registered as the SQLite
+    function ``decay`` so stored posts can be rescored in one statement."""
+    if not age_hours or age_hours <= 0 or half_life_hours <= 0:
+        return 1.0
+    return 0.5 ** (age_hours / half_life_hours)
+
+
+def profiles_for_topics(topics: Iterable[dict], user_id: int = 0) -> Dict[ProfileKey, ScoringProfile]:
+    """Map (user_id, topic name) -> profile for topic dicts carrying a
+    "scoring" block. Keyed like post_topics links, so users following
+    topics of the same name each keep their own weights."""
+    return {
+        (user_id, topic["name"]): ScoringProfile.from_dict(topic["scoring"])
+        for topic in topics
+        if isinstance(topic, dict) and topic.get("scoring")
+    }
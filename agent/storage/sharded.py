@@ -0,0 +1,256 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from agent.storage.base import Storage
+from agent.storage.database import Database
+from agent.storage.models import GeneratedTweet, IngestResult, ScrapedPost, User
+from agent.storage.scoring import DEFAULT_PROFILE, ProfileKey, ScoringProfile
+
+logger = logging.getLogger("twitter_agent")
+
+# Shard n numbers its generated tweets from (n + 1) * SHARD_ID_SPAN, so a
+# tweet id names its shard. Ids below the span predate sharding.
+SHARD_ID_SPAN = 10 ** 12
+# Keeps the largest tweet id below 2**53, the integers JavaScript holds exactly.
+MAX_SHARDS = 8000
+
+
+def shard_paths(path: str, shards: int) -> List[Path]:
+    """Shard files of the catalog at path: data/agent.db -> data/shards/agent-00.db..."""
+    catalog = Path(path)
+    return [
+        catalog.parent / "shards" / f"{catalog.stem}-{n:02d}{catalog.suffix}"
+        for n in range(shards)
+    ]
+
+
+class ShardedDatabase(Storage):
+    """SQLite split into a catalog file and per-tenant shard files.
+
+    The catalog is the regular database file and keeps everything shared:
+    users and credentials, topics, the scraped post pool and the run log.
+    Generated tweets, their counters and search index live in shard files,
+    user_id % shards picking the file; shards hold no other tables. Each shard has its own writer, so
+    generation and approvals for users on different shards never wait on
+    one another or on a scrape writing the post pool.
+
+    The shard count is fixed once shard files exist. Tweets already in the
+    catalog are moved to their shards on init, keeping their ids.
+    """
+
+    def __init__(self, path: str = "./data/agent.db", shards: int = 4, **options):
+        if not 0 < shards <= MAX_SHARDS:
+            raise ValueError(f"Shard count must be between 1 and {MAX_SHARDS}, got {shards}")
+        if path == ":memory:":
+            raise ValueError("A sharded database needs a file path")
+        super().__init__(0)
+        self.path = path
+        self.catalog = Database(path, **options)
+        # One cache for the catalog's user writes and this class's reads.
+        self.user_cache = self.catalog.user_cache
+        shard_options = {k: v for k, v in options.items() if not k.startswith("user_cache")}
+        self.shards = [
+            Database(str(shard_path), user_cache_size=0, tweets_only=True,
+                     tweet_id_base=(n + 1) * SHARD_ID_SPAN, **shard_options)
+            for n, shard_path in enumerate(shard_paths(path, shards))
+        ]
+        self._retention_begun = False
+
+    def shard_for_user(self, user_id: int) -> Database:
+        return self.shards[user_id % len(self.shards)]
+
+    def write_group(self, user_id: int) -> int:
+        return user_id % len(self.shards)
+
+    async def _shard_for_tweet(self, tweet_id: int) -> Optional[Database]:
+        """The shard holding tweet_id; pre-sharding ids are looked up in each."""
+        n = tweet_id // SHARD_ID_SPAN - 1
+        if 0 <= n < len(self.shards):
+            return self.shards[n]
+        for shard in self.shards:
+            if await shard.get_generated_tweet_by_id(tweet_id):
+                return shard
+        return None
+
+    async def init(self):
+        catalog = Path(self.path)
+        existing = list((catalog.parent / "shards").glob(f"{catalog.stem}-*{catalog.suffix}"))
+        if existing and len(existing) != len(self.shards):
+            raise ValueError(
+                f"{self.path} is split into {len(existing)} shards; "
+                f"set the shard count to {len(existing)}"
+            )
+        await self.catalog.init()
+        for shard in self.shards:
+            await shard.init()
+        self.fts_enabled = self.catalog.fts_enabled
+        await self._move_catalog_tweets()
+        logger.info(f"Sharded database initialized: catalog {self.path}, {len(self.shards)} shards")
+
+    async def _move_catalog_tweets(self):
+        """Move tweets written before sharding from the catalog to their shards."""
+        moved = 0
+        for n, shard in enumerate(self.shards):
+            moved += await shard.import_tweets(self.catalog.db_path, n, len(self.shards))
+        if await self.catalog.clear_tweets():
+            logger.info(f"Moved {moved} generated tweets from the catalog to their shards")
+
+    def database_files(self) -> List[str]:
+        return [file for db in (self.catalog, *self.shards) for file in db.database_files()]
+
+    async def flush(self):
+        await asyncio.gather(self.catalog.flush(), *(shard.flush() for shard in self.shards))
+
+    async def close(self):
+        for db in (self.catalog, *self.shards):
+            await db.close()
+
+    # --- Users and topics (catalog) ---
+
+    async def add_user(self, user: User) -> int:
+        return await self.catalog.add_user(user)
+
+    async def _fetch_user(self, column: str, value) -> Optional[User]:
+        return await self.catalog._fetch_user(column, value)
+
+    async def update_user_credentials(self, user_id: int, **kwargs):
+        await self.catalog.update_user_credentials(user_id, **kwargs)
+
+    async def get_active_users(self) -> List[User]:
+        return await self.catalog.get_active_users()
+
+    async def set_user_topics(self, user_id: int, topics: list):
+        await self.catalog.set_user_topics(user_id, topics)
+
+    async def add_topic(self, user_id: int, topic: dict) -> bool:
+        return await self.catalog.add_topic(user_id, topic)
+
+    async def remove_topic(self, user_id: int, name: str) -> bool:
+        return await self.catalog.remove_topic(user_id, name)
+
+    # --- Scraped Posts (catalog) ---
+
+    async def save_scraped_posts(self, posts: List[ScrapedPost], upsert: bool = False) -> IngestResult:
+        return await self.catalog.save_scraped_posts(posts, upsert)
+
+    async def link_posts(self, posts: List[ScrapedPost]) -> int:
+        return await self.catalog.link_posts(posts)
+
+    async def get_known_post_scores(self, post_ids: List[str]) -> Dict[str, int]:
+        return await self.catalog.get_known_post_scores(post_ids)
+
+    async def get_post_ids_for_refresh(self, max_age_hours: int = 48, limit: int = 5000) -> List[str]:
+        return await self.catalog.get_post_ids_for_refresh(max_age_hours, limit)
+
+    async def update_post_stats(self, stats: List[dict]) -> int:
+        return await self.catalog.update_post_stats(stats)
+
+    async def rescore_posts(
+        self,
+        profiles: Dict[ProfileKey, ScoringProfile],
+        default: ScoringProfile = DEFAULT_PROFILE,
+    ) -> int:
+        return await self.catalog.rescore_posts(profiles, default)
+
+    async def update_post_comments(self, posts: List[ScrapedPost]):
+        await self.catalog.update_post_comments(posts)
+
+    async def get_top_posts(
+        self,
+        topic: str,
+        limit: int = 20,
+        max_age_hours: int = 0,
+        user_id: Optional[int] = None,
+        body_chars: int = 0,
+    ) -> List[ScrapedPost]:
+        return await self.catalog.get_top_posts(topic, limit, max_age_hours, user_id, body_chars)
+
+    # --- Generated Tweets (shards) ---
+
+    async def save_generated_tweet(self, tweet: GeneratedTweet) -> int:
+        return await self.shard_for_user(tweet.user_id).save_generated_tweet(tweet)
+
+    async def get_pending_tweets(self, user_id: Optional[int] = None) -> List[GeneratedTweet]:
+        if user_id:
+            return await self.shard_for_user(user_id).get_pending_tweets(user_id)
+        pages = await asyncio.gather(*(shard.get_pending_tweets() for shard in self.shards))
+        return sorted(
+            (tweet for page in pages for tweet in page),
+            key=lambda tweet: (tweet.created_at, tweet.id),
+        )
+
+    async def update_tweet_status(self, tweet_id: int, status: str, **kwargs):
+        shard = await self._shard_for_tweet(tweet_id)
+        if shard is not None:
+            await shard.update_tweet_status(tweet_id, status, **kwargs)
+
+    async def get_generated_tweet_by_id(self, tweet_id: int) -> Optional[GeneratedTweet]:
+        shard = await self._shard_for_tweet(tweet_id)
+        return await shard.get_generated_tweet_by_id(tweet_id) if shard else None
+
+    async def get_tweets_page(
+        self,
+        user_id: int,
+        statuses: Sequence[str],
+        limit: int = 50,
+        topic: Optional[str] = None,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> List[GeneratedTweet]:
+        return await self.shard_for_user(user_id).get_tweets_page(
+            user_id, statuses, limit, topic, before
+        )
+
+    async def get_dashboard_stats(self, user_id: int) -> dict:
+        return await self.shard_for_user(user_id).get_dashboard_stats(user_id)
+
+    async def rebuild_tweet_counters(self) -> int:
+        return sum(await asyncio.gather(*(shard.rebuild_tweet_counters() for shard in self.shards)))
+
+    # --- Search ---
+
+    async def search_posts(
+        self,
+        text: str,
+        limit: int = 20,
+        offset: int = 0,
+        topic: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> List[dict]:
+        return await self.catalog.search_posts(text, limit, offset, topic, user_id)
+
+    async def search_tweets(
+        self, user_id: int, text: str, limit: int = 20, offset: int = 0
+    ) -> List[dict]:
+        return await self.shard_for_user(user_id).search_tweets(user_id, text, limit, offset)
+
+    # --- Retention ---
+
+    async def begin_retention(self):
+        """Hand the catalog the posts pinned by tweets, which live in the
+        shards; read once per run rather than for every batch."""
+        kept = set()
+        for ids in await asyncio.gather(*(s.get_inspiration_post_ids() for s in self.shards)):
+            kept |= ids
+        await self.catalog.keep_posts(kept)
+        self._retention_begun = True
+
+    async def get_expired_rows(self, table: str, max_age_days: int, limit: int = 1000) -> List[dict]:
+        if table == "scraped_posts" and not self._retention_begun:
+            await self.begin_retention()
+        return await self.catalog.get_expired_rows(table, max_age_days, limit)
+
+    async def delete_rows(self, table: str, ids: List[int]) -> int:
+        return await self.catalog.delete_rows(table, ids)
+
+    async def incremental_vacuum(self, max_pages: int = 0) -> int:
+        pages = 0
+        for db in (self.catalog, *self.shards):
+            pages += await db.incremental_vacuum(max_pages)
+        return pages
+
+    # --- Run Log ---
+
+    async def log_run(self, run_type: str, status: str, **stats):
+        await self.catalog.log_run(run_type, status, **stats)
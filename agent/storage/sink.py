@@ -0,0 +1,67 @@
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from agent.storage.base import Storage
+from agent.storage.models import IngestResult, ScrapedPost
+
+logger = logging.getLogger("twitter_agent")
+
+
+class PostSink:
+    """Micro-batches streamed posts into the database.
+
+    Posts are written every batch_size posts or flush_interval seconds,
+    whichever comes first, so a long scrape persists as it goes instead of
+    holding every post until the end. on_progress is awaited after every
+    post with the sink itself, exposing received and saved counts
+    (result breaks saved down into inserted and updated rows).
+    """
+
+    def __init__(
+        self,
+        db: Storage,
+        batch_size: int = 25,
+        flush_interval: float = 1.0,
+        upsert: bool = True,
+        on_progress: Optional[Callable[["PostSink"], Awaitable[None]]] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.upsert = upsert
+        self.on_progress = on_progress
+        self.received = 0
+        self.result = IngestResult()
+        self._buffer: List[ScrapedPost] = []
+        self._last_flush = time.monotonic()
+
+    async def add(self, post: ScrapedPost):
+        self._buffer.append(post)
+        self.received += 1
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+        if self.on_progress:
+            await self.on_progress(self)
+
+    async def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self.result += await self.db.save_scraped_posts(batch, upsert=self.upsert)
+
+    @property
+    def saved(self) -> int:
+        return self.result.saved
+
+    async def __aenter__(self) -> "PostSink":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.flush()
+        if self.on_progress:
+            await self.on_progress(self)
@@ -0,0 +1,87 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from agent.storage.models import User
+
+
+class UserCache:
+    """Bounded LRU cache of User rows with a TTL, keyed by id and looked up
+    by id, email or telegram chat id.
+
+    Callers get copies, so mutating a returned User never changes the cache.
+    Writers call invalidate() after they commit; a read that started before
+    an invalidation passes the generation it saw to put(), which then drops
+    the possibly stale row instead of caching it. max_size 0 disables it.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._users: "OrderedDict[int, Tuple[User, float]]" = OrderedDict()
+        self._ids: Dict[Tuple[str, object], int] = {}
+
+    @staticmethod
+    def _keys(user: User):
+        yield ("email", user.email)
+        if user.telegram_chat_id:
+            yield ("chat_id", user.telegram_chat_id)
+
+    def get(self, field: str, value) -> Optional[User]:
+        """field is "id", "email" or "chat_id"."""
+        user_id = value if field == "id" else self._ids.get((field, value))
+        entry = self._users.get(user_id) if user_id is not None else None
+        if entry is not None and entry[1] < time.monotonic():
+            self._drop(user_id)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._users.move_to_end(user_id)
+        self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def put(self, user: User, generation: int):
+        if not self.max_size or generation != self.generation:
+            return
+        self._drop(user.id)
+        self._users[user.id] = (copy.deepcopy(user), time.monotonic() + self.ttl_seconds)
+        for key in self._keys(user):
+            self._ids[key] = user.id
+        while len(self._users) > self.max_size:
+            self._drop(next(iter(self._users)))
+            self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Forget one user, or everyone when user_id is None."""
+        self.generation += 1
+        self.invalidations += 1
+        if user_id is None:
+            self._users.clear()
+            self._ids.clear()
+        else:
+            self._drop(user_id)
+
+    def _drop(self, user_id: int):
+        entry = self._users.pop(user_id, None)
+        if entry is not None:
+            for key in self._keys(entry[0]):
+                if self._ids.get(key) == user_id:
+                    del self._ids[key]
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import Optional
 
@@ -13,7 +12,7 @@ from telegram.ext import (
 )
 
 from agent.utils.config import TelegramConfig
-from agent.storage.database import Database
+from agent.storage.base import Storage
 from agent.storage.models import User
 from agent.telegram.handlers import ApprovalHandler
 
@@ -21,7 +20,7 @@ logger = logging.getLogger("twitter_agent")
 
 
 class TelegramBot:
-    def __init__(self, config: TelegramConfig, db: Database):
+    def __init__(self, config: TelegramConfig, db: Storage):
         self.config = config
         self.db = db
         self.app: Optional[Application] = None
@@ -137,18 +136,15 @@ class TelegramBot:
             return
 
         topic_name = " ".join(context.args)
-        topics = user.topics
-        if topic_name in [t["name"] if isinstance(t, dict) else t for t in topics]:
-            await update.message.reply_text(f"Topic '{topic_name}' already exists.")
-            return
-
-        topics.append({
+        added = await self.db.add_topic(user.id, {
             "name": topic_name,
             "subreddits": [],
             "tone": "informative",
             "hashtags": [],
         })
-        await self.db.update_user_topics(chat_id, json.dumps(topics))
+        if not added:
+            await update.message.reply_text(f"Topic '{topic_name}' already exists.")
+            return
         await update.message.reply_text(f"Added topic: {topic_name}")
 
     async def _cmd_remove_topic(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -163,18 +159,9 @@ class TelegramBot:
             return
 
         topic_name = " ".join(context.args)
-        topics = user.topics
-        original_len = len(topics)
-        topics = [
-            t for t in topics
-            if (t["name"] if isinstance(t, dict) else t) != topic_name
-        ]
-
-        if len(topics) == original_len:
+        if not await self.db.remove_topic(user.id, topic_name):
             await update.message.reply_text(f"Topic '{topic_name}' not found.")
             return
-
-        await self.db.update_user_topics(chat_id, json.dumps(topics))
         await update.message.reply_text(f"Removed topic: {topic_name}")
 
     async def _cmd_list_topics(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -191,8 +178,7 @@ class TelegramBot:
 
         lines = ["Your topics:\n"]
         for i, t in enumerate(topics, 1):
-            name = t["name"] if isinstance(t, dict) else t
-            lines.append(f"{i}. {name}")
+            lines.append(f"{i}. {t['name']}")
         await update.message.reply_text("\n".join(lines))
 
     async def _cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
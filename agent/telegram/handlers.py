@@ -4,7 +4,7 @@ from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Bot
 from telegram.ext import ContextTypes
 
-from agent.storage.database import Database
+from agent.storage.base import Storage
 
 logger = logging.getLogger("twitter_agent")
 
@@ -12,7 +12,7 @@ logger = logging.getLogger("twitter_agent")
 class ApprovalHandler:
     """Handles tweet approval/rejection flow via Telegram inline keyboards."""
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Storage):
         self.db = db
         self._pending_edits = {}  # chat_id -> tweet_id awaiting edit text
         self._post_callback = None  # Set by orchestrator
@@ -74,6 +74,7 @@ class ApprovalHandler:
     async def _handle_approve(self, query, tweet_id: int, content: str):
         """Approve a tweet and trigger posting."""
         await self.db.update_tweet_status(tweet_id, "approved")
+        await self.db.flush()
         await query.edit_message_text(
             f"APPROVED - Posting...\n\n{content}"
         )
@@ -139,6 +140,7 @@ class ApprovalHandler:
             return
 
         await self.db.update_tweet_status(tweet_id, "pending", content=new_content)
+        await self.db.flush()
 
         # Re-send for approval with updated content
         tweet = await self.db.get_generated_tweet_by_id(tweet_id)
@@ -3,25 +3,53 @@ import sys
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 # Add project root to path so we can import agent modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from agent.storage.database import Database
-from backend.routes import auth, topics, tweets, dashboard, generate, scrape, settings
+from agent.reddit.cache import configure_response_cache, get_response_cache
+from agent.reddit.ratelimit import rate_limiter
+from agent.reddit.transport import configure_reddit_io
+from agent.storage.base import create_database
+from agent.utils.config import reddit_config_from_env
+from backend.routes.auth import get_current_user_id
+from backend.routes import auth, topics, tweets, dashboard, generate, scrape, search, settings
 
 logger = logging.getLogger("twitter_agent")
 
-db = Database(os.environ.get("DB_PATH", "./data/agent.db"))
+DB_PATH = os.environ.get("DB_PATH", "./data/agent.db")
+# Operators who may see process-wide metrics covering every tenant.
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.environ.get("ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+reddit_config = reddit_config_from_env(
+    cache_path=os.path.join(os.path.dirname(DB_PATH), "reddit_cache.db"),
+)
+
+db = create_database(
+    os.environ.get("DATABASE_URL", ""),
+    path=DB_PATH,
+    pool_size=int(os.environ.get("DB_POOL_SIZE", "10")),
+    read_pool_size=int(os.environ.get("DB_READERS", "4")),
+    busy_timeout_ms=int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000")),
+    synchronous=os.environ.get("DB_SYNCHRONOUS", "NORMAL"),
+    group_commit_ms=int(os.environ.get("DB_GROUP_COMMIT_MS", "0")),
+    user_cache_size=int(os.environ.get("DB_USER_CACHE_SIZE", "1024")),
+    user_cache_ttl=float(os.environ.get("DB_USER_CACHE_TTL", "60")),
+    shards=int(os.environ.get("DB_SHARDS", "0")),
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.init()
     logger.info("Database initialized")
+    configure_reddit_io(reddit_config)
     yield
+    configure_response_cache(None)
     await db.close()
     logger.info("Database closed")
 
@@ -55,8 +83,28 @@ app.include_router(dashboard.router, prefix="/api")
 app.include_router(generate.router, prefix="/api")
 app.include_router(scrape.router, prefix="/api")
 app.include_router(settings.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/api/metrics")
+async def metrics(user_id: int = Depends(get_current_user_id)):
+    """The caller's own Reddit pacing; the shared caches only for operators."""
+    user = await db.get_user_by_id(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if user.email.lower() not in ADMIN_EMAILS:
+        return {
+            "reddit_rate_limiter": rate_limiter.metrics(user.reddit_client_id)
+            if user.reddit_client_id else {},
+        }
+    cache = get_response_cache()
+    return {
+        "reddit_rate_limiter": rate_limiter.metrics(),
+        "reddit_cache": cache.metrics() if cache else None,
+        "user_cache": db.user_cache.metrics(),
+    }
@@ -3,7 +3,8 @@ import logging
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from agent.ai.generator import ContentGenerator
+from agent.ai.generator import PROMPT_BODY_CHARS, ContentGenerator
+from agent.reddit.fetcher import RedditFetcher
 from backend.routes.auth import get_current_user_id
 
 logger = logging.getLogger("twitter_agent")
@@ -13,7 +14,7 @@ router = APIRouter(tags=["generate"])
 
 @router.post("/generate")
 async def trigger_generation(user_id: int = Depends(get_current_user_id)):
-    from backend.app import db
+    from backend.app import db, reddit_config
 
     user = await db.get_user_by_id(user_id)
     if not user:
@@ -35,6 +36,15 @@ async def trigger_generation(user_id: int = Depends(get_current_user_id)):
     )
     generator = ContentGenerator(claude_config)
 
+    fetcher = None
+    if user.reddit_client_id and user.reddit_client_secret:
+        fetcher = RedditFetcher(
+            client_id=user.reddit_client_id,
+            client_secret=user.reddit_client_secret,
+            user_agent=reddit_config.user_agent,
+            max_concurrency=reddit_config.max_concurrency,
+        )
+
     total_generated = 0
 
     for topic_data in topics:
@@ -47,11 +57,22 @@ async def trigger_generation(user_id: int = Depends(get_current_user_id)):
             tone = "informative"
             hashtags = []
 
-        top_posts = await db.get_top_posts(topic_name, limit=20)
+        top_posts = await db.get_top_posts(
+            topic_name, limit=20,
+            max_age_hours=reddit_config.top_posts_window_hours,
+            user_id=user.id,
+            body_chars=PROMPT_BODY_CHARS,
+        )
         if not top_posts:
             logger.warning(f"No scraped posts for topic: {topic_name}")
             continue
 
+        # Discovery only loads comments for its best candidates; fill the rest now.
+        if fetcher is not None:
+            hydrated = await fetcher.hydrate_missing_comments_async(top_posts)
+            if hydrated:
+                await db.update_post_comments(hydrated)
+
         generated = generator.generate_tweets(
             topic=topic_name,
             top_posts=top_posts,
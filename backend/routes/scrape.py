@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 
 from backend.routes.auth import get_current_user_id
 from agent.reddit.fetcher import RedditFetcher
+from agent.storage.sink import PostSink
 
 logger = logging.getLogger("twitter_agent")
 
@@ -15,7 +16,7 @@ _scrape_status: dict = {}
 
 async def _run_scrape(user_id: int, reddit_client_id: str, reddit_client_secret: str, topics: list):
     """Background task: fetch top Reddit posts for a user's topics."""
-    from backend.app import db
+    from backend.app import db, reddit_config
 
     _scrape_status[user_id] = {"running": True, "message": "Connecting to Reddit...", "scraped": 0}
 
@@ -26,36 +27,46 @@ async def _run_scrape(user_id: int, reddit_client_id: str, reddit_client_secret:
         fetcher = RedditFetcher(
             client_id=reddit_client_id,
             client_secret=reddit_client_secret,
+            user_agent=reddit_config.user_agent,
+            max_concurrency=reddit_config.max_concurrency,
         )
 
         for topic_data in topics:
-            if isinstance(topic_data, dict):
-                topic_name = topic_data["name"]
-                subreddits = topic_data.get("subreddits", [])
+            if isinstance(topic_data, dict) and topic_data.get("subreddits"):
+                topics_processed += 1
             else:
-                topic_name = str(topic_data)
-                subreddits = []
-
-            if not subreddits:
-                logger.warning(f"No subreddits configured for topic: {topic_name}")
-                continue
-
-            _scrape_status[user_id]["message"] = f"Scraping topic: {topic_name}..."
-
-            for sub in subreddits:
-                posts = fetcher.fetch_top_posts(
-                    subreddit_name=sub,
-                    topic=topic_name,
-                    limit=5,
-                    time_filter="day",
-                    comments_per_post=3,
-                )
-                if posts:
-                    count = await db.save_scraped_posts(posts)
-                    total_scraped += count
-                    _scrape_status[user_id]["scraped"] = total_scraped
-
-            topics_processed += 1
+                name = topic_data["name"] if isinstance(topic_data, dict) else str(topic_data)
+                logger.warning(f"No subreddits configured for topic: {name}")
+
+        async def report(sink: PostSink):
+            nonlocal total_scraped
+            total_scraped = sink.saved
+            _scrape_status[user_id]["scraped"] = sink.saved
+            _scrape_status[user_id]["fetched"] = sink.received
+            _scrape_status[user_id]["message"] = (
+                f"Fetched {sink.received} posts, saved {sink.saved}..."
+            )
+
+        async def link_unchanged(posts):
+            # Known posts are not re-saved, but still belong to this user's topics.
+            for post in posts:
+                post.user_id = user_id
+            await db.link_posts(posts)
+
+        _scrape_status[user_id]["message"] = f"Scraping {topics_processed} topics..."
+        async with PostSink(db, on_progress=report) as sink:
+            async for post in fetcher.stream_for_topics(
+                topics,
+                posts_per_subreddit=reddit_config.posts_per_subreddit,
+                time_filter=reddit_config.time_filter,
+                comments_per_post=reddit_config.comments_per_post,
+                known_lookup=db.get_known_post_scores,
+                comments_per_topic=reddit_config.comment_candidates_per_topic,
+                comment_budget=reddit_config.comment_budget,
+                on_unchanged=link_unchanged,
+            ):
+                post.user_id = user_id
+                await sink.add(post)
 
         _scrape_status[user_id] = {
             "running": False,
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.routes.auth import get_current_user_id
+
+router = APIRouter(tags=["search"])
+
+MAX_PAGE_SIZE = 100
+
+
+@router.get("/search")
+async def search(
+    q: str,
+    type: str = "posts",
+    topic: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    user_id: int = Depends(get_current_user_id),
+):
+    from backend.app import db
+
+    if type not in ("posts", "tweets"):
+        raise HTTPException(status_code=400, detail="type must be 'posts' or 'tweets'")
+    if not db.fts_enabled:
+        raise HTTPException(status_code=503, detail="Full-text search is not available")
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    if type == "posts":
+        results = await db.search_posts(q, limit=limit, offset=offset, topic=topic, user_id=user_id)
+    else:
+        results = await db.search_tweets(user_id, q, limit=limit, offset=offset)
+
+    return {
+        "results": results,
+        "next_offset": offset + limit if len(results) == limit else None,
+    }
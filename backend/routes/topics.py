@@ -1,5 +1,3 @@
-import json
-
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
@@ -35,22 +33,16 @@ async def add_topic(req: AddTopicRequest, user_id: int = Depends(get_current_use
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    topics = user.topics
-    for t in topics:
-        existing_name = t["name"] if isinstance(t, dict) else t
-        if existing_name == req.name:
-            raise HTTPException(status_code=400, detail="Topic already exists")
-
     topic_data = {
         "name": req.name,
         "subreddits": req.subreddits,
         "tone": req.tone,
         "hashtags": req.hashtags,
     }
-    topics.append(topic_data)
-    await db.update_user_topics_by_id(user_id, json.dumps(topics))
+    if not await db.add_topic(user_id, topic_data):
+        raise HTTPException(status_code=400, detail="Topic already exists")
 
-    return {"topics": topics}
+    return {"topics": user.topics + [topic_data]}
 
 
 @router.delete("/topics/{topic_name}")
@@ -61,18 +53,7 @@ async def remove_topic(topic_name: str, user_id: int = Depends(get_current_user_
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    topics = user.topics
-    new_topics = []
-    found = False
-    for t in topics:
-        name = t["name"] if isinstance(t, dict) else t
-        if name == topic_name:
-            found = True
-        else:
-            new_topics.append(t)
-
-    if not found:
+    if not await db.remove_topic(user_id, topic_name):
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    await db.update_user_topics_by_id(user_id, json.dumps(new_topics))
-    return {"topics": new_topics}
+    return {"topics": [t for t in user.topics if t["name"] != topic_name]}
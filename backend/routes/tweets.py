@@ -1,4 +1,7 @@
+import base64
+import json
 import logging
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel
@@ -10,6 +13,8 @@ logger = logging.getLogger("twitter_agent")
 
 router = APIRouter(tags=["tweets"])
 
+MAX_PAGE_SIZE = 200
+
 
 class EditRequest(BaseModel):
     content: str
@@ -35,6 +40,7 @@ async def _post_tweet_to_twitter(tweet_id: int, content: str, user_id: int):
         result = await publisher.post_tweet(content)
         if result["success"]:
             await db.update_tweet_status(tweet_id, "posted", posted_tweet_id=result["tweet_id"])
+            await db.flush()
             logger.info(f"Tweet {tweet_id} posted successfully: {result['tweet_id']}")
         else:
             logger.error(f"Failed to post tweet {tweet_id}: {result['error']}")
@@ -42,11 +48,40 @@ async def _post_tweet_to_twitter(tweet_id: int, content: str, user_id: int):
         logger.error(f"Error posting tweet {tweet_id}: {e}")
 
 
-@router.get("/tweets/pending")
-async def get_pending_tweets(user_id: int = Depends(get_current_user_id)):
+def _encode_cursor(tweet) -> str:
+    raw = json.dumps([str(tweet.created_at), tweet.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    if not cursor:
+        return None
+    try:
+        created_at, tweet_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), int(tweet_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _tweet_page(user_id: int, statuses, limit: int, topic: Optional[str], cursor: Optional[str]):
     from backend.app import db
 
-    tweets = await db.get_pending_tweets(user_id=user_id)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    tweets = await db.get_tweets_page(
+        user_id, statuses, limit=limit, topic=topic, before=_decode_cursor(cursor)
+    )
+    next_cursor = _encode_cursor(tweets[-1]) if len(tweets) == limit else None
+    return tweets, next_cursor
+
+
+@router.get("/tweets/pending")
+async def get_pending_tweets(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    topic: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+):
+    tweets, next_cursor = await _tweet_page(user_id, ["pending"], limit, topic, cursor)
     return {
         "tweets": [
             {
@@ -57,17 +92,25 @@ async def get_pending_tweets(user_id: int = Depends(get_current_user_id)):
                 "created_at": str(t.created_at) if t.created_at else None,
             }
             for t in tweets
-        ]
+        ],
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/tweets/history")
 async def get_tweet_history(
-    limit: int = 50, user_id: int = Depends(get_current_user_id)
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    topic: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
 ):
-    from backend.app import db
+    from agent.storage.base import HISTORY_STATUSES
 
-    tweets = await db.get_tweet_history(user_id, limit=limit)
+    if status is not None and status not in HISTORY_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(HISTORY_STATUSES)}")
+    statuses = [status] if status else HISTORY_STATUSES
+    tweets, next_cursor = await _tweet_page(user_id, statuses, limit, topic, cursor)
     return {
         "tweets": [
             {
@@ -81,7 +124,8 @@ async def get_tweet_history(
                 "posted_tweet_id": t.posted_tweet_id,
             }
             for t in tweets
-        ]
+        ],
+        "next_cursor": next_cursor,
     }
 
 
@@ -102,6 +146,7 @@ async def approve_tweet(
         raise HTTPException(status_code=400, detail=f"Tweet is already {tweet.status}")
 
     await db.update_tweet_status(tweet_id, "approved")
+    await db.flush()  # durable before posting starts
 
     # Auto-post to Twitter in background
     user = await db.get_user_by_id(user_id)
@@ -0,0 +1,3 @@
+-- Runs once, when the postgres volume is first created. agent_test is the
+-- throwaway database the storage tests wipe (TEST_DATABASE_URL).
+CREATE DATABASE agent_test OWNER agent;
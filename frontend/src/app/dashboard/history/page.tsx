@@ -7,6 +7,8 @@ import { isLoggedIn, getTweetHistory } from "@/lib/api";
 export default function HistoryPage() {
   const router = useRouter();
   const [tweets, setTweets] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -21,6 +23,7 @@ export default function HistoryPage() {
     try {
       const data = await getTweetHistory(100);
       setTweets(data.tweets);
+      setNextCursor(data.next_cursor);
     } catch {
       // handled by api client
     } finally {
@@ -28,6 +31,20 @@ export default function HistoryPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await getTweetHistory(100, nextCursor);
+      setTweets((prev) => [...prev, ...data.tweets]);
+      setNextCursor(data.next_cursor);
+    } catch {
+      // handled by api client
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-[80vh] flex items-center justify-center">
@@ -140,6 +157,18 @@ export default function HistoryPage() {
               );
             })}
           </div>
+
+          {nextCursor && (
+            <div className="flex justify-center p-4 border-t border-gray-50">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-5 py-2.5 text-sm font-semibold rounded-xl text-indigo-700 bg-indigo-50 hover:bg-indigo-100 disabled:opacity-50 transition-colors"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
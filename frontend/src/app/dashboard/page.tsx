@@ -18,6 +18,8 @@ export default function DashboardPage() {
   const [stats, setStats] = useState({ pending: 0, posted: 0, total_generated: 0 });
   const [topicsCount, setTopicsCount] = useState(0);
   const [tweets, setTweets] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [generating, setGenerating] = useState(false);
   const [scraping, setScraping] = useState(false);
@@ -47,6 +49,7 @@ export default function DashboardPage() {
       setStats(dashData.stats);
       setTopicsCount(dashData.topics_count);
       setTweets(tweetData.tweets);
+      setNextCursor(tweetData.next_cursor);
     } catch {
       // handled by api client (401 redirect)
     } finally {
@@ -54,6 +57,20 @@ export default function DashboardPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const tweetData = await getPendingTweets(50, nextCursor);
+      setTweets((prev) => [...prev, ...tweetData.tweets]);
+      setNextCursor(tweetData.next_cursor);
+    } catch {
+      // handled by api client (401 redirect)
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const checkScrapeStatus = async () => {
     try {
       const status = await getScrapeStatus();
@@ -218,9 +235,9 @@ export default function DashboardPage() {
         <div className="flex items-center justify-between mb-5">
           <h2 className="text-lg font-bold text-gray-900">
             Pending Review
-            {tweets.length > 0 && (
-              <span className="ml-2 inline-flex items-center justify-center w-6 h-6 rounded-full bg-amber-100 text-amber-700 text-xs font-bold">
-                {tweets.length}
+            {stats.pending > 0 && (
+              <span className="ml-2 inline-flex items-center justify-center min-w-6 h-6 px-1.5 rounded-full bg-amber-100 text-amber-700 text-xs font-bold">
+                {stats.pending}
               </span>
             )}
           </h2>
@@ -250,6 +267,17 @@ export default function DashboardPage() {
                 onAction={loadData}
               />
             ))}
+            {nextCursor && (
+              <div className="flex justify-center pt-2">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="px-5 py-2.5 text-sm font-semibold rounded-xl text-indigo-700 bg-indigo-50 hover:bg-indigo-100 disabled:opacity-50 transition-colors"
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
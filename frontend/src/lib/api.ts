@@ -105,12 +105,23 @@ export async function removeTopic(name: string) {
 }
 
 // Tweets
-export async function getPendingTweets() {
-  return request<{ tweets: any[] }>("/tweets/pending");
+function pageQuery(limit: number, cursor?: string | null, topic?: string) {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  if (topic) params.set("topic", topic);
+  return params.toString();
 }
 
-export async function getTweetHistory(limit = 50) {
-  return request<{ tweets: any[] }>(`/tweets/history?limit=${limit}`);
+export async function getPendingTweets(limit = 50, cursor?: string | null, topic?: string) {
+  return request<{ tweets: any[]; next_cursor: string | null }>(
+    `/tweets/pending?${pageQuery(limit, cursor, topic)}`
+  );
+}
+
+export async function getTweetHistory(limit = 50, cursor?: string | null, topic?: string) {
+  return request<{ tweets: any[]; next_cursor: string | null }>(
+    `/tweets/history?${pageQuery(limit, cursor, topic)}`
+  );
 }
 
 export async function approveTweet(tweetId: number) {
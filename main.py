@@ -9,20 +9,48 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from agent.utils.config import load_config
 from agent.utils.logger import setup_logger
+from agent.storage.base import Storage, create_database
 from agent.storage.database import Database
 from agent.telegram.bot import TelegramBot
 from agent.orchestrator import Orchestrator
 from agent.scheduler import AgentScheduler
 
 
-async def run_agent(config_path: str):
+def open_database(config) -> Storage:
+    """The storage backend configured under database: (Postgres when url is set)."""
+    return create_database(
+        config.database.url,
+        path=config.database.path,
+        pool_size=config.database.pool_size,
+        user_cache_size=config.database.user_cache_size,
+        user_cache_ttl=config.database.user_cache_ttl,
+        shards=config.database.shards,
+        read_pool_size=config.database.read_pool_size,
+        busy_timeout_ms=config.database.busy_timeout_ms,
+        synchronous=config.database.synchronous,
+        group_commit_ms=config.database.group_commit_ms,
+    )
+
+
+def apply_transport_overrides(config, record: str = None, replay: str = None):
+    """Point Reddit traffic at a fixture archive from the command line."""
+    if record:
+        config.reddit.transport = "record"
+        config.reddit.fixtures_path = record
+    elif replay:
+        config.reddit.transport = "replay"
+        config.reddit.fixtures_path = replay
+
+
+async def run_agent(config_path: str, record: str = None, replay: str = None):
     """Run the full agent: Telegram bot + scheduler."""
     config = load_config(config_path)
+    apply_transport_overrides(config, record, replay)
     logger = setup_logger(config.logging.level, config.logging.file)
     logger.info("Starting Twitter Agent...")
 
     # Initialize database
-    db = Database(config.database.path)
+    db = open_database(config)
     await db.init()
 
     # Initialize Telegram bot
@@ -62,12 +90,17 @@ async def run_agent(config_path: str):
     logger.info("Goodbye!")
 
 
-async def test_scrape(config_path: str, subreddit: str):
+async def test_scrape(config_path: str, subreddit: str, record: str = None, replay: str = None):
     """Test Reddit scraping for a subreddit."""
     config = load_config(config_path)
+    apply_transport_overrides(config, record, replay)
     logger = setup_logger(config.logging.level, config.logging.file)
 
     from agent.reddit.fetcher import RedditFetcher
+    from agent.reddit.replay import configure_fixtures
+    from agent.reddit.transport import configure_reddit_io
+
+    configure_reddit_io(config.reddit)
 
     fetcher = RedditFetcher(
         client_id=config.reddit.client_id,
@@ -84,6 +117,236 @@ async def test_scrape(config_path: str, subreddit: str):
         print(f"  Score: {p.engagement_score:.1f}")
         print()
 
+    configure_fixtures(None)
+
+
+async def bench_discovery(config_path: str, replay: str, num_users: int = 20, credentials: int = 4):
+    """Benchmark discovery offline against a recorded fixture archive."""
+    import tempfile
+    import time
+
+    config = load_config(config_path)
+    apply_transport_overrides(config, replay=replay)
+    logger = setup_logger(config.logging.level, config.logging.file)
+
+    from agent.reddit.cache import get_response_cache
+    from agent.reddit.planner import DiscoveryPlanner
+    from agent.reddit.replay import get_fixtures
+    from agent.reddit.transport import configure_reddit_io
+    from agent.storage.models import User
+
+    if not config.topics:
+        print("No topics in config; add topics with subreddits to benchmark discovery.")
+        return
+
+    topics = [
+        {"name": t.name, "subreddits": t.subreddits, "tone": t.tone, "hashtags": t.hashtags}
+        for t in config.topics
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.reddit.cache_path = os.path.join(tmp, "reddit_cache.db")
+        configure_reddit_io(config.reddit)
+
+        db = Database(os.path.join(tmp, "bench.db"))
+        await db.init()
+
+        users = [
+            User(
+                id=i + 1,
+                email=f"bench{i}@example.com",
+                reddit_client_id=f"bench-{i % credentials}",
+                reddit_client_secret="bench",
+                topics=topics,
+            )
+            for i in range(num_users)
+        ]
+        planner = DiscoveryPlanner(config.reddit)
+
+        print(f"\nReplaying {replay} for {num_users} users x {len(topics)} topics\n")
+        for run in ("cold cache", "warm cache"):
+            plan = planner.plan(users)
+            start = time.perf_counter()
+            known_lookup = db.get_known_post_scores if config.reddit.incremental else None
+            posts = await planner.execute(plan, known_lookup=known_lookup)
+            saved = (await db.save_scraped_posts(posts, upsert=True)).saved
+            elapsed = time.perf_counter() - start
+
+            fixtures = get_fixtures().metrics()
+            cache = get_response_cache().metrics() if get_response_cache() else {}
+            print(f"[{run}]")
+            print(f"  Listings: {len(plan.listings)} ({plan.fetches_saved} duplicate fetches saved)")
+            print(f"  Posts: {len(posts)} fetched, {saved} saved in {elapsed:.2f}s "
+                  f"({len(posts) / elapsed if elapsed else 0:.0f} posts/s)")
+            print(f"  Requests served: {fixtures['served']} "
+                  f"(peak {fixtures['peak_in_flight']} in flight, "
+                  f"{fixtures['injected_errors']} injected errors, {fixtures['missing']} missing)")
+            if cache:
+                print(f"  Cache: {cache['hits']} hits / {cache['misses']} misses "
+                      f"(hit rate {cache['hit_rate']:.0%})")
+            print()
+
+        await db.close()
+
+
+async def bench_ingest(num_posts: int = 10000, batch_size: int = 1000):
+    """Measure save_scraped_posts throughput on a throwaway database."""
+    import tempfile
+    import time
+
+    from agent.storage.models import ScrapedPost
+
+    posts = [
+        ScrapedPost(
+            post_id=f"bench{i}", subreddit=f"sub{i % 50}", author=f"user{i % 997}",
+            title=f"Benchmark post {i}", content="lorem ipsum " * 40,
+            score=i % 5000, num_comments=i % 300, upvote_ratio=0.9,
+            post_url=f"https://reddit.com/r/sub{i % 50}/comments/bench{i}",
+            top_comments=["first", "second"], comments_hydrated=True,
+            topic=f"topic{i % 10}",
+        )
+        for i in range(num_posts)
+    ]
+    for p in posts:
+        p.compute_engagement_score()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        await db.init()
+
+        print(f"\nIngesting {num_posts} posts in batches of {batch_size}\n")
+        for run, upsert in (("insert", False), ("duplicate insert", False), ("upsert", True)):
+            inserted = updated = 0
+            start = time.perf_counter()
+            for i in range(0, num_posts, batch_size):
+                result = await db.save_scraped_posts(posts[i:i + batch_size], upsert=upsert)
+                inserted += result.inserted
+                updated += result.updated
+            elapsed = time.perf_counter() - start
+            print(f"  {run:<17} {inserted:>7} inserted {updated:>7} updated "
+                  f"in {elapsed:.2f}s ({num_posts / elapsed:,.0f} rows/s)")
+
+        await db.close()
+
+
+async def bench_models(num_posts: int = 10000):
+    """Measure model memory, JSON column decoding and top-post loading."""
+    import dataclasses
+    import json
+    import tempfile
+    import time
+    import tracemalloc
+
+    from agent.ai.generator import PROMPT_BODY_CHARS
+    from agent.storage import codec
+    from agent.storage.models import ScrapedPost
+
+    comments = [f"comment {j} " + "lorem ipsum " * 15 for j in range(3)]
+    kwargs = [
+        dict(
+            post_id=f"bench{i}", subreddit=f"sub{i % 50}", author=f"user{i % 997}",
+            title=f"Benchmark post {i}", content="lorem ipsum " * 1000,
+            score=i % 5000, num_comments=i % 300, upvote_ratio=0.9,
+            post_url=f"https://reddit.com/r/sub{i % 50}/comments/bench{i}",
+            top_comments=comments, comments_hydrated=True, topic="bench",
+        )
+        for i in range(num_posts)
+    ]
+
+    # The same fields without __slots__, to show what slotting saves.
+    unslotted = dataclasses.make_dataclass("UnslottedPost", [
+        (f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+        for f in dataclasses.fields(ScrapedPost)
+    ])
+    print(f"\n{num_posts} posts, JSON codec: {codec.BACKEND}\n")
+    for name, cls in (("dataclass", unslotted), ("slotted", ScrapedPost)):
+        tracemalloc.start()
+        posts = [cls(**kw) for kw in kwargs]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del posts
+        print(f"  {name:<10} {size / num_posts:>6.0f} bytes/post (excluding shared strings)")
+
+    raw = [json.dumps(kw["top_comments"]) for kw in kwargs]
+    for name, decode in (("json", json.loads), (codec.BACKEND, codec.loads)):
+        start = time.perf_counter()
+        for value in raw:
+            decode(value)
+        elapsed = time.perf_counter() - start
+        print(f"  decode {name:<6} {elapsed * 1e6 / num_posts:>6.2f} us/row")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        await db.init()
+        posts = [ScrapedPost(**kw) for kw in kwargs]
+        for post in posts:
+            post.compute_engagement_score()
+        await db.save_scraped_posts(posts)
+        for name, body_chars in (("full rows", 0), ("projected", PROMPT_BODY_CHARS)):
+            start = time.perf_counter()
+            for _ in range(50):
+                await db.get_top_posts("bench", limit=20, body_chars=body_chars)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            top = await db.get_top_posts("bench", limit=20, body_chars=body_chars)
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del top
+            print(f"  get_top_posts {name:<10} {elapsed * 1000 / 50:>6.2f} ms/call, "
+                  f"{size / 1024:>6.0f} KiB held")
+        await db.close()
+
+
+async def rebuild_counters(config_path: str):
+    """Recompute the dashboard tweet counters from generated_tweets."""
+    config = load_config(config_path)
+    setup_logger(config.logging.level, config.logging.file)
+
+    db = open_database(config)
+    await db.init()
+    rows = await db.rebuild_tweet_counters()
+    await db.close()
+    print(f"Rebuilt tweet counters: {rows} rows")
+
+
+async def run_retention(config_path: str):
+    """Archive and prune aged rows once, then vacuum."""
+    config = load_config(config_path)
+    setup_logger(config.logging.level, config.logging.file)
+
+    from agent.storage.retention import RetentionManager
+
+    db = open_database(config)
+    await db.init()
+    result = await RetentionManager(db, config.retention).run()
+    await db.close()
+    for table, count in result["pruned"].items():
+        print(f"  {table}: {count} rows pruned")
+    print(f"  {result['pages_released']} pages released")
+
+
+async def run_backup(config_path: str):
+    """Take an online snapshot of the database files now."""
+    config = load_config(config_path)
+    setup_logger(config.logging.level, config.logging.file)
+
+    from agent.storage.backup import BackupManager
+
+    db = open_database(config)
+    await db.init()
+    try:
+        result = await BackupManager(db, config.backup).run()
+    finally:
+        await db.close()
+    if not result:
+        print("Nothing to back up: database is not stored in SQLite files")
+        return
+    print(f"  {result['files']} files, {result['bytes']:,} bytes -> {result['path']}")
+    print(f"  took {result['duration']}s, {result['steps']} steps taking {result['step_time']}s "
+          f"(longest step {result['longest_step']}s, {result['restarts']} restarts)")
+    for path in result["rotated"]:
+        print(f"  removed old snapshot {path}")
+
 
 async def test_generate(config_path: str):
     """Test Claude content generation with sample data."""
@@ -179,19 +442,51 @@ def main():
     group.add_argument("--test-scrape", type=str, metavar="SUBREDDIT", help="Test Reddit scraping")
     group.add_argument("--test-generate", action="store_true", help="Test AI generation")
     group.add_argument("--test-telegram", action="store_true", help="Test Telegram bot")
+    group.add_argument("--bench-discovery", action="store_true",
+                       help="Benchmark discovery offline (requires --replay)")
+    group.add_argument("--bench-ingest", action="store_true", help="Benchmark bulk post ingestion")
+    group.add_argument("--bench-models", action="store_true",
+                       help="Benchmark model memory, JSON decoding and top-post loading")
+    group.add_argument("--rebuild-counters", action="store_true",
+                       help="Recompute dashboard tweet counters from scratch")
+    group.add_argument("--retention", action="store_true",
+                       help="Archive and prune aged posts and run logs now")
+    group.add_argument("--backup", action="store_true",
+                       help="Take an online, compressed snapshot of the database now")
+
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument("--record", metavar="ARCHIVE", help="Record Reddit responses to a fixture archive")
+    fixtures.add_argument("--replay", metavar="ARCHIVE", help="Serve Reddit responses from a fixture archive")
+    parser.add_argument("--bench-users", type=int, default=20, help="Simulated users for --bench-discovery")
+    parser.add_argument("--bench-posts", type=int, default=10000,
+                        help="Posts to use for --bench-ingest and --bench-models")
 
     args = parser.parse_args()
 
     if args.validate_config:
         asyncio.run(validate_config(args.config))
     elif args.test_scrape:
-        asyncio.run(test_scrape(args.config, args.test_scrape))
+        asyncio.run(test_scrape(args.config, args.test_scrape, args.record, args.replay))
     elif args.test_generate:
         asyncio.run(test_generate(args.config))
     elif args.test_telegram:
         asyncio.run(test_telegram(args.config))
+    elif args.bench_discovery:
+        if not args.replay:
+            parser.error("--bench-discovery requires --replay ARCHIVE")
+        asyncio.run(bench_discovery(args.config, args.replay, args.bench_users))
+    elif args.bench_ingest:
+        asyncio.run(bench_ingest(args.bench_posts))
+    elif args.bench_models:
+        asyncio.run(bench_models(args.bench_posts))
+    elif args.rebuild_counters:
+        asyncio.run(rebuild_counters(args.config))
+    elif args.retention:
+        asyncio.run(run_retention(args.config))
+    elif args.backup:
+        asyncio.run(run_backup(args.config))
     else:
-        asyncio.run(run_agent(args.config))
+        asyncio.run(run_agent(args.config, args.record, args.replay))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from agent.storage.base import Storage, create_database
+
+# A throwaway Postgres database; every test wipes its public schema.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+
+async def _reset_postgres():
+    import asyncpg
+
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(params=["sqlite", "sharded", "postgres"])
+def backend(request) -> str:
+    if request.param == "postgres" and not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    return request.param
+
+
+@pytest.fixture
+def run_with_db(backend, tmp_path):
+    """Run an async test body against a fresh database of each backend."""
+
+    def run(body):
+        async def main():
+            if backend == "postgres":
+                await _reset_postgres()
+                db = create_database(TEST_DATABASE_URL, pool_size=4)
+            else:
+                db = create_database(
+                    path=str(tmp_path / "agent.db"), shards=2 if backend == "sharded" else 0
+                )
+            await db.init()
+            try:
+                return await body(db)
+            finally:
+                await db.close()
+
+        return asyncio.run(main())
+
+    return run
+
+
+async def backdate(db: Storage, table: str, column: str, days: int):
+    """Move column of every row in table days into the past."""
+    from agent.storage.database import Database
+
+    if hasattr(db, "catalog"):
+        return await backdate(db.catalog, table, column, days)
+    if isinstance(db, Database):
+        await db.flush()
+        await db._db.execute(
+            f"UPDATE {table} SET {column} = datetime('now', ?)", (f"-{days} days",)
+        )
+        await db._db.commit()
+    else:
+        await db._pool.execute(
+            f"UPDATE {table} SET {column} = timezone('utc', now()) - make_interval(days => $1)",
+            days,
+        )
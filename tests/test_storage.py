@@ -0,0 +1,323 @@
+"""Behaviour every Storage backend shares; runs once per backend in conftest."""
+
+import time
+
+from agent.storage.models import GeneratedTweet, IngestResult, ScrapedPost, User
+from agent.storage.scoring import ScoringProfile
+
+from conftest import backdate
+
+
+def post(post_id, topic="AI", score=10, user_id=0, **kwargs) -> ScrapedPost:
+    fields = dict(
+        subreddit="MachineLearning", author="someone", title=f"Post {post_id}",
+        content=f"Body of {post_id}", num_comments=2, upvote_ratio=0.9,
+        created_utc=time.time() - 3600,
+    )
+    fields.update(kwargs)
+    p = ScrapedPost(post_id=post_id, topic=topic, score=score, user_id=user_id, **fields)
+    p.compute_engagement_score()
+    return p
+
+
+async def add_user(db, email="a@example.com", topics=None, **kwargs) -> int:
+    return await db.add_user(User(email=email, topics=topics or [], **kwargs))
+
+
+# --- Users and topics ---
+
+
+def test_user_lookups_and_credentials(run_with_db):
+    async def body(db):
+        user_id = await add_user(db, telegram_chat_id=42, topics=[
+            {"name": "AI", "subreddits": ["MachineLearning", "LocalLLaMA"],
+             "tone": "witty", "hashtags": ["#AI"], "scoring": {"half_life_hours": 6}},
+        ])
+        user = await db.get_user_by_email("a@example.com")
+        assert user.id == user_id
+        assert user.telegram_chat_id == 42
+        assert user.topics == [{
+            "name": "AI", "subreddits": ["MachineLearning", "LocalLLaMA"],
+            "tone": "witty", "hashtags": ["#AI"], "scoring": {"half_life_hours": 6},
+        }]
+        assert (await db.get_user_by_chat_id(42)).id == user_id
+        assert await db.get_user_by_id(user_id + 1000) is None
+
+        await db.update_user_credentials(user_id, twitter_api_key="key", ignored="x")
+        assert (await db.get_user_by_id(user_id)).twitter_api_key == "key"
+        assert [u.id for u in await db.get_active_users()] == [user_id]
+
+    run_with_db(body)
+
+
+def test_topics(run_with_db):
+    async def body(db):
+        first = await add_user(db, "a@example.com", [{"name": "AI", "subreddits": ["MachineLearning"]}])
+        second = await add_user(db, "b@example.com", [{"name": "AI", "subreddits": ["machinelearning"]}])
+
+        assert await db.add_topic(first, {"name": "Rust", "subreddits": ["rust"]})
+        assert not await db.add_topic(first, {"name": "Rust"})
+        user = await db.get_user_by_id(first)
+        assert [t["name"] for t in user.topics] == ["AI", "Rust"]
+
+        assert (await db.get_user_by_id(second)).topics[0]["subreddits"] == ["machinelearning"]
+
+        assert await db.remove_topic(first, "Rust")
+        assert not await db.remove_topic(first, "Rust")
+        await db.set_user_topics(second, [{"name": "Go", "subreddits": ["golang"]}])
+        assert [t["name"] for t in (await db.get_user_by_id(second)).topics] == ["Go"]
+        assert [t["name"] for t in (await db.get_user_by_id(first)).topics] == ["AI"]
+
+    run_with_db(body)
+
+
+# --- Scraped posts ---
+
+
+def test_ingest_counts(run_with_db):
+    async def body(db):
+        assert await db.save_scraped_posts([post("p1"), post("p2")]) == IngestResult(2, 0)
+        assert await db.save_scraped_posts([post("p1"), post("p3")]) == IngestResult(1, 0)
+        result = await db.save_scraped_posts([post("p1", score=50), post("p4")], upsert=True)
+        assert result == IngestResult(1, 1)
+        assert (await db.get_known_post_scores(["p1", "p4", "nope"])) == {"p1": 50, "p4": 10}
+
+    run_with_db(body)
+
+
+def test_ingest_counts_fanned_out_post_once(run_with_db):
+    async def body(db):
+        batch = [post("p1", "AI"), post("p1", "ML"), post("p3", "AI")]
+        assert await db.save_scraped_posts(batch, upsert=True) == IngestResult(2, 0)
+        assert await db.save_scraped_posts(batch, upsert=True) == IngestResult(0, 2)
+        assert [p.post_id for p in await db.get_top_posts("ML")] == ["p1"]
+
+    run_with_db(body)
+
+
+def test_top_posts_per_user(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([
+            post("shared", score=5),
+            post("mine", score=50, user_id=1),
+            post("theirs", score=500, user_id=2),
+        ])
+        assert [p.post_id for p in await db.get_top_posts("AI")] == ["theirs", "mine", "shared"]
+        top = await db.get_top_posts("AI", user_id=1, body_chars=4)
+        assert [p.post_id for p in top] == ["mine", "shared"]
+        assert top[0].content == "Body"
+        assert top[0].topic == "AI"
+        assert top[0].engagement_score > 0
+        assert [p.post_id for p in await db.get_top_posts("AI", limit=1)] == ["theirs"]
+
+        await backdate(db, "post_topics", "scraped_at", 5)
+        assert await db.get_top_posts("AI", max_age_hours=24) == []
+        assert len(await db.get_top_posts("AI", max_age_hours=24 * 7)) == 3
+
+    run_with_db(body)
+
+
+def test_link_posts(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([post("p1", "AI")])
+        assert await db.link_posts([post("p1", "ML", user_id=3)]) == 1
+        assert await db.link_posts([post("p1", "ML", user_id=3)]) == 0
+        assert [p.post_id for p in await db.get_top_posts("ML", user_id=3)] == ["p1"]
+        assert await db.get_top_posts("ML", user_id=4) == []
+
+    run_with_db(body)
+
+
+def test_refresh_and_rescore(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([post("p1", "AI"), post("p2", "Rust")])
+        assert sorted(await db.get_post_ids_for_refresh(48)) == ["p1", "p2"]
+
+        updated = await db.update_post_stats([
+            {"post_id": "p1", "score": 1000, "num_comments": 10, "upvote_ratio": 0.5},
+            {"post_id": "missing", "score": 1, "num_comments": 1, "upvote_ratio": 1.0},
+        ])
+        assert updated == 1
+        assert (await db.get_known_post_scores(["p1"]))["p1"] == 1000
+
+        no_decay = ScoringProfile(half_life_hours=0)
+        rust = ScoringProfile(score_weight=0, comments_weight=0, ratio_weight=1, half_life_hours=0)
+        assert await db.rescore_posts({(0, "Rust"): rust}, no_decay) == 2
+        [ai] = await db.get_top_posts("AI")
+        assert ai.engagement_score == 1000 + 10 * 2 + 0.5 * 100
+        [r] = await db.get_top_posts("Rust")
+        assert r.engagement_score == 0.9
+
+    run_with_db(body)
+
+
+def test_rescore_per_user_profiles(run_with_db):
+    async def body(db):
+        # Two users follow a topic of the same name with different weights.
+        await db.save_scraped_posts([post("p1", "AI", score=100, user_id=1)])
+        await db.link_posts([post("p1", "AI", score=100, user_id=2)])
+        by_score = ScoringProfile(comments_weight=0, ratio_weight=0, half_life_hours=0)
+        by_ratio = ScoringProfile(score_weight=0, comments_weight=0, half_life_hours=0)
+        profiles = {(1, "AI"): by_score, (2, "AI"): by_ratio}
+        assert await db.rescore_posts(profiles, ScoringProfile(half_life_hours=0)) == 2
+
+        [first] = await db.get_top_posts("AI", user_id=1)
+        [second] = await db.get_top_posts("AI", user_id=2)
+        assert first.engagement_score == 100
+        assert second.engagement_score == 0.9 * 100
+
+    run_with_db(body)
+
+
+def test_comments(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([post("p1")])
+        [stored] = await db.get_top_posts("AI")
+        assert not stored.comments_hydrated and stored.top_comments == []
+
+        stored.top_comments = ["first!", "great post"]
+        await db.update_post_comments([stored])
+        [stored] = await db.get_top_posts("AI")
+        assert stored.comments_hydrated
+        assert stored.top_comments == ["first!", "great post"]
+
+    run_with_db(body)
+
+
+# --- Generated tweets ---
+
+
+def test_tweet_lifecycle(run_with_db):
+    async def body(db):
+        user_id = await add_user(db)
+        ids = [
+            await db.save_generated_tweet(GeneratedTweet(
+                topic="AI", content=f"tweet {n}", user_id=user_id, inspiration_post_ids=[1, 2],
+            ))
+            for n in range(3)
+        ]
+        await db.save_generated_tweet(GeneratedTweet(topic="AI", content="other", user_id=user_id + 1))
+        await db.flush()
+
+        assert [t.id for t in await db.get_pending_tweets(user_id)] == ids
+        assert len(await db.get_pending_tweets()) == 4
+
+        await db.update_tweet_status(ids[0], "approved")
+        await db.update_tweet_status(ids[0], "posted", posted_tweet_id="x1")
+        await db.update_tweet_status(ids[1], "edited", content="better tweet")
+        await db.update_tweet_status(ids[2], "rejected")
+        await db.flush()
+
+        posted = await db.get_generated_tweet_by_id(ids[0])
+        assert posted.status == "posted" and posted.posted_tweet_id == "x1"
+        assert posted.approved_at and posted.posted_at
+        assert posted.inspiration_post_ids == [1, 2]
+        assert (await db.get_generated_tweet_by_id(ids[1])).content == "better tweet"
+        assert await db.get_generated_tweet_by_id(ids[2] + 10 ** 15) is None
+
+        stats = await db.get_dashboard_stats(user_id)
+        assert stats["pending"] == 0 and stats["posted"] == 1
+        assert stats["by_status"] == {"posted": 1, "edited": 1, "rejected": 1}
+        assert stats["total_generated"] == 3
+        assert await db.rebuild_tweet_counters() >= 3
+        assert await db.get_dashboard_stats(user_id) == stats
+
+    run_with_db(body)
+
+
+def test_tweet_pages(run_with_db):
+    async def body(db):
+        user_id = await add_user(db)
+        for n in range(5):
+            tweet_id = await db.save_generated_tweet(
+                GeneratedTweet(topic="AI" if n % 2 else "Rust", content=f"tweet {n}", user_id=user_id)
+            )
+            if n != 4:
+                await db.update_tweet_status(tweet_id, "posted" if n % 2 else "rejected")
+        await db.flush()
+
+        first = await db.get_tweet_history(user_id, limit=2)
+        assert len(first) == 2
+        cursor = (str(first[-1].created_at), first[-1].id)
+        rest = await db.get_tweets_page(user_id, ["posted", "rejected"], limit=10, before=cursor)
+        seen = [t.id for t in first + rest]
+        assert len(seen) == 4 and len(set(seen)) == 4
+        assert seen == sorted(seen, reverse=True)
+
+        ai = await db.get_tweets_page(user_id, ["posted"], topic="AI")
+        assert [t.content for t in ai] == ["tweet 3", "tweet 1"]
+        assert [t.content for t in await db.get_tweets_page(user_id, ["pending"])] == ["tweet 4"]
+
+    run_with_db(body)
+
+
+# --- Search ---
+
+
+def test_search(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([
+            post("p1", title="Neural networks explained", content="Backpropagation basics"),
+            post("p2", "Rust", title="Borrow checker tips", content="Lifetimes and neural nets"),
+        ])
+        user_id = await add_user(db)
+        await db.save_generated_tweet(
+            GeneratedTweet(topic="AI", content="Neural networks are eating the world", user_id=user_id)
+        )
+        await db.flush()
+        assert db.fts_enabled
+
+        hits = await db.search_posts("neural")
+        assert [h["post_id"] for h in hits] == ["p1", "p2"]  # title beats body
+        assert "[" in hits[0]["snippet"]
+        assert [h["post_id"] for h in await db.search_posts("neural", topic="Rust")] == ["p2"]
+        # A post found again for another topic matches that topic too.
+        await db.link_posts([post("p1", "Rust", user_id=7)])
+        assert [h["post_id"] for h in await db.search_posts("neural", topic="Rust")] == ["p1", "p2"]
+        for linked_user, expected in ((7, ["p1", "p2"]), (8, ["p2"])):
+            hits = await db.search_posts("neural", topic="Rust", user_id=linked_user)
+            assert [h["post_id"] for h in hits] == expected
+        assert [h["post_id"] for h in await db.search_posts("backprop*")] == ["p1"]
+        assert await db.search_posts("") == []
+
+        tweets = await db.search_tweets(user_id, "eating")
+        assert [t["content"] for t in tweets] == ["Neural networks are eating the world"]
+        assert await db.search_tweets(user_id + 1, "eating") == []
+
+    run_with_db(body)
+
+
+# --- Retention and run log ---
+
+
+def test_retention_keeps_inspiring_posts(run_with_db):
+    async def body(db):
+        await db.save_scraped_posts([post("old"), post("inspiring"), post("relinked"), post("rescraped")])
+        [inspiring] = [p for p in await db.get_top_posts("AI") if p.post_id == "inspiring"]
+        await db.save_generated_tweet(
+            GeneratedTweet(topic="AI", content="t", user_id=1, inspiration_post_ids=[inspiring.id])
+        )
+        await db.log_run("discovery", "success", topics_processed=2)
+        await db.flush()
+        await db.begin_retention()
+        assert await db.get_expired_rows("scraped_posts", 30) == []
+
+        await backdate(db, "scraped_posts", "scraped_at", 40)
+        await backdate(db, "post_topics", "scraped_at", 40)
+        await backdate(db, "run_log", "started_at", 40)
+        # Scraped again for another topic: a fresh link keeps the post.
+        await db.link_posts([post("relinked", "Rust", user_id=5)])
+        # Scraped again for the same topic: the refreshed link counts as new.
+        await db.save_scraped_posts([post("rescraped")], upsert=True)
+        expired = await db.get_expired_rows("scraped_posts", 30)
+        assert [row["post_id"] for row in expired] == ["old"]
+        assert [(link["topic"], link["user_id"]) for link in expired[0]["links"]] == [("AI", 0)]
+        assert await db.delete_rows("scraped_posts", [row["id"] for row in expired]) == 1
+        assert {p.post_id for p in await db.get_top_posts("AI")} == {"inspiring", "relinked", "rescraped"}
+
+        runs = await db.get_expired_rows("run_log", 30)
+        assert [(r["run_type"], r["topics_processed"]) for r in runs] == [("discovery", 2)]
+        assert await db.delete_rows("run_log", [r["id"] for r in runs]) == 1
+        assert await db.incremental_vacuum() >= 0
+
+    run_with_db(body)